@@ -1,21 +1,37 @@
 # app.py
 
+import importlib
+import os
 import sys
+import time
+
+_T0 = time.perf_counter()
+
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QLabel
+    QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QLabel, QSplashScreen
 )
+from PyQt5.QtGui import QPixmap, QColor
+
+# --- Tab widgets ---
+# (title, module, class, attribute on App). Modules are imported and the
+# widget created the first time its tab is shown, so startup only pays for
+# the first tab; the S2P viewer's matplotlib loads on demand.
+TABS = [
+    ("Layout Editor", "ui.main_window", "MainWindow", "main_window"),
+    ("S2P Viewer", "ui.s2p_viewer", "S2PViewer", "s2p_viewer"),
+    ("IM Viewer", "ui.im_viewer", "IMViewer", "im_viewer"),
+]
 
-# --- Import tab widgets ---
-# Make sure these files exist:
-#   ui/main_window.py  -> class MainWindow(QWidget)
-#   ui/s2p_viewer.py   -> class S2PViewer(QWidget)
-#   ui/im_viewer.py    -> class IMViewer(QWidget)
-from ui.main_window import MainWindow
-from ui.s2p_viewer import S2PViewer
-from ui.im_viewer import IMViewer
+# Set to make the window quit once it is ready (used by the startup benchmark)
+EXIT_WHEN_READY_ENV = "BOARDTEST_EXIT_WHEN_READY"
 
 
 class App(QMainWindow):
+    # Emitted once the first tab is built and the event loop is idle; carries
+    # the seconds since this module started importing.
+    ready = pyqtSignal(float)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Board Test Pluggable")
@@ -26,29 +42,62 @@ class App(QMainWindow):
         self.setCentralWidget(central)
         vbox = QVBoxLayout(central)
 
-        # Tabs
+        # Tabs: an empty host per tab, filled on first activation
         self.tabs = QTabWidget(self)
         vbox.addWidget(self.tabs)
+        self._hosts = []
+        for title, _, _, attr in TABS:
+            host = QWidget(); QVBoxLayout(host).setContentsMargins(0, 0, 0, 0)
+            self._hosts.append(host)
+            setattr(self, attr, None)
+            self.tabs.addTab(host, title)
+        self.tabs.currentChanged.connect(self._ensure_tab)
+
+    def _ensure_tab(self, index: int):
+        if index < 0 or getattr(self, TABS[index][3]) is not None:
+            return
+        title, module, cls, attr = TABS[index]
+        host = self._hosts[index]
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            widget = getattr(importlib.import_module(module), cls)()
+        except Exception as e:
+            widget = QLabel(f"Failed to load {title}:\n{e}")
+            widget.setAlignment(Qt.AlignCenter)
+        finally:
+            QApplication.restoreOverrideCursor()
+        host.layout().addWidget(widget)
+        setattr(self, attr, widget)
 
-        # --- Tab 1: Layout Editor ---
-        self.main_window = MainWindow()            # <-- must be an INSTANCE of QWidget
-        self.tabs.addTab(self.main_window, "Layout Editor")
+    def start(self):
+        # Build the visible tab after the window is up, then signal ready.
+        self._ensure_tab(self.tabs.currentIndex())
+        QTimer.singleShot(0, lambda: self.ready.emit(time.perf_counter() - _T0))
 
-        # --- Tab 2: S2P Viewer ---
-        self.s2p_viewer = S2PViewer()              # <-- must be an INSTANCE of QWidget
-        self.tabs.addTab(self.s2p_viewer, "S2P Viewer")
 
-        # --- Tab 3: IM Viewer ---
-        self.im_viewer = IMViewer()                # <-- must be an INSTANCE of QWidget
-        self.tabs.addTab(self.im_viewer, "IM Viewer")
+def _splash() -> QSplashScreen:
+    pix = QPixmap(420, 140); pix.fill(QColor("#263238"))
+    splash = QSplashScreen(pix)
+    splash.showMessage("Board Test Pluggable\nLoading…", Qt.AlignCenter, QColor("white"))
+    splash.show()
+    return splash
 
 
 def main():
     # Optional: better scaling on HiDPI displays
     QApplication.setAttribute
     app = QApplication(sys.argv)
+    splash = _splash()
+    app.processEvents()
+
     window = App()
+    window.ready.connect(lambda secs: print(f"[startup] ready in {secs * 1000:.0f} ms", file=sys.stderr))
+    if os.environ.get(EXIT_WHEN_READY_ENV):
+        window.ready.connect(lambda secs: QTimer.singleShot(0, app.quit))
+    # the splash stays up until the first tab is built
+    window.ready.connect(lambda secs: splash.finish(window))
     window.show()
+    window.start()
     sys.exit(app.exec_())
 
 
@@ -0,0 +1,5 @@
+import sys
+
+from boardtest.cli import main
+
+sys.exit(main())
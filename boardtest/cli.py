@@ -0,0 +1,275 @@
+# Headless entry point: python -m boardtest <command> ...
+#
+# Everything here runs without Tk or Qt. Command modules are imported inside
+# each handler so a `validate` call does not pay for pdf2image or pandas.
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+def load_layout(path: str):
+    from core.layout import Layout
+    return Layout.load(path)
+
+
+def load_values(path: str) -> Dict[str, Any]:
+    # JSON object {field_id: value} (numbers may be "10", ["10", "kΩ"] or
+    # {"value": .., "unit": ..}), or a CSV with field_id,value[,unit] columns.
+    # "-" reads JSON from stdin.
+    if path == "-":
+        return json.load(sys.stdin)
+    if Path(path).suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return {r["field_id"]: [r.get("value", ""), r.get("unit") or ""] for r in csv.DictReader(f)}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _coerced(layout, raw: Dict[str, Any]) -> Dict[str, Any]:
+    from core import runs
+    fields = layout.field_map()
+    unknown = sorted(set(raw) - set(fields))
+    if unknown:
+        print(f"warning: not in layout: {', '.join(unknown)}", file=sys.stderr)
+    return {fid: runs.coerce_value(fields[fid], v) for fid, v in raw.items() if fid in fields}
+
+
+def _print_table(header: List[str], rows: List[List[Any]], out=None):
+    out = out or sys.stdout
+    rows = [["" if v is None else str(v) for v in r] for r in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in rows if i < len(r)]) for i, h in enumerate(header)]
+    for r in [header] + rows:
+        out.write("  ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip() + "\n")
+
+
+# ----- commands -----
+def cmd_render(args) -> int:
+    from core.pdf_renderer import render_background
+    cfg = dict(load_layout(args.layout).canvas or {})
+    if args.dpi is not None: cfg["dpi"] = args.dpi
+    if args.page is not None: cfg["page"] = args.page
+    img = render_background(cfg, use_cache=not args.no_cache)
+    if img is None:
+        print("render failed", file=sys.stderr); return 1
+    out = args.output or str(Path(args.layout).with_suffix(".png").name)
+    img.save(out)
+    print(f"{out} {img.width}x{img.height}")
+    return 0
+
+
+def cmd_validate(args) -> int:
+    from core import runs
+    layout = load_layout(args.layout)
+    values = _coerced(layout, load_values(args.values))
+    rows = runs.measurement_rows(layout, values, "")
+    if args.json:
+        json.dump({r["field_id"]: {"value": r["value"], "unit": r["unit"], "status": r["status"]} for r in rows},
+                  sys.stdout, ensure_ascii=False, indent=1)
+        sys.stdout.write("\n")
+    else:
+        _print_table(["field_id", "value", "unit", "status"], [[r["field_id"], r["value"], r["unit"], r["status"]] for r in rows])
+    bad = {"fail", "invalid"}
+    return 1 if any(r["status"] in bad for r in rows) else 0
+
+
+def cmd_log(args) -> int:
+    from core import db, runs
+    from core.validation import compile_rules
+    layout = load_layout(args.layout)
+    values = _coerced(layout, load_values(args.values))
+    run_id, ts = runs.new_run_id(layout)
+    run_id = args.run_id or run_id
+    rules = compile_rules(layout.fields)
+    rows = runs.measurement_rows(layout, values, ts, args.operator, args.lot, args.dut, rules=rules)
+    if args.output:
+        from core.export import write_rows
+        write_rows(args.output, runs.RUN_EXPORT_COLUMNS, runs.export_rows(rows))
+    db.init_db()
+    meta = runs.run_meta(layout, run_id, ts, args.operator, args.lot, args.dut, str(Path(args.layout).resolve()), args.notes)
+    db.insert_run(meta, rows, rules=rules)
+    print(run_id)
+    return 0
+
+
+def _select_runs(args) -> List[str]:
+    from core import db
+    if args.run_ids: return list(args.run_ids)
+    return [r.run_id for r in db.list_runs(board_name=args.board, lot=args.lot, since=args.since,
+                                           until=args.until, limit=args.last)]
+
+
+def cmd_export(args) -> int:
+    from core import db, export
+    db.init_db()
+    run_ids = _select_runs(args)
+    if not run_ids:
+        print("no runs selected", file=sys.stderr); return 1
+    n = export.export_runs(args.output, run_ids)
+    print(f"{args.output}: {len(run_ids)} runs, {n} rows")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    from core import db
+    from core.compare import CompareEngine
+    db.init_db()
+    run_ids = _select_runs(args)
+    if len(run_ids) < 2:
+        print("compare needs at least two runs", file=sys.stderr); return 1
+    comparison = CompareEngine().compare(run_ids)
+    header, rows, diff = comparison.table(only_diff=args.only_diff, with_pct=not args.no_pct)
+    if args.output:
+        from core.export import write_rows
+        write_rows(args.output, header, rows)
+        print(f"{args.output}: {len(rows)} fields")
+    else:
+        _print_table(header, rows)
+    return 1 if args.fail_on_diff and diff[:, 1:].any() else 0
+
+
+def cmd_rftest(args) -> int:
+    from datetime import datetime
+    from core import rfmask, sparams
+    from core.runs import TS_FORMAT
+    mask = rfmask.Mask.load(args.mask)
+    nets, errors = sparams.load_many(args.files, args.workers)
+    for path, err in errors:
+        print(f"error: {path}: {err}", file=sys.stderr)
+    results = mask.evaluate_many(nets)
+    if args.json:
+        json.dump({n.path: [{"band": r.band.name, "status": rfmask.STATUS_NAMES[r.status], "margin": r.margin,
+                             "worst_f": r.worst_f, "points": r.points} for r in res]
+                   for n, res in zip(nets, results)}, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        header, _ = rfmask.result_table([])
+        _print_table(["file"] + header, [[Path(n.path).name] + row for n, res in zip(nets, results)
+                                         for row in rfmask.result_table(res)[1]])
+    if args.log:
+        from core import db
+        db.init_db()
+        ts = datetime.now().strftime(TS_FORMAT)
+        records = rfmask.run_records(nets, mask, ts, args.board or mask.name, args.operator, args.lot,
+                                     store_sweeps=not args.no_sweeps, results=results)
+        stats = db.insert_runs(records)
+        print(f"logged {stats.runs} runs, {stats.measurements} measurements", file=sys.stderr)
+    return 1 if errors or not all(rfmask.passed(res) for res in results) else 0
+
+
+def cmd_spc(args) -> int:
+    # Summaries come from the spc_stats aggregates, not the raw measurements.
+    from core import db, spc
+    db.init_db()
+    if args.by_lot:
+        parts = spc.lot_summaries(args.board, args.field)
+    elif args.field:
+        parts = [s for s in [spc.field_summary(args.board, args.field)] if s is not None]
+    else:
+        parts = spc.board_summaries(args.board)
+    rules = None
+    if args.layout:
+        from core.validation import compile_rules
+        rules = compile_rules(load_layout(args.layout).fields)
+    g = lambda x: "" if x is None else f"{x:.6g}"
+    rows = []
+    for s in parts:
+        lcl, _, ucl = spc.control_limits(s) or (None, None, None)
+        cpk = spc.cpk(s, *spc.spec_limits(rules, s.field_id)) if rules is not None else None
+        y = s.yield_pct
+        rows.append([s.field_id, s.lot, s.n, g(s.mean), g(s.std), g(s.minimum), g(s.maximum),
+                     g(lcl), g(ucl), "" if y is None else f"{y:.1f}", "" if cpk is None else f"{cpk:.2f}"])
+    if not rows:
+        print(f"no statistics for board {args.board!r}", file=sys.stderr); return 1
+    _print_table(["field_id", "lot", "n", "mean", "std", "min", "max", "LCL", "UCL", "yield %", "Cpk"], rows)
+    return 0
+
+
+def cmd_import(args) -> int:
+    from core import importer
+    argv = list(args.paths) + ["--batch", str(args.batch), "--state", args.state]
+    if args.workers: argv += ["--workers", str(args.workers)]
+    return importer.main(argv)
+
+
+def cmd_startup(args) -> int:
+    from boardtest import startup
+    return 0 if startup.report(startup.run(args.repeat, not args.no_window)) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m boardtest", description="Board tester batch mode.")
+    ap.add_argument("--db", help="results database (default: data/db/results.db)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("render", help="render a layout's canvas background to an image")
+    p.add_argument("layout"); p.add_argument("-o", "--output")
+    p.add_argument("--dpi", type=int); p.add_argument("--page", type=int)
+    p.add_argument("--no-cache", action="store_true", help="bypass the raster cache")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("validate", help="check a values file against a layout's limits (exit 1 on fail)")
+    p.add_argument("layout"); p.add_argument("values", help="JSON or CSV values file, '-' for JSON on stdin")
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("log", help="record a values file as a run in the database")
+    p.add_argument("layout"); p.add_argument("values")
+    p.add_argument("--operator", default=""); p.add_argument("--lot", default="")
+    p.add_argument("--dut", default=""); p.add_argument("--notes", default="")
+    p.add_argument("--run-id", help="default: <timestamp>_<board_name>")
+    p.add_argument("-o", "--output", help="also write the run export (.xlsx/.csv/.parquet; .parquet needs pyarrow)")
+    p.set_defaults(func=cmd_log)
+
+    for name, helptext, func in (("export", "export runs from the database", cmd_export),
+                                 ("compare", "compare runs field by field (first run is the baseline)", cmd_compare)):
+        p = sub.add_parser(name, help=helptext)
+        p.add_argument("run_ids", nargs="*", help="run ids; or select with the filters below")
+        p.add_argument("--board"); p.add_argument("--lot")
+        p.add_argument("--since"); p.add_argument("--until")
+        p.add_argument("--last", type=int, help="newest N matching runs")
+        p.set_defaults(func=func)
+    sub.choices["export"].add_argument("-o", "--output", required=True, help=".xlsx, .csv or .parquet (.parquet needs pyarrow)")
+    sub.choices["compare"].add_argument("-o", "--output", help="write the table instead of printing it")
+    sub.choices["compare"].add_argument("--only-diff", action="store_true")
+    sub.choices["compare"].add_argument("--no-pct", action="store_true",
+                                        help="leave out the %% deviation from the baseline in differing cells")
+    sub.choices["compare"].add_argument("--fail-on-diff", action="store_true", help="exit 1 if any run differs from the baseline")
+
+    p = sub.add_parser("rftest", help="check Touchstone files against a limit mask (exit 1 on fail)")
+    p.add_argument("mask", help="mask JSON file"); p.add_argument("files", nargs="+", help=".sNp files")
+    p.add_argument("--json", action="store_true", help="print results as JSON")
+    p.add_argument("--log", action="store_true", help="record each file as a run in the database")
+    p.add_argument("--no-sweeps", action="store_true", help="with --log, do not store the raw sweeps")
+    p.add_argument("--board", help="board name of logged runs (default: the mask name)")
+    p.add_argument("--operator", default=""); p.add_argument("--lot", default="")
+    p.add_argument("--workers", type=int, help="parser processes (default: one per CPU)")
+    p.set_defaults(func=cmd_rftest)
+
+    p = sub.add_parser("spc", help="per-field statistics, control limits and Cpk of a board (SI units)")
+    p.add_argument("board"); p.add_argument("--field")
+    p.add_argument("--by-lot", action="store_true", help="one row per lot instead of all lots merged")
+    p.add_argument("--layout", help="layout whose limits are the spec limits for Cpk")
+    p.set_defaults(func=cmd_spc)
+
+    p = sub.add_parser("import", help="bulk-import run_*.xlsx workbooks")
+    p.add_argument("paths", nargs="+")
+    p.add_argument("--workers", type=int); p.add_argument("--batch", type=int, default=2000)
+    p.add_argument("--state", default="data/db/import_state.jsonl")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("startup", help="benchmark GUI startup against the import-time budgets")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--no-window", action="store_true", help="skip the offscreen time-to-ready run")
+    p.set_defaults(func=cmd_startup)
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.db:
+        from core import db
+        db.DB_PATH = Path(args.db)
+    return args.func(args)
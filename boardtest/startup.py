@@ -0,0 +1,92 @@
+# Startup benchmark: import-time budgets and time-to-ready for app.py.
+#
+# Every measurement runs in a fresh interpreter so module caches from this
+# process do not hide import costs. Run with `python -m boardtest startup`.
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time per module, in ms (python -X importtime)
+IMPORT_BUDGET_MS: Dict[str, float] = {
+    "app": 150.0,
+    "ui.main_window": 500.0,
+    "boardtest.cli": 60.0,
+    "core.db": 250.0,
+}
+# Process start to App.ready, offscreen
+READY_BUDGET_MS = 1500.0
+# Same variable as app.EXIT_WHEN_READY_ENV (not imported: that would load Qt here)
+EXIT_WHEN_READY_ENV = "BOARDTEST_EXIT_WHEN_READY"
+# Must not be loaded by `import app`; they belong to tabs or actions
+DEFERRED_MODULES = ["pandas", "matplotlib", "pdf2image", "tkinter"]
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)")
+_READY_RE = re.compile(r"\[startup\] ready in (\d+) ms")
+
+
+class Check(NamedTuple):
+    name: str
+    ms: Optional[float]
+    budget: Optional[float]
+    ok: bool
+    note: str = ""
+
+
+def _python(args: List[str], env: Optional[Dict[str, str]] = None, timeout: float = 120):
+    return subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})}, timeout=timeout)
+
+
+def import_ms(module: str) -> Optional[float]:
+    proc = _python(["-X", "importtime", "-c", f"import {module}"])
+    if proc.returncode != 0: return None
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m and m.group(2) == module:
+            return int(m.group(1)) / 1000.0
+    return None
+
+
+def deferred_loaded(module: str = "app") -> List[str]:
+    code = f"import sys, {module}; print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    proc = _python(["-c", code])
+    return proc.stdout.split() if proc.returncode == 0 else ["<import failed>"]
+
+
+def ready_ms() -> Optional[float]:
+    proc = _python(["app.py"], env={"QT_QPA_PLATFORM": "offscreen", EXIT_WHEN_READY_ENV: "1"})
+    m = _READY_RE.search(proc.stderr)
+    return float(m.group(1)) if m else None
+
+
+def run(repeat: int = 3, with_ready: bool = True) -> List[Check]:
+    checks = []
+    for mod, budget in IMPORT_BUDGET_MS.items():
+        samples = [t for t in (import_ms(mod) for _ in range(repeat)) if t is not None]
+        if not samples:
+            checks.append(Check(f"import {mod}", None, budget, False, "import failed")); continue
+        t = statistics.median(samples)
+        checks.append(Check(f"import {mod}", t, budget, t <= budget))
+    loaded = deferred_loaded()
+    checks.append(Check("deferred modules", None, None, not loaded, ", ".join(loaded) or "none loaded by app"))
+    if with_ready:
+        samples = [t for t in (ready_ms() for _ in range(repeat)) if t is not None]
+        t = statistics.median(samples) if samples else None
+        checks.append(Check("app ready", t, READY_BUDGET_MS, t is not None and t <= READY_BUDGET_MS,
+                            "" if samples else "window never signalled ready"))
+    return checks
+
+
+def report(checks: List[Check], out=None) -> bool:
+    out = out or sys.stdout
+    for c in checks:
+        ms = f"{c.ms:8.1f} ms" if c.ms is not None else " " * 11
+        budget = f"/ {c.budget:.0f} ms" if c.budget is not None else ""
+        out.write(f"{'ok  ' if c.ok else 'FAIL'} {c.name:<24} {ms} {budget:<10} {c.note}\n")
+    return all(c.ok for c in checks)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from PIL import Image
+
+from core.layout import migrate
+from core.pdf_renderer import render_background
+from core.raster_cache import RasterCache, get_default_cache
+
+# Layout catalog: one summary row per layout file, kept in a small JSON index
+# so the picker only stats files it has seen before. Thumbnails are rendered
+# at thumbnail scale on a worker thread and stored as PNGs.
+
+INDEX_PATH = Path("data/cache/layout_index.json")
+THUMB_DIR = Path("data/cache/thumbs")
+THUMB_SIZE = (200, 150)
+THUMB_DPI = 24   # a letter/A4 page at 24 dpi still covers THUMB_SIZE in its limiting dimension
+INDEX_VERSION = 1
+
+LEGACY_SCHEMA = "1.0"  # layouts written before schema_version existed
+
+
+class LayoutEntry(NamedTuple):
+    path: str
+    name: str
+    board_name: str
+    n_fields: int
+    canvas_type: str
+    schema_version: str
+    canvas: Dict[str, Any]
+    mtime_ns: int
+    size: int
+    error: str = ""
+
+    def matches(self, terms: List[str]) -> bool:
+        # every term must occur in the file name, board name or canvas type
+        hay = f"{self.name}\n{self.board_name}\n{self.canvas_type}".lower()
+        return all(t in hay for t in terms)
+
+
+def search(entries: List[LayoutEntry], text: str) -> List[LayoutEntry]:
+    terms = text.lower().split()
+    return [e for e in entries if e.matches(terms)] if terms else list(entries)
+
+
+def read_entry(path: str, st: os.stat_result) -> LayoutEntry:
+    name = os.path.basename(path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        declared = str(raw.get("schema_version") or LEGACY_SCHEMA)
+        d = migrate(raw)
+    except (OSError, ValueError, AttributeError) as e:
+        return LayoutEntry(path, name, "", 0, "", "", {}, st.st_mtime_ns, st.st_size, str(e))
+    canvas = d.get("canvas") or {}
+    return LayoutEntry(path, name, str(d.get("board_name", "")), len(d.get("fields") or []),
+                       str(canvas.get("type", "")), declared, canvas, st.st_mtime_ns, st.st_size)
+
+
+class LayoutCatalog:
+    def __init__(self, layouts_dir: str, index_path: Path = INDEX_PATH):
+        self.layouts_dir = layouts_dir
+        self.index_path = Path(index_path)
+        self._index: Optional[Dict[str, LayoutEntry]] = None
+
+    def scan(self) -> List[LayoutEntry]:
+        # Entries sorted by file name. Files whose mtime and size match the
+        # index are not opened; the index is rewritten only if something changed.
+        index = self._load_index()
+        root = os.path.abspath(self.layouts_dir)
+        out: Dict[str, LayoutEntry] = {}
+        changed = False
+        try:
+            names = sorted(n for n in os.listdir(root) if n.lower().endswith(".json"))
+        except OSError:
+            names = []
+        for n in names:
+            path = os.path.join(root, n)
+            try: st = os.stat(path)
+            except OSError: continue
+            e = index.get(path)
+            if e is None or e.mtime_ns != st.st_mtime_ns or e.size != st.st_size:
+                e = read_entry(path, st); changed = True
+            out[path] = e
+        # entries from other directories share the index file
+        merged = {p: e for p, e in index.items() if os.path.dirname(p) != root}
+        changed = changed or len(merged) + len(out) != len(index)
+        merged.update(out)
+        self._index = merged
+        if changed: self._save_index()
+        return list(out.values())
+
+    def _load_index(self) -> Dict[str, LayoutEntry]:
+        if self._index is not None:
+            return self._index
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+            if doc.get("version") != INDEX_VERSION: return {}
+            return {p: LayoutEntry(*row) for p, row in doc.get("entries", {}).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+
+    def _save_index(self):
+        doc = {"version": INDEX_VERSION, "entries": {p: list(e) for p, e in (self._index or {}).items()}}
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(doc, f, ensure_ascii=False)
+            os.replace(tmp, self.index_path)
+        except OSError as e:
+            print(f"[catalog] index write failed: {e}")
+
+
+# callback(entry, thumbnail or None), called on the worker thread
+ThumbCallback = Callable[[LayoutEntry, Optional[Image.Image]], None]
+
+
+class ThumbnailCache:
+    # Low-res canvas previews. On disk they are keyed by the raster cache's
+    # content key, so a thumbnail is regenerated only when the background
+    # itself changes; in memory by layout path and mtime, so get() never
+    # hashes a source file on the caller's thread. A single worker drains the
+    # queue; urgent requests (the row just selected) jump ahead of the
+    # background warm-up of the rest of the list.
+    def __init__(self, thumb_dir: Path = THUMB_DIR, size=THUMB_SIZE, cache: Optional[RasterCache] = None,
+                 max_memory: int = 256):
+        self.thumb_dir = Path(thumb_dir)
+        self.size = tuple(size)
+        self.cache = cache or get_default_cache()
+        self.max_memory = max_memory
+        self._mem: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+        self._queue: "deque[tuple]" = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def key_for(self, entry: LayoutEntry) -> Optional[str]:
+        cfg = self._render_cfg(entry)
+        base = self.cache.key_for(cfg) if cfg else None
+        if base is None: return None
+        return hashlib.sha1(f"{base}:{self.size[0]}x{self.size[1]}".encode()).hexdigest()
+
+    def get(self, entry: LayoutEntry) -> Optional[Image.Image]:
+        # memory only; never blocks on rendering
+        key = (entry.path, entry.mtime_ns)
+        with self._cond:
+            img = self._mem.get(key)
+            if img is not None: self._mem.move_to_end(key)
+            return img
+
+    def request(self, entry: LayoutEntry, callback: ThumbCallback, urgent: bool = False):
+        with self._cond:
+            if self._closed: return
+            if urgent: self._queue.appendleft((entry, callback))
+            else: self._queue.append((entry, callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="thumbs", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel_pending(self):
+        with self._cond:
+            self._queue.clear()
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True; self._queue.clear(); self._cond.notify()
+
+    # ----- internals -----
+    def _render_cfg(self, entry: LayoutEntry) -> Optional[Dict[str, Any]]:
+        cfg = dict(entry.canvas or {})
+        if not cfg or entry.error: return None
+        if cfg.get("type", "pdf") == "pdf":
+            cfg["dpi"] = min(int(cfg.get("dpi", 144)), THUMB_DPI)
+        return cfg
+
+    def _render_source(self, cfg: Dict[str, Any]) -> Optional[Image.Image]:
+        # Bypasses the raster cache: a one-off low-res render would only push
+        # full-size pages out of its memory tier. Images are decoded through
+        # draft(), which lets JPEGs decode straight at a reduced scale.
+        if cfg.get("type") == "image":
+            with Image.open(cfg.get("path")) as f:
+                f.draft("RGB", self.size)
+                return f.convert("RGB")
+        return render_background(cfg, use_cache=False)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed: return
+                entry, callback = self._queue.popleft()
+            try:
+                img = self._thumbnail(entry)
+            except Exception as e:
+                print(f"[catalog] thumbnail failed for {entry.name}: {e}")
+                img = None
+            callback(entry, img)
+
+    def _thumbnail(self, entry: LayoutEntry) -> Optional[Image.Image]:
+        img = self.get(entry)
+        if img is not None: return img
+        key = self.key_for(entry)
+        if key is None: return None
+        path = self.thumb_dir / f"{key}.png"
+        try:
+            with Image.open(path) as f:
+                img = f.convert("RGB")
+        except (OSError, ValueError):
+            img = self._render_source(self._render_cfg(entry))
+            if img is None: return None
+            img.thumbnail(self.size, Image.BILINEAR)
+            try:
+                self.thumb_dir.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+                img.save(tmp, format="PNG"); os.replace(tmp, path)
+            except OSError as e:
+                print(f"[catalog] thumbnail write failed: {e}")
+        with self._cond:
+            self._mem[(entry.path, entry.mtime_ns)] = img
+            while len(self._mem) > self.max_memory: self._mem.popitem(last=False)
+        return img
@@ -0,0 +1,94 @@
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from core import db
+
+ID_COLS = ["Field ID", "Label"]
+
+
+class Comparison:
+    # Measurements of several runs pivoted once into field x run matrices.
+    # The first run is the baseline. `display` holds the text shown per cell
+    # ("" when a run has no value), `numeric` the SI value from value_num.
+    # Deltas and % deviation are numeric minus baseline, NaN where either side
+    # is not a number.
+    def __init__(self, run_ids: Sequence[str], labels: pd.Series, display: pd.DataFrame, numeric: pd.DataFrame):
+        self.run_ids = list(run_ids)
+        self.baseline = self.run_ids[0] if self.run_ids else None
+        self.labels = labels
+        self.display = display
+        self.numeric = numeric
+        if self.run_ids:
+            base_num = numeric[self.baseline]
+            self.delta = numeric.sub(base_num, axis=0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self.pct = self.delta.div(base_num.abs().replace(0.0, np.nan), axis=0) * 100.0
+            self.differs = display.ne(display[self.baseline], axis=0)
+        else:
+            self.delta = self.pct = numeric
+            self.differs = display.astype(bool)
+        self.any_diff = self.differs.any(axis=1).to_numpy()
+
+    def __len__(self) -> int:
+        return len(self.display)
+
+    @property
+    def field_ids(self) -> List[str]:
+        return list(self.display.index)
+
+    def table(self, only_diff: bool = False, with_pct: bool = True) -> Tuple[List[str], List[List[str]], np.ndarray]:
+        # Header, rows and a per-cell diff mask (aligned with the run columns)
+        # for a grid view. With with_pct, differing numeric cells get their %
+        # deviation from the baseline appended.
+        mask = self.any_diff if only_diff else np.ones(len(self), dtype=bool)
+        disp = self.display[mask]
+        cells = disp.to_numpy(dtype=object)
+        diff = self.differs[mask].to_numpy()
+        if with_pct and len(cells):
+            pct = self.pct[mask].to_numpy()
+            show = diff & ~np.isnan(pct)
+            for r, c in zip(*np.nonzero(show)):
+                cells[r, c] = f"{cells[r, c]} ({pct[r, c]:+.1f}%)"
+        ids = disp.index.to_numpy(dtype=object)[:, None]
+        labels = self.labels[mask].to_numpy(dtype=object)[:, None]
+        rows = np.hstack([ids, labels, cells]).tolist() if len(cells) else []
+        return ID_COLS + self.run_ids, rows, diff
+
+
+def build_comparison(measurements: Iterable[db.MeasurementRow], run_ids: Sequence[str]) -> Comparison:
+    run_ids = list(run_ids)
+    df = pd.DataFrame(list(measurements), columns=list(db.MeasurementRow._fields))
+    if df.empty:
+        empty = pd.DataFrame(index=pd.Index([], name="field_id"), columns=run_ids)
+        return Comparison(run_ids, pd.Series(dtype=object), empty.astype(object), empty.astype(float))
+    value = df["value"].fillna("").astype(str)
+    unit = df["unit"].fillna("").astype(str)
+    df["display"] = value.where(unit == "", value + " " + unit)
+    df = df.drop_duplicates(["field_id", "run_id"], keep="last")
+
+    order = sorted(df["field_id"].unique(), key=lambda s: s.lower())
+    display = df.pivot(index="field_id", columns="run_id", values="display").reindex(index=order, columns=run_ids).fillna("")
+    numeric = df.pivot(index="field_id", columns="run_id", values="value_num").reindex(index=order, columns=run_ids).astype(float)
+    labels = df.drop_duplicates("field_id").set_index("field_id")["label"].reindex(order)
+    labels = labels.where(labels.notna() & (labels != ""), pd.Series(order, index=order))
+    return Comparison(run_ids, labels, display, numeric)
+
+
+class CompareEngine:
+    # Fetches and pivots a run selection once; repeated calls with the same
+    # selection (e.g. toggling "only differences") reuse the cached result.
+    def __init__(self, fetch: Optional[Callable[[Sequence[str]], List[db.MeasurementRow]]] = None):
+        self.fetch = fetch or db.measurements_for_runs
+        self._key: Optional[Tuple[str, ...]] = None
+        self._result: Optional[Comparison] = None
+
+    def compare(self, run_ids: Sequence[str], refresh: bool = False) -> Comparison:
+        key = tuple(run_ids)
+        if refresh or key != self._key or self._result is None:
+            self._result = build_comparison(self.fetch(list(key)), key)
+            self._key = key
+        return self._result
+
+    def invalidate(self):
+        self._key = None; self._result = None
@@ -1,6 +1,14 @@
+import math
 import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Iterable, Dict, Any
+from typing import Iterable, Dict, Any, Tuple, NamedTuple, List, Optional, Sequence, Callable, Union
+
+from core.layout import Layout
+from core.validation import RuleTable, compile_rules, parse_number, to_si, PASS, FAIL, INVALID, STATUS_NAMES
 
 DB_PATH = Path("data/db/results.db")
 
@@ -31,42 +39,674 @@ SCHEMA = [
     """
 ]
 
-def get_conn():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA journal_mode=WAL;")
+# Schema migrations, applied in order by init_db(). PRAGMA user_version holds the
+# number of the last one applied. Each entry is a list of SQL statements or a
+# callable taking the connection; append new ones, never edit applied ones.
+Migration = Union[List[str], Callable[[sqlite3.Connection], None]]
+MIGRATIONS: List[Migration] = [
+    # 1: indexes for run lookups, compare and per-field history
+    [
+        "CREATE INDEX IF NOT EXISTS idx_measurements_run_field ON measurements(run_id, field_id);",
+        "CREATE INDEX IF NOT EXISTS idx_measurements_field_run ON measurements(field_id, run_id);",
+        "CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs(timestamp);",
+        "CREATE INDEX IF NOT EXISTS idx_runs_board_lot_dut ON runs(board_name, lot, dut_id);",
+        "CREATE INDEX IF NOT EXISTS idx_runs_lot ON runs(lot);",
+        "CREATE INDEX IF NOT EXISTS idx_runs_dut ON runs(dut_id);",
+    ],
+    # 2: value_num/status columns, back-filled from existing rows
+    lambda conn: _migrate_numeric(conn),
+    # 3: running per-(board, lot, field) aggregates for SPC
+    lambda conn: _migrate_spc(conn),
+    # 4: raw S-parameter sweeps of a run, stored as binary blobs
+    [
+        """CREATE TABLE IF NOT EXISTS sweeps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            n_ports INTEGER NOT NULL,
+            n_points INTEGER NOT NULL,
+            f_start REAL,
+            f_stop REAL,
+            data BLOB NOT NULL,
+            FOREIGN KEY (run_id) REFERENCES runs(run_id) ON DELETE CASCADE
+        );""",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_sweeps_run_name ON sweeps(run_id, name);",
+    ],
+]
+
+# Applied to every new connection. journal_mode=WAL is persistent in the file;
+# the rest are per-connection. synchronous=NORMAL is safe under WAL (a power
+# cut can lose the last commits but not corrupt the file).
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA cache_size=-65536;",      # 64 MiB page cache
+    "PRAGMA mmap_size=268435456;",    # 256 MiB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY;",
+]
+
+BATCH_RUNS = 500
+
+RUN_INSERT = """INSERT INTO runs(run_id, timestamp, operator, lot, dut_id, board_name, layout_file, notes)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+MEAS_INSERT = """INSERT INTO measurements(run_id, field_id, label, component_type, value, unit, value_num, status)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+SWEEP_INSERT = """INSERT INTO sweeps(run_id, name, n_ports, n_points, f_start, f_stop, data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+# Measurement status column: PASS, FAIL or INVALID from core.validation; NULL
+# when the value was not judged (empty, non-number field, no limits on the
+# field, or a run logged without its layout rules).
+STATUS_CODES = {"pass": PASS, "fail": FAIL, "invalid": INVALID}
+JUDGED = frozenset(STATUS_CODES.values())
+
+# Running aggregates of value_num per (board, lot, field), kept in step with
+# measurements by insert_run/insert_runs. mean/m2 are Welford accumulators
+# (m2 = sum of squared deviations from the mean); batches are merged with
+# Chan's pairwise update so no raw rows are re-read. NULL board/lot are
+# stored as '' to keep the key unique.
+SPC_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS spc_stats (
+        board_name TEXT NOT NULL,
+        lot TEXT NOT NULL,
+        field_id TEXT NOT NULL,
+        n INTEGER NOT NULL,
+        mean REAL,
+        m2 REAL NOT NULL DEFAULT 0,
+        min REAL,
+        max REAL,
+        n_pass INTEGER NOT NULL DEFAULT 0,
+        n_fail INTEGER NOT NULL DEFAULT 0,
+        first_ts TEXT,
+        last_ts TEXT,
+        PRIMARY KEY (board_name, lot, field_id)
+    ) WITHOUT ROWID;
+"""
+SPC_UPSERT = """
+    INSERT INTO spc_stats(board_name, lot, field_id, n, mean, m2, min, max, n_pass, n_fail, first_ts, last_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(board_name, lot, field_id) DO UPDATE SET
+        n = n + excluded.n,
+        mean = (n * mean + excluded.n * excluded.mean) / (n + excluded.n),
+        m2 = m2 + excluded.m2 + (excluded.mean - mean) * (excluded.mean - mean) * n * excluded.n / (n + excluded.n),
+        min = MIN(COALESCE(min, excluded.min), excluded.min),
+        max = MAX(COALESCE(max, excluded.max), excluded.max),
+        n_pass = n_pass + excluded.n_pass,
+        n_fail = n_fail + excluded.n_fail,
+        first_ts = MIN(COALESCE(first_ts, excluded.first_ts), excluded.first_ts),
+        last_ts = MAX(COALESCE(last_ts, excluded.last_ts), excluded.last_ts)
+"""
+
+# One connection per (thread, database file). sqlite3 connections may not be
+# shared across threads by default, and opening one per call cost a directory
+# check, a connect and the pragma round trips every time. The registry holds
+# each thread's connections weakly: when a thread ends, its thread-local map
+# is freed and the connections close with it. Worker threads should still
+# wrap their work in closing_conn() so the files are released right away.
+class _Conns(dict):
+    __hash__ = object.__hash__   # identity, for the weak registry
+
+
+_local = threading.local()
+_all_conns: "weakref.WeakSet[_Conns]" = weakref.WeakSet()
+_all_lock = threading.Lock()
+# DB_PATH as given -> resolved file name, so get_conn() does not touch the
+# filesystem on every call (a relative DB_PATH is resolved once, against the
+# working directory of its first use).
+_resolved: Dict[str, str] = {}
+
+
+def get_conn() -> sqlite3.Connection:
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = _Conns()
+        with _all_lock:
+            _all_conns.add(conns)
+    raw = str(DB_PATH)
+    key = _resolved.get(raw)
+    if key is None:
+        key = _resolved.setdefault(raw, str(Path(raw).resolve()))
+    conn = conns.get(key)
+    if conn is None:
+        path = Path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, cached_statements=256)
+        for p in PRAGMAS:
+            conn.execute(p)
+        conns[key] = conn
     return conn
 
+
+def _close(conns: Dict[str, sqlite3.Connection]):
+    for conn in conns.values():
+        try: conn.close()
+        except sqlite3.Error: pass
+    conns.clear()
+
+
+def close_thread_conns():
+    # close the calling thread's connections
+    conns = getattr(_local, "conns", None)
+    if conns: _close(conns)
+
+
+@contextmanager
+def closing_conn():
+    # For worker threads: everything inside uses this thread's connection,
+    # which is closed on the way out.
+    try:
+        yield get_conn()
+    finally:
+        close_thread_conns()
+
+
+def close_all():
+    with _all_lock:
+        for conns in list(_all_conns):
+            _close(conns)
+    _local.conns = None
+
+
 def init_db():
     with get_conn() as conn:
         cur = conn.cursor()
         for stmt in SCHEMA:
             cur.execute(stmt)
         conn.commit()
+    migrate()
+
+
+def _si_value(value, unit) -> Optional[float]:
+    # value as stored (text) -> float in SI base units, None if not a finite
+    # number ("inf" parses, but has no place in aggregates or range queries)
+    x = to_si(parse_number(value), unit or "")
+    return x if x is not None and math.isfinite(x) else None
+
+
+def _status_code(status) -> Optional[int]:
+    # code or name -> PASS/FAIL/INVALID; EMPTY, NO_RULE and anything else -> None
+    if status is None or isinstance(status, bool): return None
+    if isinstance(status, int): return status if status in JUDGED else None
+    return STATUS_CODES.get(str(status).strip().lower())
+
 
-def insert_run(run_meta: Dict[str, Any], measurements: Iterable[Dict[str, Any]]):
+def _load_rules(layout_file: Optional[str]) -> Optional[RuleTable]:
+    try:
+        return compile_rules(Layout.load(layout_file).fields)
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def _migrate_numeric(conn: sqlite3.Connection):
+    # value_num is computed inside SQLite through a registered function. Status
+    # is re-derived from each run's layout file where it can still be read;
+    # rows whose layout is gone keep status NULL.
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(measurements)")}
+    if "value_num" not in cols:
+        conn.execute("ALTER TABLE measurements ADD COLUMN value_num REAL")
+    if "status" not in cols:
+        conn.execute("ALTER TABLE measurements ADD COLUMN status INTEGER")
+    conn.create_function("si_value", 2, _si_value, deterministic=True)
+    conn.execute("UPDATE measurements SET value_num = si_value(value, unit)")
+    for (layout_file,) in conn.execute("SELECT DISTINCT layout_file FROM runs").fetchall():
+        rules = _load_rules(layout_file) if layout_file else None
+        if rules is None: continue
+        rows = conn.execute("""SELECT m.id, m.field_id, m.value, m.unit FROM measurements m
+                               JOIN runs r ON r.run_id = m.run_id WHERE r.layout_file = ?""",
+                            (layout_file,)).fetchall()
+        conn.executemany("UPDATE measurements SET status = ? WHERE id = ?",
+                         [(_status_code(rules.check(fid, value, unit or None)), mid)
+                          for mid, fid, value, unit in rows if fid in rules])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_measurements_field_num ON measurements(field_id, value_num);")
+
+
+def _migrate_spc(conn: sqlite3.Connection):
+    conn.execute(SPC_SCHEMA)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_spc_stats_board_field ON spc_stats(board_name, field_id);")
+    rebuild_spc_stats(conn)
+
+
+def rebuild_spc_stats(conn: Optional[sqlite3.Connection] = None):
+    # Recomputes spc_stats from the raw measurements (two passes: means, then
+    # squared deviations). Only needed after rows are deleted or edited.
+    conn = conn or get_conn()
+    conn.execute("DELETE FROM spc_stats")
+    conn.execute(f"""
+        INSERT INTO spc_stats(board_name, lot, field_id, n, mean, m2, min, max, n_pass, n_fail, first_ts, last_ts)
+        SELECT COALESCE(r.board_name, ''), COALESCE(r.lot, ''), m.field_id, COUNT(*), AVG(m.value_num), 0,
+               MIN(m.value_num), MAX(m.value_num), COUNT(m.status = {PASS} OR NULL), COUNT(m.status = {FAIL} OR NULL),
+               MIN(r.timestamp), MAX(r.timestamp)
+        FROM measurements m JOIN runs r ON r.run_id = m.run_id
+        WHERE m.value_num IS NOT NULL
+        GROUP BY 1, 2, 3""")
+    conn.execute("""
+        UPDATE spc_stats SET m2 = (
+            SELECT COALESCE(SUM((m.value_num - spc_stats.mean) * (m.value_num - spc_stats.mean)), 0)
+            FROM measurements m JOIN runs r ON r.run_id = m.run_id
+            WHERE m.field_id = spc_stats.field_id AND m.value_num IS NOT NULL
+              AND COALESCE(r.board_name, '') = spc_stats.board_name AND COALESCE(r.lot, '') = spc_stats.lot)""")
+
+
+class _SpcBatch:
+    # Welford accumulators for the measurements of one or more runs, merged
+    # into spc_stats by flush().
+    def __init__(self):
+        self._acc: Dict[Tuple[str, str, str], List[Any]] = {}
+
+    def add(self, run_meta: Dict[str, Any], rows: Iterable[Tuple]):
+        board = run_meta.get("board_name") or ""; lot = run_meta.get("lot") or ""
+        ts = run_meta.get("timestamp")
+        for row in rows:
+            x, status = row[6], row[7]
+            if x is None or not math.isfinite(x): continue
+            a = self._acc.get((board, lot, row[1]))
+            if a is None:
+                a = self._acc[(board, lot, row[1])] = [0, 0.0, 0.0, x, x, 0, 0, ts, ts]
+            a[0] += 1
+            d = x - a[1]; a[1] += d / a[0]; a[2] += d * (x - a[1])
+            a[3] = min(a[3], x); a[4] = max(a[4], x)
+            a[5] += status == PASS; a[6] += status == FAIL
+            if ts is not None:
+                a[7] = min(a[7], ts) if a[7] is not None else ts
+                a[8] = max(a[8], ts) if a[8] is not None else ts
+
+    def flush(self, cur: sqlite3.Cursor):
+        if self._acc:
+            cur.executemany(SPC_UPSERT, [k + tuple(v) for k, v in self._acc.items()])
+            self._acc.clear()
+
+
+def schema_version(conn: Optional[sqlite3.Connection] = None) -> int:
+    return (conn or get_conn()).execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate() -> int:
+    # Each migration runs in its own transaction together with the version
+    # bump. The explicit BEGIN matters: sqlite3 only opens a transaction by
+    # itself before DML, so CREATE/ALTER statements would otherwise autocommit.
+    conn = get_conn()
+    version = schema_version(conn)
+    for n, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            conn.execute("BEGIN")
+            if callable(step):
+                step(conn)
+            else:
+                for stmt in step:
+                    conn.execute(stmt)
+            conn.execute(f"PRAGMA user_version={n}")
+    if version < len(MIGRATIONS):
+        conn.execute("PRAGMA optimize;")
+    return schema_version(conn)
+
+
+def _run_row(run_meta: Dict[str, Any]) -> Tuple:
+    return (
+        run_meta.get("run_id"),
+        run_meta.get("timestamp"),
+        run_meta.get("operator"),
+        run_meta.get("lot"),
+        run_meta.get("dut_id"),
+        run_meta.get("board_name"),
+        run_meta.get("layout_file"),
+        run_meta.get("notes","")
+    )
+
+
+def _meas_rows(run_id, measurements: Iterable[Dict[str, Any]], rules: Optional[RuleTable] = None):
+    # With rules, status comes from one vectorised pass over the number fields;
+    # otherwise from each measurement's own "status" (code or name), if any.
+    ms = list(measurements)
+    statuses = {fid: _status_code(code) for fid, code in rules.evaluate_map({m.get("field_id"): (m.get("value"), m.get("unit"))
+                                   for m in ms if m.get("field_id") in rules}).items()} if rules is not None else {}
+    return [
+        (run_id, m.get("field_id"), m.get("label"), m.get("component_type"), m.get("value"), m.get("unit"),
+         _si_value(m.get("value"), m.get("unit")),
+         statuses.get(m.get("field_id"), _status_code(m.get("status"))))
+        for m in ms
+    ]
+
+
+def _sweep_rows(run_id, sweeps) -> List[Tuple]:
+    # sweeps: {name: sparams.Network}, encoded with sparams.to_bytes
+    if not sweeps: return []
+    from core.sparams import to_bytes
+    return [(run_id, name, net.n_ports, net.n_points,
+             float(net.f[0]) if net.n_points else None, float(net.f[-1]) if net.n_points else None,
+             to_bytes(net))
+            for name, net in sweeps.items()]
+
+
+def insert_run(run_meta: Dict[str, Any], measurements: Iterable[Dict[str, Any]],
+               rules: Optional[RuleTable] = None, sweeps: Optional[Dict[str, Any]] = None):
+    rows = _meas_rows(run_meta.get("run_id"), measurements, rules)
+    blobs = _sweep_rows(run_meta.get("run_id"), sweeps)
+    spc = _SpcBatch(); spc.add(run_meta, rows)
     with get_conn() as conn:
         cur = conn.cursor()
-        cur.execute(
-            """INSERT INTO runs(run_id, timestamp, operator, lot, dut_id, board_name, layout_file, notes)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""" ,
-            (
-                run_meta.get("run_id"),
-                run_meta.get("timestamp"),
-                run_meta.get("operator"),
-                run_meta.get("lot"),
-                run_meta.get("dut_id"),
-                run_meta.get("board_name"),
-                run_meta.get("layout_file"),
-                run_meta.get("notes","")
-            )
-        )
-        cur.executemany(
-            """INSERT INTO measurements(run_id, field_id, label, component_type, value, unit)
-                   VALUES (?, ?, ?, ?, ?, ?)""" ,
-            [
-                (run_meta.get("run_id"), m.get("field_id"), m.get("label"), m.get("component_type"), m.get("value"), m.get("unit"))
-                for m in measurements
-            ]
-        )
-        conn.commit()
+        cur.execute(RUN_INSERT, _run_row(run_meta))
+        cur.executemany(MEAS_INSERT, rows)
+        if blobs: cur.executemany(SWEEP_INSERT, blobs)
+        spc.flush(cur)
+
+
+class InsertStats(NamedTuple):
+    runs: int
+    measurements: int
+    skipped: int
+    seconds: float
+
+    @property
+    def runs_per_sec(self) -> float:
+        return self.runs / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def measurements_per_sec(self) -> float:
+        return self.measurements / self.seconds if self.seconds > 0 else float("inf")
+
+
+def insert_runs(runs: Iterable[Tuple],
+                batch_runs: int = BATCH_RUNS, skip_existing: bool = False,
+                progress=None, rules: Optional[RuleTable] = None) -> InsertStats:
+    # Streams (run_meta, measurements) pairs, or (run_meta, measurements,
+    # sweeps) triples as insert_run takes them, into the database, committing
+    # every `batch_runs` runs. The INSERT statements are prepared once and reused.
+    # With skip_existing, runs whose run_id is already stored are skipped along
+    # with their measurements; otherwise a duplicate raises IntegrityError and
+    # the current batch is rolled back.
+    conn = get_conn()
+    run_sql = RUN_INSERT.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1) if skip_existing else RUN_INSERT
+    n_runs = n_meas = n_skip = pending = 0
+    t0 = time.perf_counter()
+    cur = conn.cursor()
+    spc = _SpcBatch()
+    # BEGIN fails inside an open transaction; a caller's uncommitted writes on
+    # this thread's connection are committed first rather than folded into
+    # (and rolled back with) the first batch.
+    if conn.in_transaction: conn.commit()
+    try:
+        conn.execute("BEGIN")
+        for item in runs:
+            meta, measurements = item[0], item[1]
+            cur.execute(run_sql, _run_row(meta))
+            if skip_existing and cur.rowcount == 0:
+                n_skip += 1; continue
+            rows = _meas_rows(meta.get("run_id"), measurements, rules)
+            cur.executemany(MEAS_INSERT, rows)
+            if len(item) > 2 and item[2]:
+                cur.executemany(SWEEP_INSERT, _sweep_rows(meta.get("run_id"), item[2]))
+            spc.add(meta, rows)
+            n_runs += 1; n_meas += len(rows); pending += 1
+            if pending >= batch_runs:
+                spc.flush(cur)
+                conn.execute("COMMIT"); conn.execute("BEGIN"); pending = 0
+                if progress: progress(n_runs, n_meas, n_skip)
+        spc.flush(cur)
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction: conn.execute("ROLLBACK")
+        raise
+    stats = InsertStats(n_runs, n_meas, n_skip, time.perf_counter() - t0)
+    if progress: progress(stats.runs, stats.measurements, stats.skipped)
+    return stats
+
+
+# ----- Queries -----
+class RunRow(NamedTuple):
+    run_id: str
+    timestamp: str
+    operator: Optional[str]
+    lot: Optional[str]
+    dut_id: Optional[str]
+    board_name: Optional[str]
+    layout_file: Optional[str]
+    notes: Optional[str]
+
+
+class MeasurementRow(NamedTuple):
+    run_id: str
+    field_id: str
+    label: Optional[str]
+    component_type: Optional[str]
+    value: Optional[str]
+    unit: Optional[str]
+    value_num: Optional[float]
+    status: Optional[int]
+
+
+class FieldPoint(NamedTuple):
+    run_id: str
+    timestamp: str
+    value: Optional[str]
+    unit: Optional[str]
+    value_num: Optional[float]
+    status: Optional[int]
+
+
+class SweepRow(NamedTuple):
+    run_id: str
+    name: str
+    n_ports: int
+    n_points: int
+    f_start: Optional[float]   # Hz
+    f_stop: Optional[float]
+    size: int                  # stored bytes
+
+
+class FieldStats(NamedTuple):
+    field_id: str
+    count: int        # rows with a numeric value
+    minimum: Optional[float]
+    maximum: Optional[float]
+    mean: Optional[float]
+    passed: int
+    failed: int
+
+
+RUN_COLS = "run_id, timestamp, operator, lot, dut_id, board_name, layout_file, notes"
+MEAS_COLS = "run_id, field_id, label, component_type, value, unit, value_num, status"
+
+# SQLite's default limit on bound parameters is 999 on older builds
+MAX_PARAMS = 900
+PREFIX_END = "\U0010ffff"
+
+
+def _runs_where(board_name=None, lot=None, dut_id=None, since=None, until=None, text=None, alias=""):
+    # alias qualifies the runs columns ("r" -> r.board_name) for joins
+    q = f"{alias}." if alias else ""
+    clauses, params = [], []
+    for col, v in (("board_name", board_name), ("lot", lot), ("dut_id", dut_id)):
+        if v is not None: clauses.append(f"{q}{col} = ?"); params.append(v)
+    if since is not None: clauses.append(f"{q}timestamp >= ?"); params.append(since)
+    if until is not None: clauses.append(f"{q}timestamp <= ?"); params.append(until)
+    if text:
+        # Case-sensitive prefix match on the columns shown in run pickers, as
+        # ranges so each column's index serves it (a '%text%' LIKE scans the
+        # table). PREFIX_END sorts after any character that can follow.
+        clauses.append("(" + " OR ".join(f"({q}{col} >= ? AND {q}{col} < ?)"
+                                         for col in ("run_id", "board_name", "lot", "dut_id")) + ")")
+        params += [text, text + PREFIX_END] * 4
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def list_runs(board_name: Optional[str] = None, lot: Optional[str] = None, dut_id: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None, text: Optional[str] = None,
+              limit: Optional[int] = None, offset: int = 0) -> List[RunRow]:
+    # Newest first; served by idx_runs_timestamp or idx_runs_board_lot_dut.
+    sql, params = _list_runs_query(board_name, lot, dut_id, since, until, text, limit, offset)
+    return [RunRow(*r) for r in get_conn().execute(sql, params)]
+
+
+def _list_runs_query(board_name=None, lot=None, dut_id=None, since=None, until=None, text=None,
+                     limit=None, offset=0) -> Tuple[str, List[Any]]:
+    where, params = _runs_where(board_name, lot, dut_id, since, until, text)
+    sql = f"SELECT {RUN_COLS} FROM runs{where} ORDER BY timestamp DESC"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"; params += [int(limit), int(offset)]
+    return sql, params
+
+
+def count_runs(board_name: Optional[str] = None, lot: Optional[str] = None, dut_id: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None, text: Optional[str] = None) -> int:
+    where, params = _runs_where(board_name, lot, dut_id, since, until, text)
+    return get_conn().execute(f"SELECT COUNT(*) FROM runs{where}", params).fetchone()[0]
+
+
+def get_run(run_id: str) -> Optional[RunRow]:
+    r = get_conn().execute(f"SELECT {RUN_COLS} FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    return RunRow(*r) if r else None
+
+
+def measurements_for_runs(run_ids: Sequence[str]) -> List[MeasurementRow]:
+    # Served by idx_measurements_run_field; chunked to stay under MAX_PARAMS.
+    out: List[MeasurementRow] = []
+    conn = get_conn()
+    ids = list(run_ids)
+    for i in range(0, len(ids), MAX_PARAMS):
+        out += [MeasurementRow(*r) for r in conn.execute(*_measurements_query(ids[i:i + MAX_PARAMS]))]
+    return out
+
+
+def _measurements_query(run_ids: Sequence[str]) -> Tuple[str, List[Any]]:
+    q_marks = ",".join("?" for _ in run_ids)
+    return f"SELECT {MEAS_COLS} FROM measurements WHERE run_id IN ({q_marks})", list(run_ids)
+
+
+SWEEPS_SQL = """SELECT run_id, name, n_ports, n_points, f_start, f_stop, LENGTH(data) FROM sweeps
+                WHERE run_id = ? ORDER BY id"""
+
+
+def sweeps_for_run(run_id: str) -> List[SweepRow]:
+    # Sweep headers only; the blobs are read by load_sweep.
+    return [SweepRow(*r) for r in get_conn().execute(SWEEPS_SQL, (run_id,))]
+
+
+def load_sweep(run_id: str, name: str):
+    # sparams.Network, or None if the run has no sweep by that name
+    r = get_conn().execute("SELECT data FROM sweeps WHERE run_id = ? AND name = ?", (run_id, name)).fetchone()
+    if r is None: return None
+    from core.sparams import from_bytes
+    return from_bytes(r[0], name)
+
+
+def existing_run_ids(run_ids: Iterable[str]) -> set:
+    conn = get_conn(); ids = list(run_ids); out = set()
+    for i in range(0, len(ids), MAX_PARAMS):
+        chunk = ids[i:i + MAX_PARAMS]
+        out.update(r[0] for r in conn.execute(
+            f"SELECT run_id FROM runs WHERE run_id IN ({','.join('?' for _ in chunk)})", chunk))
+    return out
+
+
+def count_measurements(run_ids: Sequence[str]) -> int:
+    conn = get_conn(); ids = list(run_ids); n = 0
+    for i in range(0, len(ids), MAX_PARAMS):
+        chunk = ids[i:i + MAX_PARAMS]
+        n += conn.execute(f"SELECT COUNT(*) FROM measurements WHERE run_id IN ({','.join('?' for _ in chunk)})",
+                          chunk).fetchone()[0]
+    return n
+
+
+# Column order of exported history rows (see iter_export_rows)
+EXPORT_COLS = ["run_id", "timestamp", "operator", "lot", "dut_id", "board_name",
+               "field_id", "label", "component_type", "value", "unit", "value_num", "status"]
+
+
+def iter_export_rows(run_ids: Sequence[str], arraysize: int = 5000) -> Iterable[Tuple]:
+    # Streams measurements of the given runs, in that order, joined with their
+    # run metadata in EXPORT_COLS order. One indexed query per run and
+    # fetchmany() batches keep memory flat however many runs are selected.
+    # status is yielded as its name.
+    conn = get_conn()
+    for rid in run_ids:
+        cur = conn.cursor(); cur.arraysize = arraysize
+        cur.execute("""SELECT r.run_id, r.timestamp, r.operator, r.lot, r.dut_id, r.board_name,
+                              m.field_id, m.label, m.component_type, m.value, m.unit, m.value_num, m.status
+                       FROM runs r JOIN measurements m ON m.run_id = r.run_id
+                       WHERE r.run_id = ? ORDER BY m.id""", (rid,))
+        while True:
+            batch = cur.fetchmany()
+            if not batch: break
+            for row in batch:
+                yield row[:-1] + (STATUS_NAMES.get(row[-1], ""),)
+
+
+def field_history(field_id: str, board_name: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[FieldPoint]:
+    # One field across runs, newest first; served by idx_measurements_field_run.
+    return [FieldPoint(*r) for r in get_conn().execute(*_field_history_query(field_id, board_name, limit))]
+
+
+def _field_history_query(field_id: str, board_name: Optional[str] = None,
+                         limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    sql = """SELECT m.run_id, r.timestamp, m.value, m.unit, m.value_num, m.status FROM measurements m
+             JOIN runs r ON r.run_id = m.run_id WHERE m.field_id = ?"""
+    params: List[Any] = [field_id]
+    if board_name is not None:
+        sql += " AND r.board_name = ?"; params.append(board_name)
+    sql += " ORDER BY r.timestamp DESC"
+    if limit is not None:
+        sql += " LIMIT ?"; params.append(int(limit))
+    return sql, params
+
+
+def field_stats(field_ids: Optional[Sequence[str]] = None, board_name: Optional[str] = None,
+                since: Optional[str] = None, until: Optional[str] = None) -> List[FieldStats]:
+    # Per-field aggregates over value_num (SI units), computed by SQLite.
+    # field_ids are queried in chunks of MAX_PARAMS; each field's rows fall in
+    # one chunk, so the chunk results are simply concatenated.
+    sql = f"""SELECT m.field_id, COUNT(m.value_num), MIN(m.value_num), MAX(m.value_num), AVG(m.value_num),
+                     SUM(m.status = {PASS}), SUM(m.status = {FAIL})
+              FROM measurements m"""
+    where, params = _runs_where(board_name, None, None, since, until, alias="r")
+    if where:
+        sql += " JOIN runs r ON r.run_id = m.run_id" + where
+    conn = get_conn()
+    if field_ids is None:
+        chunks: List[List[str]] = [[]]
+    else:
+        ids = sorted(set(field_ids))
+        chunks = [ids[i:i + MAX_PARAMS] for i in range(0, len(ids), MAX_PARAMS)]
+    out: List[FieldStats] = []
+    for chunk in chunks:
+        q = sql
+        if field_ids is not None:
+            q += (" AND" if where else " WHERE") + f" m.field_id IN ({','.join('?' for _ in chunk)})"
+        q += " GROUP BY m.field_id ORDER BY m.field_id"
+        out += [FieldStats(fid, n, lo, hi, avg, p or 0, f or 0)
+                for fid, n, lo, hi, avg, p, f in conn.execute(q, params + chunk)]
+    return out
+
+
+def explain(sql: str, params: Sequence[Any] = ()) -> List[str]:
+    return [row[-1] for row in get_conn().execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def query_plan_checks() -> Dict[str, Tuple[str, List[Any], Tuple[str, ...]]]:
+    # Query -> (sql, params, indexes its plan may use). The SQL comes from the
+    # same builders the query functions use, so a change to a query or a
+    # schema change that drops an index shows up in check_query_plans()
+    # instead of as a slow full scan.
+    return {
+        "list_runs": _list_runs_query(limit=50) + (("idx_runs_timestamp",),),
+        "runs_by_board": _list_runs_query("b", "l") + (("idx_runs_board_lot_dut",),),
+        "runs_by_text": _list_runs_query(text="LOT", limit=50) + (("idx_runs_lot",),),
+        "measurements_for_runs": _measurements_query(["a", "b"]) + (("idx_measurements_run_field",),),
+        "field_history": _field_history_query("R1", "b", 100) +
+                         (("idx_measurements_field_run", "idx_measurements_field_num"),),
+        "sweeps_for_run": (SWEEPS_SQL, ["a"], ("idx_sweeps_run_name",)),
+        # no query function yet; the index backs value filters on a field
+        "value_range": ("SELECT run_id FROM measurements WHERE field_id = ? AND value_num BETWEEN ? AND ?",
+                        ["R1", 0.0, 1.0], ("idx_measurements_field_num",)),
+    }
+
+
+def check_query_plans() -> Dict[str, Tuple[bool, List[str]]]:
+    # name -> (uses one of its indexes and never scans a table, plan)
+    out = {}
+    for name, (sql, params, indexes) in query_plan_checks().items():
+        plan = explain(sql, params)
+        ok = any(ix in step for step in plan for ix in indexes) and not any(step.startswith("SCAN") and
+                                                                           "USING" not in step for step in plan)
+        out[name] = (ok, plan)
+    return out
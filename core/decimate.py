@@ -0,0 +1,58 @@
+from typing import Optional, Tuple
+import numpy as np
+
+# Min/max decimation for drawing dense sweeps. The visible part of a trace is
+# cut into one bucket per output column and each bucket is reduced to its
+# minimum and maximum, in sample order, so peaks and notches survive at any
+# zoom level while a line never has more than ~2 points per pixel.
+
+
+def visible_slice(x: np.ndarray, x0: float, x1: float) -> slice:
+    # indices of sorted x within [x0, x1], plus one sample either side so the
+    # line runs to the axes edge
+    i0 = max(int(np.searchsorted(x, x0, side="left")) - 1, 0)
+    i1 = min(int(np.searchsorted(x, x1, side="right")) + 1, len(x))
+    return slice(i0, i1)
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    # Sorted indices of each bucket's min and max. Buckets hold
+    # ceil(n / n_buckets) samples; the last one is padded with its final value.
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+    k = -(-n // n_buckets)
+    nb = -(-n // k)
+    if nb * k > n:
+        y = np.concatenate((y, np.full(nb * k - n, y[-1])))
+    body = y.reshape(nb, k)
+    base = np.arange(0, nb * k, k)
+    idx = np.concatenate((base + body.argmin(axis=1), base + body.argmax(axis=1), [0, n - 1]))
+    # padding indices fall back to the last sample; the end points keep the
+    # trace spanning the whole range
+    return np.unique(np.minimum(idx, n - 1))
+
+
+def decimate(x: np.ndarray, y: np.ndarray, n_buckets: int,
+             xlim: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # x must be sorted. Returns the points of (x, y) to draw for an axis
+    # n_buckets pixels wide showing xlim (default: everything).
+    if xlim is not None:
+        sl = visible_slice(x, *xlim)
+        x, y = x[sl], y[sl]
+    idx = minmax_indices(y, n_buckets)
+    if len(idx) == len(x):
+        return x, y
+    return x[idx], y[idx]
+
+
+def decimate_band(x: np.ndarray, lo: np.ndarray, hi: np.ndarray, n_buckets: int,
+                  xlim: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # A min/max band on one x grid: the union of the points kept for lo and hi
+    if xlim is not None:
+        sl = visible_slice(x, *xlim)
+        x, lo, hi = x[sl], lo[sl], hi[sl]
+    idx = np.union1d(minmax_indices(lo, n_buckets), minmax_indices(hi, n_buckets))
+    if len(idx) == len(x):
+        return x, lo, hi
+    return x[idx], lo[idx], hi[idx]
@@ -0,0 +1,161 @@
+import csv
+import os
+import threading
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from core import db
+
+FORMATS = {".xlsx": "xlsx", ".csv": "csv", ".parquet": "parquet"}
+PARQUET_BATCH = 50000   # rows per Parquet row group
+PROGRESS_EVERY = 5000   # rows between progress callbacks
+
+# Parquet column types of the known export columns (runs.RUN_EXPORT_COLUMNS,
+# db.EXPORT_COLS): value_num is float64, everything else text. The schema is
+# declared up front so a column that is all-null in the first row group
+# (value_num of text fields, empty notes) does not get a null type that later
+# batches cannot be cast to.
+PARQUET_FLOAT_COLUMNS = {"value_num"}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def format_for(path: str) -> str:
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported export format: {path} (use {', '.join(FORMATS)})")
+    return fmt
+
+
+def write_rows(path: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+               progress: Optional[Callable[[int], None]] = None,
+               cancel: Optional[threading.Event] = None) -> int:
+    # Writes rows as they arrive; nothing is held beyond one Parquet batch.
+    # The file is written under a temporary name and renamed when complete,
+    # so a failed or cancelled export leaves no partial file. Returns the row count.
+    fmt = format_for(path)
+    tmp = f"{path}.part"
+    writer = {"xlsx": _write_xlsx, "csv": _write_csv, "parquet": _write_parquet}[fmt]
+
+    count = [0]
+
+    def counted():
+        for row in rows:
+            yield row
+            count[0] += 1
+            if count[0] % PROGRESS_EVERY == 0:
+                if cancel is not None and cancel.is_set(): raise ExportCancelled()
+                if progress: progress(count[0])
+
+    try:
+        writer(tmp, list(columns), counted())
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    if progress: progress(count[0])
+    return count[0]
+
+
+def _write_xlsx(path, columns, rows):
+    # openpyxl write-only mode streams rows to the zip instead of building the
+    # cell tree in memory.
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    for row in rows:
+        ws.append(list(row))
+    wb.save(path)
+
+
+def _write_csv(path, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        w.writerows(rows)
+
+
+def _write_parquet(path, columns, rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    writer = None
+    batch = []
+    schema = _parquet_schema(pa, columns)
+
+    def column(values, typ):
+        if pa.types.is_string(typ):
+            return pa.array([None if v is None else str(v) for v in values], type=typ)
+        return pa.array(values, type=typ)
+
+    def flush():
+        nonlocal writer
+        table = pa.Table.from_arrays([column(col, f.type) for col, f in zip(zip(*batch), schema)], schema=schema)
+        if writer is None:
+            writer = pq.ParquetWriter(path, schema)
+        writer.write_table(table)
+        batch.clear()
+
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH: flush()
+        if batch: flush()
+    finally:
+        if writer is not None: writer.close()
+    if writer is None:
+        pq.write_table(schema.empty_table(), path)
+
+
+def _parquet_schema(pa, columns):
+    # float64 for known numeric columns, text otherwise (other tables, e.g. a
+    # compare table, are written as text too)
+    return pa.schema([(c, pa.float64() if c in PARQUET_FLOAT_COLUMNS else pa.string()) for c in columns])
+
+
+def export_runs(path: str, run_ids: Sequence[str], progress: Optional[Callable[[int], None]] = None,
+                cancel: Optional[threading.Event] = None) -> int:
+    # History export straight from SQLite through a cursor iterator.
+    return write_rows(path, db.EXPORT_COLS, db.iter_export_rows(run_ids), progress, cancel)
+
+
+class ExportJob:
+    # Runs export_runs on a worker thread. The UI polls `done`/`total`/
+    # `finished`/`error` (e.g. from Tk's after loop) and may call cancel().
+    def __init__(self, path: str, run_ids: Sequence[str]):
+        self.path = path
+        self.run_ids = list(run_ids)
+        self.total = 0
+        self.done = 0
+        self.finished = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="export", daemon=True)
+
+    def start(self) -> "ExportJob":
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        try:
+            with db.closing_conn():
+                self.total = db.count_measurements(self.run_ids)
+                self.done = export_runs(self.path, self.run_ids, self._on_progress, self._cancel)
+        except ExportCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+
+    def _on_progress(self, n: int):
+        self.done = n
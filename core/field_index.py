@@ -0,0 +1,101 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.layout import Field, Rect
+
+CELL_SIZE = 128
+
+
+class FieldIndex:
+    # Fields by id plus a uniform-grid spatial index over their rectangles.
+    # Each field is listed in every CELL_SIZE bucket its rectangle touches, so a
+    # point lookup only tests the fields in one bucket. Later-added fields win
+    # hit tests, matching the draw order of the fields list.
+    def __init__(self, fields: Iterable[Field] = (), cell: int = CELL_SIZE):
+        self.cell = cell
+        self._fields: Dict[str, Field] = {}
+        self._rects: Dict[str, Rect] = {}
+        self._seq: Dict[str, int] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._next = 0
+        for f in fields:
+            self.add(f)
+
+    def __contains__(self, fid) -> bool:
+        return fid in self._fields
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def get(self, fid: str) -> Optional[Field]:
+        return self._fields.get(fid)
+
+    def rect(self, fid: str) -> Optional[Rect]:
+        return self._rects.get(fid)
+
+    # ----- updates -----
+    def add(self, field: Field):
+        fid = field.id
+        if fid in self._fields:
+            self.remove(fid)
+        self._fields[fid] = field
+        self._seq[fid] = self._next; self._next += 1
+        self._insert(fid, field.rect)
+
+    def remove(self, fid: str):
+        if fid not in self._fields: return
+        self._unlink(fid)
+        del self._fields[fid]; del self._seq[fid]
+
+    def move(self, fid: str, rect: Optional[Rect] = None):
+        # Re-bucket after a geometry change; rect defaults to the field's position.
+        if fid not in self._fields: return
+        self._unlink(fid)
+        self._insert(fid, rect if rect is not None else self._fields[fid].rect)
+
+    def rename(self, old: str, new: str):
+        if old == new or old not in self._fields: return
+        field = self._fields.pop(old); rect = self._rects[old]; seq = self._seq.pop(old)
+        self._unlink(old)
+        self._fields[new] = field; self._seq[new] = seq
+        self._insert(new, rect)
+
+    # ----- queries -----
+    def hit(self, x: float, y: float) -> Optional[str]:
+        best = None; best_seq = -1
+        for fid in self._cells.get((int(x // self.cell), int(y // self.cell)), ()):
+            fx,fy,fw,fh = self._rects[fid]
+            if fx<=x<=fx+fw and fy<=y<=fy+fh and self._seq[fid] > best_seq:
+                best, best_seq = fid, self._seq[fid]
+        return best
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> List[str]:
+        # ids of fields intersecting the rectangle (x0,y0)-(x1,y1)
+        out = set()
+        for key in self._cell_range(x0, y0, x1, y1):
+            for fid in self._cells.get(key, ()):
+                if fid in out: continue
+                fx,fy,fw,fh = self._rects[fid]
+                if fx <= x1 and fx+fw >= x0 and fy <= y1 and fy+fh >= y0:
+                    out.add(fid)
+        return list(out)
+
+    # ----- internals -----
+    def _cell_range(self, x0, y0, x1, y1):
+        c = self.cell
+        for cx in range(int(x0 // c), int(x1 // c) + 1):
+            for cy in range(int(y0 // c), int(y1 // c) + 1):
+                yield cx, cy
+
+    def _insert(self, fid: str, rect: Rect):
+        self._rects[fid] = rect
+        x,y,w,h = rect
+        for key in self._cell_range(x, y, x+w, y+h):
+            self._cells.setdefault(key, set()).add(fid)
+
+    def _unlink(self, fid: str):
+        x,y,w,h = self._rects.pop(fid)
+        for key in self._cell_range(x, y, x+w, y+h):
+            bucket = self._cells.get(key)
+            if bucket is not None:
+                bucket.discard(fid)
+                if not bucket: del self._cells[key]
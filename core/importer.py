@@ -0,0 +1,218 @@
+# Bulk import of run workbooks (run_*.xlsx from Export to Excel) into SQLite:
+#
+#     python -m core.importer DIR [DIR ...] [--workers N] [--batch N] [--state FILE]
+#
+# Workbooks are parsed in a process pool and loaded through db.insert_runs in
+# large transactions. Runs already in the database are skipped before parsing,
+# and every file whose runs have been committed is appended to a state file so
+# an interrupted import picks up where it stopped. Files that fail to parse are
+# recorded there too, with the error, and are retried only once they change.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from core import db
+
+PATTERN = "run_*.xlsx"
+STATE_FILE = Path("data/db/import_state.jsonl")
+BATCH_RUNS = 2000
+
+RUN_KEYS = ("timestamp", "operator", "lot", "dut_id", "board_name", "notes")
+MEAS_KEYS = ("field_id", "label", "component_type", "value", "unit", "status")
+
+Run = Tuple[Dict[str, Any], List[Dict[str, Any]]]
+
+
+class ImportReport(NamedTuple):
+    files: int
+    runs: int
+    measurements: int
+    skipped: int          # runs already in the database or seen earlier in this import
+    failed: int           # files that could not be parsed, now or (unchanged) in an earlier import
+    parse_seconds: float  # summed across workers
+    seconds: float
+
+    def summary(self) -> str:
+        rate = lambda n: n / self.seconds if self.seconds > 0 else 0.0
+        return (f"{self.files} files, {self.runs} runs, {self.measurements} measurements "
+                f"({self.skipped} skipped, {self.failed} failed) in {self.seconds:.1f}s: "
+                f"{rate(self.files):.1f} files/s, {rate(self.runs):.1f} runs/s, "
+                f"{rate(self.measurements):.0f} measurements/s; parse {self.parse_seconds:.1f} CPU-s")
+
+
+def run_id_for(path: str) -> str:
+    # export_to_excel names files run_<run_id>.xlsx
+    stem = Path(path).stem
+    return stem[4:] if stem.startswith("run_") else stem
+
+
+def _cell(v) -> str:
+    return "" if v is None else str(v)
+
+
+def parse_workbook(path: str) -> List[Run]:
+    # One run per file for single-run exports. History exports carry a run_id
+    # column and may hold several runs.
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [_cell(h).strip() for h in next(rows, ())]
+        col = {h: i for i, h in enumerate(header) if h}
+        if "field_id" not in col:
+            raise ValueError("no field_id column")
+        default_id = run_id_for(path)
+        runs: Dict[str, Run] = {}
+        for row in rows:
+            get = lambda k: row[col[k]] if k in col and col[k] < len(row) else None
+            if get("field_id") is None: continue
+            rid = _cell(get("run_id")) or default_id
+            run = runs.get(rid)
+            if run is None:
+                meta = {k: _cell(get(k)) for k in RUN_KEYS}
+                meta["run_id"] = rid
+                if not meta["board_name"]:
+                    # run ids are <YYYYMMDD_HHMMSS>_<board_name>
+                    parts = rid.split("_", 2)
+                    meta["board_name"] = parts[2] if len(parts) == 3 else ""
+                meta["layout_file"] = ""
+                run = runs[rid] = (meta, [])
+            run[1].append({k: _cell(get(k)) for k in MEAS_KEYS})
+        return list(runs.values())
+    finally:
+        wb.close()
+
+
+def _parse_job(path: str) -> Tuple[str, Optional[List[Run]], Optional[str], float]:
+    t0 = time.perf_counter()
+    try:
+        return path, parse_workbook(path), None, time.perf_counter() - t0
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}", time.perf_counter() - t0
+
+
+def scan(paths: Iterable[str], pattern: str = PATTERN) -> Iterator[str]:
+    for p in paths:
+        p = Path(p)
+        if p.is_file():
+            yield str(p)
+        else:
+            yield from (str(f) for f in sorted(p.rglob(pattern)))
+
+
+def _stamp(path: str) -> str:
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def load_state(state_file: Optional[Path]) -> Dict[str, Optional[str]]:
+    # path|size|mtime stamp -> None if imported, else the parse error. A later
+    # line for the same stamp wins.
+    if not state_file or not Path(state_file).exists(): return {}
+    state: Dict[str, Optional[str]] = {}
+    with open(state_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                d = json.loads(line); state[d["file"]] = d.get("error")
+            except (ValueError, KeyError, TypeError): pass
+    return state
+
+
+def import_files(paths: Iterable[str], workers: Optional[int] = None, batch_runs: int = BATCH_RUNS,
+                 state_file: Optional[Path] = STATE_FILE, progress=None) -> ImportReport:
+    t0 = time.perf_counter()
+    db.init_db()
+    done = load_state(state_file)
+    files = []; n_known_bad = 0
+    for f in scan(paths):
+        stamp = _stamp(f)
+        if stamp not in done: files.append(f)
+        elif done[stamp] is not None: n_known_bad += 1
+    if n_known_bad:
+        print(f"[import] {n_known_bad} unchanged file(s) failed in an earlier import; not retried", file=sys.stderr)
+
+    # Single-run files whose run_id is already stored need no parsing at all.
+    stored = db.existing_run_ids(run_id_for(f) for f in files)
+    n_skip = sum(1 for f in files if run_id_for(f) in stored)
+    todo = [f for f in files if run_id_for(f) not in stored]
+    state = None
+    if state_file:
+        Path(state_file).parent.mkdir(parents=True, exist_ok=True)
+        state = open(state_file, "a", encoding="utf-8")
+        for f in files:
+            if run_id_for(f) in stored: state.write(json.dumps({"file": _stamp(f)}) + "\n")
+
+    seen: Set[str] = set()
+    pending: List[Run] = []; pending_files: List[str] = []
+    n_files = n_runs = n_meas = 0; n_fail = n_known_bad
+    parse_s = 0.0
+
+    def commit():
+        nonlocal n_runs, n_meas, n_skip
+        if pending:
+            st = db.insert_runs(pending, batch_runs=len(pending), skip_existing=True)
+            n_runs += st.runs; n_meas += st.measurements; n_skip += st.skipped
+        if state:
+            state.writelines(json.dumps({"file": _stamp(f)}) + "\n" for f in pending_files)
+            state.flush()
+        pending.clear(); pending_files.clear()
+        if progress: progress(n_files, len(todo), n_runs, n_meas)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # bounded window of in-flight files keeps parsed results from piling up
+            it = iter(todo); inflight = set()
+            window = 4 * (workers or os.cpu_count() or 1)
+            while True:
+                while len(inflight) < window:
+                    f = next(it, None)
+                    if f is None: break
+                    inflight.add(pool.submit(_parse_job, f))
+                if not inflight: break
+                finished, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    path, runs, err, secs = fut.result()
+                    n_files += 1; parse_s += secs
+                    if err is not None:
+                        n_fail += 1; print(f"[import] {path}: {err}", file=sys.stderr)
+                        if state:
+                            state.write(json.dumps({"file": _stamp(path), "error": err}) + "\n"); state.flush()
+                        continue
+                    for run in runs:
+                        rid = run[0]["run_id"]
+                        if rid in seen: n_skip += 1; continue
+                        seen.add(rid); pending.append(run)
+                    pending_files.append(path)
+                if len(pending) >= batch_runs: commit()
+        commit()
+    finally:
+        if state: state.close()
+    return ImportReport(n_files, n_runs, n_meas, n_skip, n_fail, parse_s, time.perf_counter() - t0)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m core.importer", description="Import run_*.xlsx workbooks into the results database.")
+    ap.add_argument("paths", nargs="+", help="directories (searched recursively) or workbook files")
+    ap.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    ap.add_argument("--batch", type=int, default=BATCH_RUNS, help="runs per transaction")
+    ap.add_argument("--state", default=str(STATE_FILE), help="resume file; '' disables resuming")
+    ap.add_argument("--db", default=None, help="database path (default: %s)" % db.DB_PATH)
+    args = ap.parse_args(argv)
+    if args.db: db.DB_PATH = Path(args.db)
+
+    def progress(done, total, runs, meas):
+        print(f"\r[import] {done}/{total} files, {runs} runs, {meas} measurements", end="", file=sys.stderr, flush=True)
+
+    report = import_files(args.paths, args.workers, args.batch, Path(args.state) if args.state else None, progress)
+    print(file=sys.stderr)
+    print(report.summary())
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Parsed layout model. Layout JSON is migrated to the current schema once, at
+# load, and every field is normalized into a Field: geometry as plain floats,
+# the input type as a small int code, units/limits resolved from the legacy
+# top-level keys. Keys the model does not know about are kept in `extra` so a
+# load/save round trip does not drop them.
+
+SCHEMA_VERSION = "1.1"
+
+# Input type codes
+NUMBER = 0
+TEXT = 1
+TOGGLE = 2
+ENUM = 3
+
+TYPE_NAMES = {NUMBER: "number", TEXT: "text", TOGGLE: "toggle", ENUM: "enum"}
+TYPE_CODES = {name: code for code, name in TYPE_NAMES.items()}
+
+DEFAULT_CANVAS = {"type": "blank", "size": [1200, 800], "grid": {"enabled": True, "size": 20}}
+
+Rect = Tuple[float, float, float, float]  # x, y, w, h in layout pixels
+
+_FIELD_KEYS = ("id", "label", "component_type", "position", "input")
+_INPUT_KEYS = ("type", "units", "default_unit", "validation", "options", "default", "labels")
+_LAYOUT_KEYS = ("schema_version", "board_name", "canvas", "fields")
+
+
+class Field:
+    __slots__ = ("id", "label", "component_type", "x", "y", "w", "h", "type",
+                 "units", "default_unit", "validation", "options", "default", "labels",
+                 "extra", "input_extra")
+
+    def __init__(self, id: str, label: Optional[str] = None, component_type: str = "",
+                 rect: Rect = (0.0, 0.0, 100.0, 24.0), type: int = NUMBER,
+                 units: Optional[List[str]] = None, default_unit: Optional[str] = None,
+                 validation: Optional[Dict[str, Any]] = None, options: Optional[List[str]] = None,
+                 default: Any = None, labels: Optional[Dict[str, str]] = None,
+                 extra: Optional[Dict[str, Any]] = None, input_extra: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.label = id if label is None else label
+        self.component_type = component_type or ""
+        self.x, self.y, self.w, self.h = (float(v) for v in rect)
+        self.type = type
+        # None = key absent; only set keys are written back
+        self.units = units; self.default_unit = default_unit; self.validation = validation
+        self.options = options; self.default = default; self.labels = labels
+        self.extra = extra or {}; self.input_extra = input_extra or {}
+
+    def __repr__(self) -> str:
+        return f"Field({self.id!r}, {self.type_name}, rect={self.rect})"
+
+    @property
+    def rect(self) -> Rect:
+        return self.x, self.y, self.w, self.h
+
+    def set_rect(self, x: float, y: float, w: float, h: float):
+        self.x, self.y, self.w, self.h = float(x), float(y), float(w), float(h)
+
+    @property
+    def type_name(self) -> str:
+        return TYPE_NAMES[self.type]
+
+    @property
+    def unit(self) -> str:
+        # the unit a bare number is entered in
+        return self.default_unit or (self.units[0] if self.units else "")
+
+    def copy(self) -> "Field":
+        f = Field.__new__(Field)
+        for k in Field.__slots__:
+            v = getattr(self, k)
+            setattr(f, k, v.copy() if isinstance(v, (dict, list)) else v)
+        return f
+
+    def assign(self, other: "Field"):
+        # take over another field's definition in place (objects held by the
+        # field index and the layout stay valid)
+        for k in Field.__slots__:
+            setattr(self, k, getattr(other, k))
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Field":
+        # d is in the current schema (see migrate_field)
+        pos = d.get("position") or {}
+        inp = d.get("input") or {}
+        return cls(d.get("id"), d.get("label"), d.get("component_type", ""),
+                   (pos.get("x", 0), pos.get("y", 0), pos.get("w", 100), pos.get("h", 24)),
+                   TYPE_CODES.get((inp.get("type") or "number").lower(), NUMBER),
+                   inp.get("units"), inp.get("default_unit"), inp.get("validation"),
+                   inp.get("options"), inp.get("default"), inp.get("labels"),
+                   {k: v for k, v in d.items() if k not in _FIELD_KEYS},
+                   {k: v for k, v in inp.items() if k not in _INPUT_KEYS})
+
+    def to_dict(self) -> Dict[str, Any]:
+        inp: Dict[str, Any] = {"type": TYPE_NAMES[self.type]}
+        if self.units is not None: inp["units"] = self.units
+        if self.default_unit is not None: inp["default_unit"] = self.default_unit
+        if self.validation is not None: inp["validation"] = self.validation
+        if self.options is not None: inp["options"] = self.options
+        if self.default is not None: inp["default"] = self.default
+        if self.labels is not None: inp["labels"] = self.labels
+        inp.update(self.input_extra)
+        d: Dict[str, Any] = {"id": self.id, "label": self.label}
+        if self.component_type: d["component_type"] = self.component_type
+        d["position"] = {"x": self.x, "y": self.y, "w": self.w, "h": self.h}
+        d["input"] = inp
+        d.update(self.extra)
+        return d
+
+
+class Layout:
+    __slots__ = ("schema_version", "board_name", "canvas", "fields", "extra")
+
+    def __init__(self, board_name: str = "", canvas: Optional[Dict[str, Any]] = None,
+                 fields: Iterable[Field] = (), extra: Optional[Dict[str, Any]] = None):
+        self.schema_version = SCHEMA_VERSION
+        self.board_name = board_name
+        self.canvas = canvas
+        self.fields: List[Field] = list(fields)
+        self.extra = extra or {}
+
+    def __repr__(self) -> str:
+        return f"Layout({self.board_name!r}, {len(self.fields)} fields)"
+
+    def is_empty(self) -> bool:
+        return not (self.fields or self.canvas or self.board_name or self.extra)
+
+    def field_map(self) -> Dict[str, Field]:
+        return {f.id: f for f in self.fields}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Layout":
+        d = migrate(d)
+        return cls(d.get("board_name", ""), d.get("canvas"),
+                   [Field.from_dict(f) for f in d.get("fields") or []],
+                   {k: v for k, v in d.items() if k not in _LAYOUT_KEYS})
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"schema_version": SCHEMA_VERSION, "board_name": self.board_name}
+        if self.canvas is not None: d["canvas"] = self.canvas
+        d.update(self.extra)
+        d["fields"] = [f.to_dict() for f in self.fields]
+        return d
+
+    @classmethod
+    def load(cls, path: str) -> "Layout":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def dumps(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def save(self, path: str, indent: Optional[int] = 2):
+        # written next to the target and renamed, so a failed save leaves the
+        # old file intact
+        part = path + ".part"
+        with open(part, "w", encoding="utf-8") as f:
+            f.write(self.dumps(indent))
+        os.replace(part, path)
+
+
+# ----- schema migration -----
+def migrate(d: Dict[str, Any]) -> Dict[str, Any]:
+    # Layout JSON of any version -> current schema. Returns d itself when it
+    # is already current.
+    fields = d.get("fields") or []
+    legacy = [i for i, f in enumerate(fields) if "position" not in f or "input" not in f]
+    if d.get("schema_version") == SCHEMA_VERSION and "pdf" not in d and not legacy:
+        return d
+    d = dict(d)
+    if "pdf" in d:
+        # 1.0: the background was always a PDF under "pdf"
+        pdf = d.pop("pdf") or {}
+        d.setdefault("canvas", {"type": "pdf", **pdf})
+    if legacy:
+        fields = list(fields)
+        for i in legacy: fields[i] = migrate_field(fields[i])
+        d["fields"] = fields
+    d["schema_version"] = SCHEMA_VERSION
+    return d
+
+
+def migrate_field(f: Dict[str, Any]) -> Dict[str, Any]:
+    # 1.0 fields kept geometry as top-level x/y/w/h and were always numbers
+    # with top-level units/default_unit (or unit) and validation.
+    f = dict(f)
+    if "position" not in f:
+        f["position"] = {k: float(f.pop(k, dflt)) for k, dflt in (("x", 0), ("y", 0), ("w", 100), ("h", 24))}
+    if not f.get("input"):
+        units = f.pop("units", None)
+        unit = f.pop("default_unit", f.pop("unit", ""))
+        if isinstance(units, str):
+            units = [units] if units else []
+        f["input"] = {"type": "number", "units": units or ([unit] if unit else []), "default_unit": unit}
+        if "validation" in f: f["input"]["validation"] = f.pop("validation")
+    return f
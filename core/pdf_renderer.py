@@ -1,14 +1,38 @@
 from typing import Optional, Dict, Any
-from pdf2image import convert_from_path
-from PIL import Image, ImageDraw
+import numpy as np
+from PIL import Image, ImageColor
 
-def render_background(canvas_cfg: Dict[str, Any]) -> Optional[Image.Image]:
+from core.raster_cache import RasterCache, get_default_cache
+
+def render_background(canvas_cfg: Dict[str, Any], cache: Optional[RasterCache] = None,
+                      use_cache: bool = True) -> Optional[Image.Image]:
+    # Blank canvases only use the memory tier, where they count against its
+    # byte budget; round-tripping them through the disk tier costs more than
+    # generating them. The cache keeps its own image; callers get a copy they
+    # may draw on.
+    if not use_cache:
+        return _render_uncached(canvas_cfg)
+    disk = (canvas_cfg or {}).get("type", "pdf") != "blank"
+    cache = cache or get_default_cache()
+    key = cache.key_for(canvas_cfg)
+    if key is not None:
+        img = cache.get(key, disk=disk)
+        if img is not None:
+            return img.copy()
+    img = _render_uncached(canvas_cfg)
+    if img is not None and key is not None:
+        cache.put(key, img, disk=disk)
+        return img.copy()
+    return img
+
+def _render_uncached(canvas_cfg: Dict[str, Any]) -> Optional[Image.Image]:
     ctype = (canvas_cfg or {}).get("type", "pdf")
     if ctype == "pdf":
         path = canvas_cfg.get("path")
         page = int(canvas_cfg.get("page", 0))
         dpi = int(canvas_cfg.get("dpi", 144))
         try:
+            from pdf2image import convert_from_path  # imported on first PDF render
             pages = convert_from_path(path, dpi=dpi, first_page=page+1, last_page=page+1, fmt='png')
             if not pages:
                 return None
@@ -27,15 +51,27 @@ def render_background(canvas_cfg: Dict[str, Any]) -> Optional[Image.Image]:
     elif ctype == "blank":
         size = canvas_cfg.get("size") or [1200, 800]
         w, h = int(size[0]), int(size[1])
-        img = Image.new("RGB", (w, h), "white")
         grid = (canvas_cfg.get("grid") or {})
-        if grid.get("enabled", True):
-            g = int(grid.get("size", 16))
-            draw = ImageDraw.Draw(img)
-            for x in range(0, w, g):
-                draw.line([(x,0),(x,h)], fill="#eeeeee")
-            for y in range(0, h, g):
-                draw.line([(0,y),(w,y)], fill="#eeeeee")
-        return img
+        g = int(grid.get("size", 16)) if grid.get("enabled", True) else 0
+        return blank_canvas(w, h, g, grid.get("color", GRID_COLOR))
     else:
         return None
+
+GRID_COLOR = "#eeeeee"
+
+def blank_canvas(w: int, h: int, grid_size: int = 0, color: str = GRID_COLOR) -> Image.Image:
+    # One template row is broadcast down the page and every grid_size-th row is
+    # overwritten with a strided slice, instead of one ImageDraw.line per line.
+    # An unparseable grid color falls back to GRID_COLOR.
+    w, h = max(1, w), max(1, h)
+    row = np.full((w, 3), 255, dtype=np.uint8)
+    try:
+        rgb = ImageColor.getrgb(color)[:3]
+    except (ValueError, TypeError, AttributeError):
+        rgb = ImageColor.getrgb(GRID_COLOR)[:3]
+    if grid_size > 0:
+        row[::grid_size] = rgb
+    arr = np.broadcast_to(row, (h, w, 3)).copy()
+    if grid_size > 0:
+        arr[::grid_size] = rgb
+    return Image.frombuffer("RGB", (w, h), arr, "raw", "RGB", 0, 1)
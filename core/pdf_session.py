@@ -0,0 +1,162 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Tuple, List, Set
+from PIL import Image
+
+from core.pdf_renderer import render_background
+from core.raster_cache import RasterCache, get_default_cache
+
+PREFETCH_RADIUS = 1
+PREFETCH_WORKERS = 1
+
+# One prefetch pool for all sessions: every PDF ever opened would otherwise keep
+# its own idle worker thread, and Poppler runs are CPU-bound anyway.
+_prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="pdf-prefetch")
+
+_PAGE_SIZE_RE = re.compile(r"^Page\s+(\d+)\s+size$")
+_SIZE_RE = re.compile(r"([\d.]+)\s*x\s*([\d.]+)")
+
+
+class PdfSession:
+    # One per PDF file. Poppler runs a process per call, so there is no handle to
+    # keep open; instead the session reads the page table once and renders pages
+    # into the raster cache ahead of use. Renders of the same page/dpi are
+    # shared, so a foreground request waits for an in-flight prefetch instead of
+    # starting a second Poppler run.
+    def __init__(self, path: str, cache: Optional[RasterCache] = None,
+                 prefetch_radius: int = PREFETCH_RADIUS):
+        self.path = os.path.abspath(path)
+        self.cache = cache or get_default_cache()
+        self.prefetch_radius = prefetch_radius
+        self._info: Optional[Dict] = None
+        self._page_sizes: List[Tuple[float, float]] = []
+        self._inflight: Dict[Tuple[int, int], Future] = {}
+        self._queued: Set[Tuple[int, int]] = set()   # prefetches submitted, not yet finished
+        self._closed = False
+        self._lock = threading.Lock()
+        self._info_lock = threading.Lock()   # held across pdfinfo, so it runs once
+
+    # ----- metadata -----
+    def _load_info(self):
+        if self._info is not None:
+            return
+        with self._info_lock:
+            if self._info is not None:
+                return
+            from pdf2image import pdfinfo_from_path
+            info = pdfinfo_from_path(self.path)
+            pages = int(info.get("Pages", 0))
+            sizes: Dict[int, Tuple[float, float]] = {}
+            if pages > 1:
+                # -f/-l makes pdfinfo print a "Page N size" line for every page
+                for k, v in pdfinfo_from_path(self.path, first_page=1, last_page=pages).items():
+                    m = _PAGE_SIZE_RE.match(k); s = _SIZE_RE.search(str(v))
+                    if m and s: sizes[int(m.group(1))] = (float(s.group(1)), float(s.group(2)))
+            s = _SIZE_RE.search(str(info.get("Page size", "")))
+            first = (float(s.group(1)), float(s.group(2))) if s else (612.0, 792.0)
+            self._page_sizes = [sizes.get(i + 1, first) for i in range(pages)]
+            self._info = info
+
+    @property
+    def page_count(self) -> int:
+        self._load_info()
+        return len(self._page_sizes)
+
+    def page_size(self, page: int) -> Tuple[float, float]:
+        # Page size in PDF points (1/72 in).
+        self._load_info()
+        return self._page_sizes[page]
+
+    def page_pixel_size(self, page: int, dpi: int) -> Tuple[int, int]:
+        w, h = self.page_size(page)
+        return round(w * dpi / 72.0), round(h * dpi / 72.0)
+
+    # ----- rendering -----
+    def canvas_cfg(self, page: int, dpi: int) -> Dict:
+        return {"type": "pdf", "path": self.path, "page": int(page), "dpi": int(dpi)}
+
+    def render_page(self, page: int, dpi: int, prefetch: bool = True) -> Optional[Image.Image]:
+        img = self._render_shared(page, dpi)
+        if prefetch:
+            self.prefetch_around(page, dpi)
+        return img
+
+    def is_cached(self, page: int, dpi: int) -> bool:
+        key = self.cache.key_for(self.canvas_cfg(page, dpi))
+        return key is not None and self.cache.contains(key)
+
+    def prefetch_around(self, page: int, dpi: int):
+        order = []
+        for d in range(1, self.prefetch_radius + 1):
+            order += [page + d, page - d]
+        self.prefetch(order, dpi)
+
+    def prefetch(self, pages: List[int], dpi: int):
+        try:
+            count = self.page_count
+        except Exception as e:
+            print(f"[pdf_session] pdfinfo failed: {e}")
+            return
+        for p in pages:
+            if not 0 <= p < count: continue
+            key = (p, dpi)
+            with self._lock:
+                if self._closed or key in self._inflight or key in self._queued: continue
+                self._queued.add(key)
+            _prefetch_pool.submit(self._prefetch_one, p, dpi)
+
+    def close(self):
+        # Prefetches still queued for this session are dropped when they come up.
+        with self._lock:
+            self._closed = True
+
+    def _prefetch_one(self, page: int, dpi: int):
+        try:
+            if not self._closed and not self.is_cached(page, dpi):
+                self._render_shared(page, dpi)
+        finally:
+            with self._lock:
+                self._queued.discard((page, dpi))
+
+    def _render_shared(self, page: int, dpi: int) -> Optional[Image.Image]:
+        key = (int(page), int(dpi))
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = Future(); self._inflight[key] = fut
+        if not owner:
+            # the owner returns the image itself; waiters get their own copy
+            img = fut.result()
+            return img.copy() if img is not None else None
+        try:
+            img = render_background(self.canvas_cfg(page, dpi), cache=self.cache)
+            fut.set_result(img)
+            return img
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+_sessions: Dict[Tuple[str, int, int, int], PdfSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(path: str, cache: Optional[RasterCache] = None) -> PdfSession:
+    # Sessions are shared per file version; an edited PDF gets a fresh session.
+    cache = cache or get_default_cache()
+    ap = os.path.abspath(path)
+    st = os.stat(ap)
+    stamp = (ap, st.st_mtime_ns, st.st_size, id(cache))
+    with _sessions_lock:
+        sess = _sessions.get(stamp)
+        if sess is None:
+            for old in [k for k in _sessions if k[0] == ap and k[3] == id(cache)]:
+                _sessions.pop(old).close()
+            sess = _sessions[stamp] = PdfSession(ap, cache=cache)
+        return sess
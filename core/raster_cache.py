@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+from PIL import Image
+
+CACHE_DIR = Path("data/cache/raster")
+MAX_DISK_BYTES = 2 * 1024**3
+MAX_MEMORY_BYTES = 512 * 1024**2
+
+# Rendered pages are stored as binary PPM: decoding is a straight copy into the
+# PIL buffer, which is what makes a warm load faster than re-running Poppler.
+DISK_FMT = "PPM"
+DISK_EXT = ".ppm"
+
+
+def _image_nbytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+class RasterCache:
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_disk_bytes: int = MAX_DISK_BYTES,
+                 max_memory_bytes: int = MAX_MEMORY_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._mem: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._mem_bytes = 0
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.RLock()
+
+    # ----- keys -----
+    def file_digest(self, path: str) -> Optional[str]:
+        # Content hash of the source file, memoised on (path, mtime, size) so an
+        # unchanged file is only read once per process.
+        try:
+            ap = os.path.abspath(path); st = os.stat(ap)
+        except OSError:
+            return None
+        stamp = (ap, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._digests.get(stamp)
+        if digest:
+            return digest
+        h = hashlib.sha1()
+        with open(ap, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self._digests[stamp] = digest
+        return digest
+
+    def key_for(self, canvas_cfg: Dict[str, Any]) -> Optional[str]:
+        cfg = canvas_cfg or {}
+        ctype = cfg.get("type", "pdf")
+        if ctype in ("pdf", "image"):
+            digest = self.file_digest(cfg.get("path") or "")
+            if digest is None:
+                return None
+            parts = {"type": ctype, "src": digest, "dpi": int(cfg.get("dpi", 144))}
+            if ctype == "pdf":
+                parts["page"] = int(cfg.get("page", 0))
+        elif ctype == "blank":
+            grid = cfg.get("grid") or {}
+            parts = {"type": ctype, "size": [int(v) for v in (cfg.get("size") or [1200, 800])],
+                     "grid": [bool(grid.get("enabled", True)), int(grid.get("size", 16)), grid.get("color", "#eeeeee")]}
+        else:
+            return None
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    # ----- lookup / store -----
+    def get(self, key: str, disk: bool = True) -> Optional[Image.Image]:
+        # disk=False looks in the memory tier only
+        with self._lock:
+            img = self._mem.get(key)
+            if img is not None:
+                self._mem.move_to_end(key)
+                return img
+        if not disk:
+            return None
+        path = self._disk_path(key)
+        try:
+            with Image.open(path) as f:
+                img = f.convert("RGB")
+            os.utime(path)  # mtime doubles as last-access time for eviction
+        except (OSError, ValueError):
+            return None
+        self._remember(key, img)
+        return img
+
+    def contains(self, key: str) -> bool:
+        # Presence check without reading or decoding the image
+        with self._lock:
+            if key in self._mem:
+                return True
+        return self._disk_path(key).exists()
+
+    def put(self, key: str, img: Image.Image, disk: bool = True):
+        self._remember(key, img)
+        if not disk:
+            return
+        path = self._disk_path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            img.save(tmp, format=DISK_FMT)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[raster_cache] write failed: {e}")
+            try: tmp.unlink()
+            except OSError: pass
+            return
+        self._evict_disk()
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear(); self._mem_bytes = 0
+        for p in self.cache_dir.glob(f"*/*{DISK_EXT}"):
+            try: p.unlink()
+            except OSError: pass
+
+    # ----- internals -----
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{DISK_EXT}"
+
+    def _remember(self, key: str, img: Image.Image):
+        n = _image_nbytes(img)
+        if n > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= _image_nbytes(old)
+            self._mem[key] = img; self._mem_bytes += n
+            while self._mem_bytes > self.max_memory_bytes and self._mem:
+                _, victim = self._mem.popitem(last=False)
+                self._mem_bytes -= _image_nbytes(victim)
+
+    def _evict_disk(self):
+        entries = []
+        total = 0
+        for p in self.cache_dir.glob(f"*/*{DISK_EXT}"):
+            try: st = p.stat()
+            except OSError: continue
+            entries.append((st.st_mtime, st.st_size, p)); total += st.st_size
+        if total <= self.max_disk_bytes:
+            return
+        entries.sort()
+        for _, size, p in entries:
+            if total <= self.max_disk_bytes: break
+            try: p.unlink(); total -= size
+            except OSError: pass
+
+
+_default_cache: Optional[RasterCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> RasterCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = RasterCache()
+        return _default_cache
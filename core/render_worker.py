@@ -0,0 +1,125 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Dict, Any, Callable
+from PIL import Image
+
+from core.pdf_renderer import render_background
+from core.pdf_session import get_session
+from core.raster_cache import RasterCache, get_default_cache
+
+PREVIEW_DPI = 36
+
+STAGE_PREVIEW = "preview"
+STAGE_FINAL = "final"
+
+# callback(job, stage, image). Called on the worker thread; UI code must hand the
+# result back to its own event loop (see BoardTesterApp._poll_render_queue).
+RenderCallback = Callable[["RenderJob", str, Optional[Image.Image]], None]
+
+
+class RenderJob:
+    def __init__(self, canvas_cfg: Dict[str, Any]):
+        self.canvas_cfg = dict(canvas_cfg or {})
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+
+class BackgroundRenderer:
+    # Rasterises canvases off the UI thread. Poppler runs as a subprocess, so a
+    # thread pool is enough to keep the caller responsive. Only the most recent
+    # job is live: submitting a new one cancels the previous one, whose results
+    # are dropped even if Poppler has already started on it.
+    def __init__(self, max_workers: int = 2, preview_dpi: int = PREVIEW_DPI,
+                 cache: Optional[RasterCache] = None):
+        self.preview_dpi = preview_dpi
+        self.cache = cache or get_default_cache()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._current: Optional[RenderJob] = None
+        self._lock = threading.Lock()
+
+    def submit(self, canvas_cfg: Dict[str, Any], callback: RenderCallback) -> RenderJob:
+        job = RenderJob(canvas_cfg)
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._current = job
+        job.future = self._pool.submit(self._run, job, callback)
+        return job
+
+    def run_task(self, fn: Callable[..., Any], *args) -> Future:
+        # Runs fn(*args) on the render pool without touching the current job;
+        # for small blocking lookups (pdfinfo, stat on slow paths) from UI code.
+        return self._pool.submit(fn, *args)
+
+    def cancel(self):
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._current = None
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: RenderJob, callback: RenderCallback):
+        cfg = job.canvas_cfg
+        try:
+            key = self.cache.key_for(cfg)
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                if not job.cancelled: callback(job, STAGE_FINAL, cached.copy())
+                self._prefetch_neighbours(cfg)
+                return
+            preview = self._render_preview(cfg)
+            if job.cancelled: return
+            if preview is not None:
+                callback(job, STAGE_PREVIEW, preview)
+            img = self._render_final(cfg)
+            if not job.cancelled:
+                callback(job, STAGE_FINAL, img)
+        except Exception as e:
+            print(f"[render_worker] render failed: {e}")
+            if not job.cancelled:
+                callback(job, STAGE_FINAL, None)
+
+    def _render_final(self, cfg: Dict[str, Any]) -> Optional[Image.Image]:
+        # PDFs go through their document session, which shares in-flight renders
+        # and prefetches the neighbouring pages of multi-page packets.
+        if cfg.get("type", "pdf") == "pdf":
+            try:
+                sess = get_session(cfg.get("path") or "", cache=self.cache)
+            except OSError:
+                sess = None
+            if sess is not None:
+                return sess.render_page(int(cfg.get("page", 0)), int(cfg.get("dpi", 144)))
+        return render_background(cfg, cache=self.cache)
+
+    def _prefetch_neighbours(self, cfg: Dict[str, Any]):
+        if cfg.get("type", "pdf") != "pdf": return
+        try:
+            get_session(cfg.get("path") or "", cache=self.cache).prefetch_around(int(cfg.get("page", 0)), int(cfg.get("dpi", 144)))
+        except OSError:
+            pass
+
+    def _render_preview(self, cfg: Dict[str, Any]) -> Optional[Image.Image]:
+        if cfg.get("type", "pdf") != "pdf":
+            return None
+        dpi = int(cfg.get("dpi", 144))
+        if dpi <= self.preview_dpi:
+            return None
+        img = render_background({**cfg, "dpi": self.preview_dpi}, cache=self.cache)
+        if img is None:
+            return None
+        # Upscale to the full-DPI pixel size so field rectangles line up while
+        # the real page is still rendering.
+        scale = dpi / float(self.preview_dpi)
+        return img.resize((round(img.width * scale), round(img.height * scale)), Image.BILINEAR)
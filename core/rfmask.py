@@ -0,0 +1,185 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+from core.sparams import Network, parse_trace
+from core.touchstone import FREQ_UNITS
+from core.validation import PASS, FAIL, INVALID, STATUS_NAMES
+
+# Limit-line (mask) tests for S-parameter sweeps. A mask is a list of bands,
+# each a frequency span of one trace with an upper and/or lower limit in dB.
+# Bands are compiled into parallel arrays like validation.RuleTable, and a
+# sweep is checked against all of them at once: one (bands, points) margin
+# array per network, reduced to the worst margin of each band.
+#
+# Mask files are JSON:
+#   {"name": "LNA", "freq_unit": "GHz",
+#    "bands": [{"name": "gain", "trace": "S21", "start": 2.4, "stop": 2.5, "lower": 15},
+#              {"trace": "S11", "start": 2.4, "stop": 2.5, "upper": -10}]}
+# Margins are positive inside the limits, so the worst margin of a passing
+# band is how close it came to failing.
+
+COMPONENT_TYPE = "rf_mask"
+
+# dB values are clamped to ±DB_FLOOR before margins are taken, so an exact
+# zero (-inf dB) still gives a finite margin that can be stored and trended.
+# A nan point (corrupt data) counts as missing the limit by DB_FLOOR.
+DB_FLOOR = 300.0
+
+
+class Band(NamedTuple):
+    name: str
+    trace: str
+    start: float            # Hz
+    stop: float             # Hz
+    lower: Optional[float]  # dB
+    upper: Optional[float]  # dB
+
+
+class BandResult(NamedTuple):
+    band: Band
+    status: int                  # PASS, FAIL, or INVALID when no point falls in the band
+    margin: Optional[float]      # worst margin in dB
+    worst_f: Optional[float]     # Hz, where the worst margin occurs
+    points: int
+
+
+def parse_band(d: Dict[str, Any], mult: float = 1e9) -> Band:
+    trace = str(d["trace"]).upper()
+    parse_trace(trace)  # raises on a malformed name
+    start, stop = float(d["start"]) * mult, float(d["stop"]) * mult
+    lower = None if d.get("lower") is None else float(d["lower"])
+    upper = None if d.get("upper") is None else float(d["upper"])
+    if lower is None and upper is None:
+        raise ValueError(f"band {d.get('name') or trace}: needs a lower or upper limit")
+    if stop < start:
+        start, stop = stop, start
+    name = d.get("name") or f"{trace}_{float(d['start']):g}-{float(d['stop']):g}"
+    return Band(str(name), trace, start, stop, lower, upper)
+
+
+class Mask:
+    def __init__(self, bands: Iterable[Band], name: str = ""):
+        self.name = name
+        self.bands = list(bands)
+        names = [b.name for b in self.bands]
+        if len(set(names)) != len(names):
+            raise ValueError("band names must be unique")
+        n = len(self.bands)
+        self.start = np.array([b.start for b in self.bands], dtype=float)
+        self.stop = np.array([b.stop for b in self.bands], dtype=float)
+        # a missing limit never binds
+        self.lower = np.array([-np.inf if b.lower is None else b.lower for b in self.bands], dtype=float)
+        self.upper = np.array([np.inf if b.upper is None else b.upper for b in self.bands], dtype=float)
+        ij = [parse_trace(b.trace) for b in self.bands]
+        self.row = np.array([i for i, _ in ij], dtype=int).reshape(n)
+        self.col = np.array([j for _, j in ij], dtype=int).reshape(n)
+
+    def __len__(self) -> int:
+        return len(self.bands)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Mask":
+        unit = str(d.get("freq_unit", "GHz")).upper()
+        if unit not in FREQ_UNITS:
+            raise ValueError(f"unknown freq_unit {d.get('freq_unit')!r}")
+        return cls([parse_band(b, FREQ_UNITS[unit]) for b in d.get("bands", [])], d.get("name", ""))
+
+    @classmethod
+    def load(cls, path: str) -> "Mask":
+        with open(path, "r", encoding="utf-8") as f:
+            mask = cls.from_dict(json.load(f))
+        mask.name = mask.name or os.path.splitext(os.path.basename(path))[0]
+        return mask
+
+    def traces(self) -> List[str]:
+        return sorted({b.trace for b in self.bands})
+
+    def in_band(self, f: np.ndarray) -> np.ndarray:
+        # (bands, points) bool
+        return (f >= self.start[:, None]) & (f <= self.stop[:, None])
+
+    def margins(self, net: Network, in_band: Optional[np.ndarray] = None) -> np.ndarray:
+        # (bands, points) margin in dB, +inf outside each band and for traces
+        # the network does not have
+        inb = self.in_band(net.f) if in_band is None else in_band
+        ok = (self.row < net.n_ports) & (self.col < net.n_ports)
+        vals = np.full(inb.shape, np.nan)
+        vals[ok] = np.clip(net.db[:, self.row[ok], self.col[ok]].T, -DB_FLOOR, DB_FLOOR)
+        m = np.minimum(vals - self.lower[:, None], self.upper[:, None] - vals)
+        m[np.isnan(m)] = -DB_FLOOR
+        m[~(inb & ok[:, None])] = np.inf
+        return m
+
+    def evaluate(self, net: Network, in_band: Optional[np.ndarray] = None) -> List[BandResult]:
+        inb = self.in_band(net.f) if in_band is None else in_band
+        m = self.margins(net, inb)
+        counts = inb.sum(axis=1)
+        counts[(self.row >= net.n_ports) | (self.col >= net.n_ports)] = 0
+        k = m.argmin(axis=1) if m.size else np.zeros(len(self.bands), dtype=int)
+        out = []
+        for b, band in enumerate(self.bands):
+            if not counts[b]:
+                out.append(BandResult(band, INVALID, None, None, 0)); continue
+            worst = float(m[b, k[b]])
+            out.append(BandResult(band, PASS if worst >= 0 else FAIL, worst, float(net.f[k[b]]), int(counts[b])))
+        return out
+
+    def evaluate_many(self, nets: Sequence[Network]) -> List[List[BandResult]]:
+        # Sweeps on the same frequency grid share one band-membership array.
+        out = []; grid = None; inb = None
+        for net in nets:
+            if grid is None or grid.shape != net.f.shape or not np.array_equal(grid, net.f):
+                grid = net.f; inb = self.in_band(grid)
+            out.append(self.evaluate(net, inb))
+        return out
+
+
+def passed(results: Iterable[BandResult]) -> bool:
+    return all(r.status == PASS for r in results)
+
+
+def _label(band: Band) -> str:
+    limits = " ".join(s for s in (f">= {band.lower:g}" if band.lower is not None else "",
+                                  f"<= {band.upper:g}" if band.upper is not None else "") if s)
+    return f"{band.trace} {band.start / 1e9:g}-{band.stop / 1e9:g} GHz {limits} dB"
+
+
+def measurement_rows(results: Iterable[BandResult], timestamp: str, operator: str = "",
+                     lot: str = "", dut_id: str = "") -> List[Dict[str, Any]]:
+    # One row per band in runs.RUN_EXPORT_COLUMNS form, as db.insert_run takes
+    # them: value is the worst margin in dB, status pass/fail/invalid.
+    return [{"timestamp": timestamp, "operator": operator, "lot": lot, "dut_id": dut_id,
+             "field_id": r.band.name, "label": _label(r.band), "component_type": COMPONENT_TYPE,
+             "value": "" if r.margin is None else f"{r.margin:.4g}", "unit": "dB",
+             "status": STATUS_NAMES[r.status]}
+            for r in results]
+
+
+def sweep_name(net: Network) -> str:
+    return os.path.basename(net.path) or "sweep"
+
+
+def run_records(nets: Sequence[Network], mask: Mask, timestamp: str, board_name: str = "",
+                operator: str = "", lot: str = "", store_sweeps: bool = True,
+                results: Optional[List[List[BandResult]]] = None):
+    # (run_meta, measurements, sweeps) per network, as db.insert_runs takes
+    # them. Each file is one run; its DUT id is the file name without the
+    # extension and its run id <timestamp>_<board>_<dut>.
+    results = results if results is not None else mask.evaluate_many(nets)
+    for net, res in zip(nets, results):
+        dut = os.path.splitext(sweep_name(net))[0]
+        meta = {"run_id": f"{timestamp}_{board_name or 'Board'}_{dut}", "timestamp": timestamp,
+                "operator": operator, "lot": lot, "dut_id": dut, "board_name": board_name,
+                "layout_file": "", "notes": f"mask: {mask.name}"}
+        yield meta, measurement_rows(res, timestamp, operator, lot, dut), \
+            ({sweep_name(net): net} if store_sweeps else None)
+
+
+def result_table(results: Sequence[BandResult]) -> Tuple[List[str], List[List[Any]]]:
+    header = ["band", "trace", "points", "worst margin (dB)", "at (GHz)", "status"]
+    rows = [[r.band.name, r.band.trace, r.points, "" if r.margin is None else f"{r.margin:.3f}",
+             "" if r.worst_f is None else f"{r.worst_f / 1e9:.6g}", STATUS_NAMES[r.status]]
+            for r in results]
+    return header, rows
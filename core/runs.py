@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.layout import Field, Layout, TEXT, TOGGLE, ENUM
+from core.validation import RuleTable, compile_rules, STATUS_NAMES
+
+# Columns of a single-run export (Export to Excel); db.insert_run takes the
+# same dicts as measurements.
+RUN_EXPORT_COLUMNS = ["timestamp", "operator", "lot", "dut_id", "field_id", "label",
+                      "component_type", "value", "unit", "status"]
+
+TS_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def default_value(field: Field) -> Any:
+    # Value model of an untouched field: bool for toggles, str for enum/text,
+    # {"value", "unit"} for numbers.
+    if field.type == TOGGLE: return False
+    if field.type == ENUM: return field.default or (field.options or [""])[0]
+    if field.type == TEXT: return ""
+    return {"value": "", "unit": field.unit}
+
+
+def coerce_value(field: Field, raw: Any) -> Any:
+    # Loose input (values files, scripts) -> the value model. Numbers accept
+    # "10", 10, ["10", "kΩ"] or {"value": "10", "unit": "kΩ"}.
+    if raw is None: return default_value(field)
+    if field.type == TOGGLE:
+        if isinstance(raw, str):
+            labels = field.labels or {}
+            return raw.strip().lower() in ("1", "true", "yes", "on", str(labels.get("true", "")).lower())
+        return bool(raw)
+    if field.type in (ENUM, TEXT): return str(raw)
+    v = default_value(field)
+    if isinstance(raw, dict):
+        v["value"] = str(raw.get("value", "")); v["unit"] = raw.get("unit") or v["unit"]
+    elif isinstance(raw, (list, tuple)):
+        v["value"] = str(raw[0]) if raw else ""
+        if len(raw) > 1 and raw[1]: v["unit"] = str(raw[1])
+    else:
+        v["value"] = str(raw)
+    return v
+
+
+def format_value(field: Field, fv: Any) -> Tuple[str, str]:
+    # Value model -> (value text, unit) as written to exports and the database
+    if field.type == TOGGLE:
+        labels = field.labels or {}
+        return (labels.get("true", "True") if bool(fv) else labels.get("false", "False")), ""
+    if field.type in (ENUM, TEXT):
+        return str(fv).strip(), ""
+    unit = fv["unit"].strip() if fv.get("unit") else (field.default_unit or "")
+    return str(fv.get("value", "")).strip(), unit
+
+
+def new_run_id(layout: Layout, when: Optional[datetime] = None) -> Tuple[str, str]:
+    # (run_id, timestamp); run ids are <timestamp>_<board_name>
+    ts = (when or datetime.now()).strftime(TS_FORMAT)
+    return f"{ts}_{layout.board_name or 'Board'}", ts
+
+
+def measurement_rows(layout: Layout, values: Dict[str, Any], timestamp: str,
+                     operator: str = "", lot: str = "", dut_id: str = "",
+                     rules: Optional[RuleTable] = None) -> List[Dict[str, Any]]:
+    # One row per layout field in RUN_EXPORT_COLUMNS form; fields missing from
+    # `values` get their defaults. Status is filled for number fields with
+    # one vectorised pass over the layout's rules.
+    rules = rules if rules is not None else compile_rules(layout.fields)
+    rows = []
+    for field in layout.fields:
+        fid = field.id
+        fv = values[fid] if fid in values else default_value(field)
+        value, unit = format_value(field, fv)
+        rows.append({"timestamp": timestamp, "operator": operator, "lot": lot, "dut_id": dut_id,
+                     "field_id": fid, "label": field.label, "component_type": field.component_type,
+                     "value": value, "unit": unit, "status": ""})
+    statuses = rules.evaluate_map({r["field_id"]: (r["value"], r["unit"]) for r in rows if r["field_id"] in rules})
+    for r in rows:
+        if r["field_id"] in statuses: r["status"] = STATUS_NAMES[statuses[r["field_id"]]]
+    return rows
+
+
+def run_meta(layout: Layout, run_id: str, timestamp: str, operator: str = "", lot: str = "",
+             dut_id: str = "", layout_file: str = "", notes: str = "") -> Dict[str, Any]:
+    return {"run_id": run_id, "timestamp": timestamp, "operator": operator, "lot": lot, "dut_id": dut_id,
+            "board_name": layout.board_name, "layout_file": layout_file, "notes": notes}
+
+
+def export_rows(rows: Iterable[Dict[str, Any]]):
+    return ([r[c] for c in RUN_EXPORT_COLUMNS] for r in rows)
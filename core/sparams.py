@@ -0,0 +1,204 @@
+import io
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+# S-parameter sweeps for the viewer and limit tests. A Network holds the raw
+# complex array; dB and phase are computed for the whole (points, ports,
+# ports) array in one pass the first time they are asked for and kept.
+# Files are read by core.touchstone and cached by path, mtime and size.
+
+MAX_CACHED = 32
+
+
+class Network:
+    __slots__ = ("path", "f", "s", "z0", "_db", "_deg")
+
+    def __init__(self, f: np.ndarray, s: np.ndarray, z0: float = 50.0, path: str = ""):
+        self.path = path
+        self.f = np.asarray(f, dtype=float)        # Hz
+        self.s = np.asarray(s, dtype=complex)      # (points, ports, ports)
+        self.z0 = float(z0)
+        self._db: Optional[np.ndarray] = None
+        self._deg: Optional[np.ndarray] = None
+
+    def __repr__(self) -> str:
+        return f"Network({os.path.basename(self.path)!r}, {self.n_ports}-port, {len(self.f)} points)"
+
+    @property
+    def n_ports(self) -> int:
+        return self.s.shape[1]
+
+    @property
+    def n_points(self) -> int:
+        return self.s.shape[0]
+
+    @property
+    def db(self) -> np.ndarray:
+        if self._db is None: self._db = to_db(self.s)
+        return self._db
+
+    @property
+    def deg(self) -> np.ndarray:
+        if self._deg is None: self._deg = np.angle(self.s, deg=True)
+        return self._deg
+
+    def trace_names(self) -> List[str]:
+        return trace_names(self.n_ports)
+
+    def traces(self, kind: str = "db") -> np.ndarray:
+        # (points, ports*ports) in trace_names() order: S11, S21, S12, S22, ...
+        a = self.db if kind == "db" else self.deg if kind == "deg" else self.s
+        return a.transpose(0, 2, 1).reshape(self.n_points, -1)
+
+    def trace(self, name: str, kind: str = "db") -> np.ndarray:
+        i, j = parse_trace(name)
+        a = self.db if kind == "db" else self.deg if kind == "deg" else self.s
+        return a[:, i, j]
+
+
+def to_db(s: np.ndarray) -> np.ndarray:
+    # 20·log10|s|; exact zeros give -inf rather than a warning
+    with np.errstate(divide="ignore"):
+        return 20.0 * np.log10(np.abs(s))
+
+
+def trace_names(n_ports: int) -> List[str]:
+    # column-major like the Touchstone 2-port order: S11, S21, S12, S22
+    sep = "_" if n_ports > 9 else ""
+    return [f"S{i + 1}{sep}{j + 1}" for j in range(n_ports) for i in range(n_ports)]
+
+
+def parse_trace(name: str) -> Tuple[int, int]:
+    # "S21" / "S10_2" -> zero-based (row, column)
+    body = name.upper().lstrip("S")
+    a, b = body.split("_", 1) if "_" in body else (body[0], body[1:])
+    return int(a) - 1, int(b) - 1
+
+
+def read_network(path: str) -> Network:
+    from core.touchstone import read_touchstone
+    return read_touchstone(path)
+
+
+# ----- parse cache -----
+_cache: "OrderedDict[Tuple[str, int, int], Network]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _stamp(path: str) -> Tuple[str, int, int]:
+    ap = os.path.abspath(path); st = os.stat(ap)
+    return ap, st.st_mtime_ns, st.st_size
+
+
+def load(path: str) -> Network:
+    # Parsed network for path; re-parsed only when the file changes. The
+    # returned object is shared, so callers must not modify its arrays.
+    stamp = _stamp(path)
+    with _cache_lock:
+        net = _cache.get(stamp)
+        if net is not None:
+            _cache.move_to_end(stamp)
+            return net
+    net = read_network(stamp[0])
+    _remember(stamp, net)
+    return net
+
+
+def _remember(stamp: Tuple[str, int, int], net: Network):
+    with _cache_lock:
+        for k in [k for k in _cache if k[0] == stamp[0]]:
+            del _cache[k]
+        _cache[stamp] = net
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+
+
+def _cpus() -> int:
+    try: return len(os.sched_getaffinity(0))
+    except AttributeError: return os.cpu_count() or 1
+
+
+def load_many(paths: Sequence[str], workers: Optional[int] = None) -> Tuple[List[Network], List[Tuple[str, str]]]:
+    # (networks in path order, [(path, error)]). Files not in the cache are
+    # parsed across a process pool when there is more than one of them.
+    stamps: Dict[str, Tuple[str, int, int]] = {}
+    errors: List[Tuple[str, str]] = []
+    found: Dict[str, Network] = {}
+    for p in paths:
+        try: stamps[p] = _stamp(p)
+        except OSError as e: errors.append((p, str(e)))
+    with _cache_lock:
+        for p, st in stamps.items():
+            if st in _cache: found[p] = _cache[st]
+    todo = [p for p in stamps if p not in found]
+    workers = min(workers or _cpus(), len(todo))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {p: pool.submit(read_network, stamps[p][0]) for p in todo}
+            for p, fut in futures.items():
+                try: found[p] = fut.result()
+                except Exception as e: errors.append((p, str(e)))
+    else:
+        for p in todo:
+            try: found[p] = read_network(stamps[p][0])
+            except Exception as e: errors.append((p, str(e)))
+    for p in todo:
+        if p in found: _remember(stamps[p], found[p])
+    return [found[p] for p in paths if p in found], errors
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ----- binary form -----
+# A sweep as stored in the results database: f, s and z0 in a compressed
+# .npz. Lossless, and smaller and much faster to read than the text file.
+def to_bytes(net: Network) -> bytes:
+    buf = io.BytesIO()
+    np.savez_compressed(buf, f=net.f, s=net.s, z0=np.float64(net.z0))
+    return buf.getvalue()
+
+
+def from_bytes(blob: bytes, path: str = "") -> Network:
+    with np.load(io.BytesIO(blob), allow_pickle=False) as z:
+        return Network(z["f"], z["s"], float(z["z0"]), path)
+
+
+# ----- overlays -----
+class Envelope(NamedTuple):
+    f: np.ndarray       # Hz, the common grid
+    min: np.ndarray
+    max: np.ndarray
+    mean: np.ndarray
+    values: np.ndarray  # (networks, points) on the grid; nan outside a sweep's range
+
+
+def on_grid(nets: Sequence[Network], trace: str, kind: str = "db",
+            f: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    # One trace of every network as a (networks, points) array on a shared
+    # frequency grid (the first network's unless given). Sweeps on the same
+    # grid are stacked as-is; others are interpolated, nan outside their range.
+    f = nets[0].f if f is None else np.asarray(f, dtype=float)
+    out = np.empty((len(nets), len(f)))
+    for k, net in enumerate(nets):
+        y = net.trace(trace, kind)
+        if net.f.shape == f.shape and np.array_equal(net.f, f):
+            out[k] = y
+        else:
+            out[k] = np.interp(f, net.f, y, left=np.nan, right=np.nan)
+    return f, out
+
+
+def envelope(nets: Sequence[Network], trace: str, kind: str = "db",
+             f: Optional[np.ndarray] = None) -> Envelope:
+    f, vals = on_grid(nets, trace, kind, f)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-nan columns
+        return Envelope(f, np.nanmin(vals, axis=0), np.nanmax(vals, axis=0), np.nanmean(vals, axis=0), vals)
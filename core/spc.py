@@ -0,0 +1,121 @@
+import math
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from core import db
+from core.validation import RuleTable
+
+SIGMA = 3.0       # control limits at mean ± SIGMA·σ
+CPK_SIGMA = 3.0   # fixed by the definition of Cpk; independent of SIGMA
+
+
+class Summary(NamedTuple):
+    # Aggregates of value_num (SI units) for one field, read from spc_stats.
+    board_name: str
+    lot: str            # "" when merged across lots
+    field_id: str
+    n: int
+    mean: Optional[float]
+    m2: float
+    minimum: Optional[float]
+    maximum: Optional[float]
+    n_pass: int
+    n_fail: int
+    first_ts: Optional[str]
+    last_ts: Optional[str]
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.n - 1) if self.n > 1 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        v = self.variance
+        return math.sqrt(max(v, 0.0)) if v is not None else None
+
+    @property
+    def yield_pct(self) -> Optional[float]:
+        judged = self.n_pass + self.n_fail
+        return 100.0 * self.n_pass / judged if judged else None
+
+
+SPC_COLS = "board_name, lot, field_id, n, mean, m2, min, max, n_pass, n_fail, first_ts, last_ts"
+
+
+def merge(a: Summary, b: Summary) -> Summary:
+    # Chan et al. pairwise combination of two Welford accumulators.
+    if a.n == 0: return b
+    if b.n == 0: return a
+    n = a.n + b.n
+    d = b.mean - a.mean
+    return Summary(a.board_name, a.lot if a.lot == b.lot else "", a.field_id, n,
+                   a.mean + d * b.n / n, a.m2 + b.m2 + d * d * a.n * b.n / n,
+                   min(a.minimum, b.minimum), max(a.maximum, b.maximum),
+                   a.n_pass + b.n_pass, a.n_fail + b.n_fail,
+                   min(t for t in (a.first_ts, b.first_ts) if t) if (a.first_ts or b.first_ts) else None,
+                   max(t for t in (a.last_ts, b.last_ts) if t) if (a.last_ts or b.last_ts) else None)
+
+
+def merge_all(parts: Iterable[Summary]) -> Optional[Summary]:
+    out = None
+    for p in parts:
+        out = p if out is None else merge(out, p)
+    return out
+
+
+def lot_summaries(board_name: str, field_id: Optional[str] = None) -> List[Summary]:
+    # One row per (lot, field), oldest lot first: the points of a trend chart.
+    sql = f"SELECT {SPC_COLS} FROM spc_stats WHERE board_name = ?"
+    params: list = [board_name or ""]
+    if field_id is not None:
+        sql += " AND field_id = ?"; params.append(field_id)
+    sql += " ORDER BY field_id, first_ts"
+    return [Summary(*r) for r in db.get_conn().execute(sql, params)]
+
+
+def field_summary(board_name: str, field_id: str, lots: Optional[Iterable[str]] = None) -> Optional[Summary]:
+    # All lots (or the given ones) of a field merged into one summary.
+    parts = lot_summaries(board_name, field_id)
+    if lots is not None:
+        keep = set(lots); parts = [p for p in parts if p.lot in keep]
+    return merge_all(parts)
+
+
+def board_summaries(board_name: str) -> List[Summary]:
+    # One merged summary per field of the board.
+    out: List[Summary] = []
+    for p in lot_summaries(board_name):
+        if out and out[-1].field_id == p.field_id:
+            out[-1] = merge(out[-1], p)
+        else:
+            out.append(p._replace(lot="") if p.lot else p)
+    return out
+
+
+def control_limits(s: Summary, k: float = SIGMA) -> Optional[Tuple[float, float, float]]:
+    # (LCL, centre line, UCL)
+    if s.std is None: return None
+    return s.mean - k * s.std, s.mean, s.mean + k * s.std
+
+
+def cpk(s: Summary, lsl: Optional[float], usl: Optional[float]) -> Optional[float]:
+    # Process capability against spec limits in SI units; one-sided when a
+    # limit is missing. None without spread or limits.
+    sd = s.std
+    if not sd or s.mean is None: return None
+    sides = []
+    if usl is not None and math.isfinite(usl): sides.append((usl - s.mean) / (CPK_SIGMA * sd))
+    if lsl is not None and math.isfinite(lsl): sides.append((s.mean - lsl) / (CPK_SIGMA * sd))
+    return min(sides) if sides else None
+
+
+def spec_limits(rules: RuleTable, field_id: str) -> Tuple[Optional[float], Optional[float]]:
+    # A field's validation window in SI units, as spc_stats stores values.
+    i = rules.index.get(field_id)
+    if i is None or not rules.has_rule[i]: return None, None
+    return float(rules.lo[i]), float(rules.hi[i])
+
+
+def capability(board_name: str, field_id: str, rules: RuleTable) -> Optional[float]:
+    s = field_summary(board_name, field_id)
+    if s is None: return None
+    return cpk(s, *spec_limits(rules, field_id))
@@ -0,0 +1,94 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Tuple
+from PIL import Image
+
+TILE_SIZE = 256
+MAX_TILES = 512
+ZOOM_STEPS = [0.125, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0]
+
+
+class TilePyramid:
+    # Serves fixed-size tiles of a page at any zoom. Zoom 1.0 is the rendered
+    # page (layout coordinates are in these pixels). Zoomed-out tiles are cut
+    # from power-of-two downscaled levels built on first use, zoomed-in tiles
+    # are upscaled crops of level 0. Tiles live in an LRU bounded by count.
+    def __init__(self, base: Image.Image, tile_size: int = TILE_SIZE, max_tiles: int = MAX_TILES):
+        self.base = base
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self._levels: Dict[int, Image.Image] = {0: base}
+        self._tiles: "OrderedDict[Tuple[float, int, int], Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def width(self) -> int:
+        return self.base.width
+
+    @property
+    def height(self) -> int:
+        return self.base.height
+
+    def size_at(self, zoom: float) -> Tuple[int, int]:
+        return max(1, math.ceil(self.width * zoom)), max(1, math.ceil(self.height * zoom))
+
+    def grid_at(self, zoom: float) -> Tuple[int, int]:
+        w, h = self.size_at(zoom)
+        return math.ceil(w / self.tile_size), math.ceil(h / self.tile_size)
+
+    def visible_tiles(self, zoom: float, x0: float, y0: float, x1: float, y1: float) -> Iterator[Tuple[int, int]]:
+        # (x0, y0)-(x1, y1) is a viewport in zoomed pixel coordinates.
+        cols, rows = self.grid_at(zoom); t = self.tile_size
+        c0 = max(0, int(x0 // t)); c1 = min(cols - 1, int(x1 // t))
+        r0 = max(0, int(y0 // t)); r1 = min(rows - 1, int(y1 // t))
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                yield c, r
+
+    def tile(self, zoom: float, col: int, row: int) -> Image.Image:
+        key = (zoom, col, row)
+        with self._lock:
+            img = self._tiles.get(key)
+            if img is not None:
+                self._tiles.move_to_end(key)
+                return img
+        img = self._render_tile(zoom, col, row)
+        with self._lock:
+            self._tiles[key] = img
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return img
+
+    def _level(self, k: int) -> Image.Image:
+        with self._lock:
+            img = self._levels.get(k)
+        if img is None:
+            # halved rounding up, so level k is exactly size_at(2 ** -k) and its
+            # edge tiles are not a pixel short
+            src = self._level(k - 1)
+            img = src.resize((-(-src.width // 2), -(-src.height // 2)), Image.BOX)
+            with self._lock:
+                self._levels[k] = img
+        return img
+
+    def _render_tile(self, zoom: float, col: int, row: int) -> Image.Image:
+        t = self.tile_size
+        zw, zh = self.size_at(zoom)
+        x0, y0 = col * t, row * t
+        x1, y1 = min(x0 + t, zw), min(y0 + t, zh)
+        # Smallest pyramid level that still has at least the requested density.
+        k = max(0, int(math.floor(math.log2(1.0 / zoom)))) if zoom < 1.0 else 0
+        level = self._level(k)
+        s = zoom * (2 ** k)  # level pixels -> zoomed pixels
+        box = (x0 / s, y0 / s, min(x1 / s, level.width), min(y1 / s, level.height))
+        out_size = (max(1, x1 - x0), max(1, y1 - y0))
+        if s == 1.0:
+            return level.crop(tuple(int(v) for v in box))
+        return level.resize(out_size, Image.BILINEAR, box=box)
+
+
+def next_zoom(zoom: float, direction: int) -> float:
+    if direction > 0:
+        return next((z for z in ZOOM_STEPS if z > zoom + 1e-9), ZOOM_STEPS[-1])
+    return next((z for z in reversed(ZOOM_STEPS) if z < zoom - 1e-9), ZOOM_STEPS[0])
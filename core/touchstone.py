@@ -0,0 +1,122 @@
+import os
+import re
+from typing import List, Optional, Tuple
+import numpy as np
+
+from core.sparams import Network
+
+# Touchstone (.s1p … .sNp, versions 1.x and 2.0) reader for S-parameter data.
+# Lines are streamed; numeric lines are collected into chunks and each chunk is
+# converted with one NumPy call, so the cost per point is a string split rather
+# than Python-level parsing of every number.
+
+FREQ_UNITS = {"HZ": 1.0, "KHZ": 1e3, "MHZ": 1e6, "GHZ": 1e9}
+FORMATS = ("RI", "MA", "DB")
+
+CHUNK_LINES = 20000
+
+_EXT_RE = re.compile(r"\.s(\d+)p$", re.IGNORECASE)
+
+
+class TouchstoneError(ValueError):
+    pass
+
+
+def ports_from_name(path: str) -> Optional[int]:
+    m = _EXT_RE.search(path)
+    return int(m.group(1)) if m else None
+
+
+def parse_options(line: str) -> Tuple[float, str, float]:
+    # "# GHz S MA R 50" -> (frequency multiplier, format, z0); missing items
+    # take the Touchstone defaults GHz, MA, 50 Ω.
+    mult, fmt, z0 = 1e9, "MA", 50.0
+    toks = line[1:].split()
+    i = 0
+    while i < len(toks):
+        t = toks[i].upper()
+        if t in FREQ_UNITS: mult = FREQ_UNITS[t]
+        elif t in FORMATS: fmt = t
+        elif t == "R" and i + 1 < len(toks):
+            z0 = float(toks[i + 1]); i += 1
+        elif t in ("Y", "Z", "H", "G"):
+            raise TouchstoneError(f"only S-parameter files are supported (got {t})")
+        i += 1
+    return mult, fmt, z0
+
+
+def to_complex(a: np.ndarray, b: np.ndarray, fmt: str) -> np.ndarray:
+    if fmt == "RI":
+        return a + 1j * b
+    mag = a if fmt == "MA" else 10.0 ** (a / 20.0)
+    return mag * np.exp(1j * np.deg2rad(b))
+
+
+def read_touchstone(path: str, n_ports: Optional[int] = None) -> Network:
+    # Port count comes from the [Number of Ports] keyword (2.0), the argument,
+    # or the .sNp extension, in that order.
+    ports = n_ports or ports_from_name(path)
+    options: Optional[Tuple[float, str, float]] = None
+    version = 1
+    order_21_12 = True   # 2-port v1 order: S11 S21 S12 S22
+    in_data = True       # v2 files only have data after [Network Data]
+    width = None
+    noise_check = False
+    chunks: List[np.ndarray] = []
+    pending: List[str] = []
+
+    def flush():
+        if pending:
+            chunks.append(np.array(" ".join(pending).split(), dtype=float))
+            pending.clear()
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = (raw.split("!", 1)[0] if "!" in raw else raw).strip()
+            if not line: continue
+            c = line[0]
+            if c == "#":
+                if options is None: options = parse_options(line)
+                continue
+            if c == "[":
+                key, _, val = line[1:].partition("]")
+                key = key.strip().lower(); val = val.strip()
+                if key == "version":
+                    version = 2; in_data = False
+                elif key == "number of ports":
+                    ports = int(val)
+                elif key == "matrix format" and val.lower() != "full":
+                    raise TouchstoneError(f"{os.path.basename(path)}: [Matrix Format] {val} is not supported")
+                elif key == "two-port data order":
+                    order_21_12 = val.replace(" ", "") == "21_12"
+                elif key == "network data":
+                    in_data = True
+                elif key in ("noise data", "end"):
+                    break
+                elif version == 2:
+                    in_data = False
+                continue
+            if not in_data: continue
+            if width is None:
+                if not ports:
+                    raise TouchstoneError(f"{os.path.basename(path)}: cannot tell the number of ports")
+                width = 1 + 2 * ports * ports
+                noise_check = ports == 2 and version == 1
+            if noise_check and len(line.split()) == 5 and (chunks or pending):
+                break  # v1 noise parameters follow the network data
+            pending.append(line)
+            if len(pending) >= CHUNK_LINES: flush()
+    flush()
+
+    if width is None:
+        raise TouchstoneError(f"{os.path.basename(path)}: no network data")
+    flat = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    if flat.size % width:
+        raise TouchstoneError(f"{os.path.basename(path)}: {flat.size} values is not a multiple of {width} "
+                              f"({ports}-port)")
+    mult, fmt, z0 = options or (1e9, "MA", 50.0)
+    rows = flat.reshape(-1, width)
+    s = to_complex(rows[:, 1::2], rows[:, 2::2], fmt).reshape(-1, ports, ports)
+    if ports == 2 and order_21_12:
+        s = s.transpose(0, 2, 1)  # values were column-major
+    return Network(rows[:, 0] * mult, s, z0, path)
@@ -0,0 +1,151 @@
+import math
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import numpy as np
+
+from core.layout import Field, NUMBER
+
+# Status codes returned by RuleTable.evaluate
+EMPTY = 0      # no value entered
+PASS = 1
+FAIL = 2       # outside the lo/hi window
+INVALID = 3    # not a number
+NO_RULE = 4    # numeric value, but the field has no limits
+
+STATUS_NAMES = {EMPTY: "", PASS: "pass", FAIL: "fail", INVALID: "invalid", NO_RULE: ""}
+
+SI_PREFIXES = {"p": 1e-12, "n": 1e-9, "u": 1e-6, "µ": 1e-6, "μ": 1e-6, "m": 1e-3,
+               "k": 1e3, "M": 1e6, "G": 1e9}
+
+
+# Prefixes are case-exact: "k" is kilo, "K" is kelvin.
+# Units a prefix may be applied to. Anything else ("ppm", "psi", "min",
+# "mil", "dB", "dBm", ...) is taken as written.
+BASE_UNITS = {"V", "A", "Hz", "Ω", "\u2126", "ohm", "Ohm", "F", "H", "s", "S", "W", "J", "C", "g", "m", "K", "Pa"}
+UNPREFIXED = {"ppm", "psi", "min", "mil", "dB", "dBm"}
+
+
+def unit_scale(unit: str) -> Tuple[float, str]:
+    # "kΩ" -> (1000.0, "Ω"). A single character is always a base unit, so "m"
+    # is metres rather than a bare milli prefix, and a leading prefix letter
+    # only counts when the rest is a known base unit ("ppm" stays ppm).
+    u = (unit or "").strip()
+    if len(u) > 1 and u[0] in SI_PREFIXES and u not in UNPREFIXED and u[1:] in BASE_UNITS:
+        return SI_PREFIXES[u[0]], u[1:]
+    return 1.0, u
+
+
+def parse_number(s) -> Optional[float]:
+    # None for empty/partial input, nan for text that is not a number
+    if s is None: return None
+    if isinstance(s, (int, float)) and not isinstance(s, bool): return float(s)
+    s = str(s).strip()
+    if s in ("", "-", "."): return None
+    try: return float(s)
+    except ValueError: return math.nan
+
+
+def _window(vdef: Dict[str, Any]) -> Tuple[float, float]:
+    # Same arithmetic the entry widgets always used: pct limits scale the
+    # target, abs limits are offsets added on top. With abs limits but no
+    # target the offsets are applied to the value itself, which reduces to a
+    # constant pass/fail depending on the signs of the offsets.
+    target = vdef.get("target")
+    lpct = vdef.get("lower_pct"); upct = vdef.get("upper_pct")
+    labs = vdef.get("lower_abs"); uabs = vdef.get("upper_abs")
+    lo = hi = None
+    if target is not None and (lpct is not None or upct is not None):
+        lo = target * (1 + (lpct or 0)/100.0)
+        hi = target * (1 + (upct or 0)/100.0)
+    if labs is not None or uabs is not None:
+        if lo is None and target is None:
+            ok = (labs or 0) <= 0 <= (uabs or 0)
+            return (-math.inf, math.inf) if ok else (math.inf, -math.inf)
+        lo = (lo if lo is not None else target) + (labs or 0)
+        hi = (hi if hi is not None else target) + (uabs or 0)
+    if lo is None and hi is None:
+        return math.nan, math.nan
+    return float(lo), float(hi)
+
+
+class RuleTable:
+    # Validation limits for every number field of a layout, compiled once into
+    # parallel arrays. Limits are held in SI base units (kΩ -> Ω) so values
+    # entered in any prefixed unit compare directly.
+    def __init__(self, fields: Iterable[Field]):
+        ids: List[str] = []; lo: List[float] = []; hi: List[float] = []; ref: List[float] = []
+        for f in fields:
+            if f.type != NUMBER: continue
+            l, h = _window(f.validation or {})
+            s, _ = unit_scale(f.unit)
+            ids.append(f.id); lo.append(l * s); hi.append(h * s); ref.append(s)
+        self.ids = ids
+        self.index = {fid: i for i, fid in enumerate(ids)}
+        self.lo = np.array(lo, dtype=float)
+        self.hi = np.array(hi, dtype=float)
+        self.ref_scale = np.array(ref, dtype=float)
+        self.has_rule = ~(np.isnan(self.lo) & np.isnan(self.hi))
+
+    def __contains__(self, fid) -> bool:
+        return fid in self.index
+
+    def limits(self, fid: str) -> Tuple[Optional[float], Optional[float]]:
+        # lo/hi in the field's default unit, or (None, None)
+        i = self.index.get(fid)
+        if i is None or not self.has_rule[i]: return None, None
+        return float(self.lo[i] / self.ref_scale[i]), float(self.hi[i] / self.ref_scale[i])
+
+    def evaluate(self, values: np.ndarray, scales: Optional[np.ndarray] = None,
+                 invalid: Optional[np.ndarray] = None) -> np.ndarray:
+        # values/scales/invalid are aligned with self.ids. values are as
+        # entered (nan = empty), scales convert them to SI (defaults to each
+        # field's default unit), invalid flags unparseable text.
+        v = np.asarray(values, dtype=float)
+        sc = self.ref_scale if scales is None else np.asarray(scales, dtype=float)
+        si = v * sc
+        out = np.full(v.shape, EMPTY, dtype=np.int8)
+        present = ~np.isnan(v)
+        out[present & ~self.has_rule] = NO_RULE
+        ruled = present & self.has_rule
+        with np.errstate(invalid="ignore"):
+            inside = (si >= self.lo) & (si <= self.hi)
+        out[ruled & inside] = PASS
+        out[ruled & ~inside] = FAIL
+        if invalid is not None:
+            out[np.asarray(invalid, dtype=bool)] = INVALID
+        return out
+
+    def evaluate_map(self, entries: Dict[str, Any]) -> Dict[str, int]:
+        # entries: fid -> raw text, or (raw text, unit). Fields not in entries
+        # are treated as empty.
+        n = len(self.ids)
+        vals = np.full(n, np.nan); scales = self.ref_scale.copy(); bad = np.zeros(n, dtype=bool)
+        for fid, entry in entries.items():
+            i = self.index.get(fid)
+            if i is None: continue
+            raw, unit = entry if isinstance(entry, (tuple, list)) else (entry, None)
+            x = parse_number(raw)
+            if x is None: continue
+            if math.isnan(x): bad[i] = True; continue
+            vals[i] = x
+            if unit: scales[i] = unit_scale(unit)[0]
+        status = self.evaluate(vals, scales, bad)
+        return {fid: int(status[i]) for fid, i in self.index.items()}
+
+    def check(self, fid: str, raw, unit: Optional[str] = None) -> int:
+        i = self.index.get(fid)
+        if i is None: return NO_RULE
+        x = parse_number(raw)
+        if x is None: return EMPTY
+        if math.isnan(x): return INVALID
+        if not self.has_rule[i]: return NO_RULE
+        si = x * (unit_scale(unit)[0] if unit else self.ref_scale[i])
+        return PASS if self.lo[i] <= si <= self.hi[i] else FAIL
+
+
+def compile_rules(fields: Iterable[Field]) -> RuleTable:
+    return RuleTable(fields)
+
+
+def to_si(value: Optional[float], unit: str) -> Optional[float]:
+    if value is None or (isinstance(value, float) and math.isnan(value)): return None
+    return value * unit_scale(unit)[0]
@@ -0,0 +1,12 @@
+import pytest
+
+from core import db
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    # a fresh, migrated results database for one test
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "results.db")
+    db.init_db()
+    yield
+    db.close_all()
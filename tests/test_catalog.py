@@ -0,0 +1,43 @@
+import json
+import os
+
+from PIL import Image
+
+from core.catalog import LayoutCatalog, ThumbnailCache, search
+from core.raster_cache import RasterCache
+
+
+def _layout(path, board, canvas):
+    path.write_text(json.dumps({"schema_version": "2.0", "board_name": board, "canvas": canvas, "fields": []}))
+
+
+def test_scan_uses_index_until_file_changes(tmp_path):
+    d = tmp_path / "layouts"; d.mkdir()
+    _layout(d / "a.json", "Alpha", {"type": "blank"})
+    (d / "bad.json").write_text("{")
+    index = tmp_path / "index.json"
+    entries = LayoutCatalog(str(d), index).scan()
+    assert [(e.name, e.board_name, bool(e.error)) for e in entries] == [("a.json", "Alpha", False), ("bad.json", "", True)]
+    assert [e.name for e in search(entries, "alp BLANK")] == ["a.json"]
+
+    _layout(d / "a.json", "Alpha rev B", {"type": "blank"})
+    os.utime(d / "a.json", ns=(1, 1))
+    (e, _) = LayoutCatalog(str(d), index).scan()
+    assert e.board_name == "Alpha rev B"
+
+
+def test_thumbnail_bypasses_raster_cache(tmp_path):
+    d = tmp_path / "layouts"; d.mkdir()
+    Image.new("RGB", (1600, 1200), (0, 128, 0)).save(d / "board.jpg")
+    _layout(d / "img.json", "Img", {"type": "image", "path": str(d / "board.jpg")})
+    (entry,) = LayoutCatalog(str(d), tmp_path / "index.json").scan()
+    raster = RasterCache(tmp_path / "raster")
+    thumbs = ThumbnailCache(tmp_path / "thumbs", cache=raster)
+    img = thumbs._thumbnail(entry)
+    assert img.size == (200, 150)
+    assert thumbs.get(entry) is img
+    assert not raster._mem and not list((tmp_path / "raster").glob("*/*"))
+    # a second cache finds the PNG on disk
+    assert len(list((tmp_path / "thumbs").glob("*.png"))) == 1
+    again = ThumbnailCache(tmp_path / "thumbs", cache=raster)._thumbnail(entry)
+    assert again.size == (200, 150)
@@ -0,0 +1,47 @@
+import csv
+
+import pytest
+
+from boardtest import cli
+from core import db
+
+
+@pytest.fixture
+def two_runs(temp_db):
+    for rid, v in (("r1", "10"), ("r2", "11")):
+        db.insert_run({"run_id": rid, "timestamp": f"20260101_00000{rid[1]}", "board_name": "B"},
+                      [{"field_id": "V1", "label": "Rail", "value": v, "unit": "V"},
+                       {"field_id": "N", "label": "Note", "value": "ok"}])
+
+
+def _compare(tmp_path, *extra):
+    out = tmp_path / "cmp.csv"
+    rc = cli.main(["--db", str(db.DB_PATH), "compare", "r1", "r2", "-o", str(out), *extra])
+    with open(out, newline="", encoding="utf-8") as f:
+        return rc, {r[0]: r for r in csv.reader(f)}
+
+
+def test_compare_output_keeps_pct(two_runs, tmp_path):
+    rc, rows = _compare(tmp_path)
+    assert rc == 0
+    assert rows["V1"][2:] == ["10 V", "11 V (+10.0%)"]
+    assert rows["N"][2:] == ["ok", "ok"]
+
+
+def test_compare_no_pct(two_runs, tmp_path):
+    _, rows = _compare(tmp_path, "--no-pct", "--only-diff")
+    assert rows["V1"][2:] == ["10 V", "11 V"]
+    assert "N" not in rows
+
+
+def test_compare_fail_on_diff(two_runs, capsys):
+    assert cli.main(["--db", str(db.DB_PATH), "compare", "r1", "r2", "--fail-on-diff"]) == 1
+    assert "V1" in capsys.readouterr().out
+
+
+def test_spc_summary(two_runs, capsys):
+    assert cli.main(["--db", str(db.DB_PATH), "spc", "B"]) == 0
+    header, row = capsys.readouterr().out.splitlines()
+    assert header.split()[:4] == ["field_id", "lot", "n", "mean"]
+    assert row.split()[:3] == ["V1", "2", "10.5"]
+    assert cli.main(["--db", str(db.DB_PATH), "spc", "nope"]) == 1
@@ -0,0 +1,54 @@
+import numpy as np
+
+from core.compare import ID_COLS, CompareEngine, build_comparison
+from core.db import MeasurementRow
+
+
+def _m(run, fid, value, unit="", num=None, label=None):
+    return MeasurementRow(run, fid, label, "", value, unit, num, None)
+
+
+ROWS = [
+    _m("r1", "v1", "10", "V", 10.0, "Rail"), _m("r2", "v1", "11", "V", 11.0, "Rail"), _m("r3", "v1", "10", "V", 10.0),
+    _m("r1", "Z", "0", "V", 0.0), _m("r2", "Z", "1", "V", 1.0),
+    _m("r1", "note", "ok"), _m("r2", "note", "ok"), _m("r3", "note", "bad"),
+]
+
+
+def test_pivot_and_deltas():
+    c = build_comparison(ROWS, ["r1", "r2", "r3"])
+    assert c.field_ids == ["note", "v1", "Z"]            # case-insensitive order
+    assert c.labels.tolist() == ["note", "Rail", "Z"]    # missing label -> field id
+    assert c.display.loc["Z"].tolist() == ["0 V", "1 V", ""]
+    assert c.delta.loc["v1"].tolist() == [0.0, 1.0, 0.0]
+    assert c.pct.loc["v1", "r2"] == 10.0
+    assert np.isnan(c.pct.loc["Z", "r2"])                # zero baseline
+    assert c.any_diff.tolist() == [True, True, True]
+
+
+def test_table_rows_and_filters():
+    c = build_comparison(ROWS, ["r1", "r3"])
+    header, rows, diff = c.table()
+    assert header == ID_COLS + ["r1", "r3"]
+    assert rows == [["note", "note", "ok", "bad"], ["v1", "Rail", "10 V", "10 V"], ["Z", "Z", "0 V", ""]]
+    _, rows, diff = c.table(only_diff=True)
+    assert [r[0] for r in rows] == ["note", "Z"] and diff.tolist() == [[False, True], [False, True]]
+    _, rows, _ = build_comparison(ROWS, ["r1", "r2"]).table(only_diff=True)
+    assert rows == [["v1", "Rail", "10 V", "11 V (+10.0%)"], ["Z", "Z", "0 V", "1 V"]]   # no % from a zero baseline
+
+
+def test_empty_selection_and_duplicates():
+    header, rows, _ = build_comparison([], ["a", "b"]).table()
+    assert header == ID_COLS + ["a", "b"] and rows == []
+    c = build_comparison([_m("a", "f", "1"), _m("a", "f", "2")], ["a"])
+    assert c.display.loc["f", "a"] == "2"                # last entry wins
+
+
+def test_engine_reuses_result_for_same_selection():
+    calls = []
+    engine = CompareEngine(lambda ids: calls.append(ids) or [r for r in ROWS if r.run_id in ids])
+    first = engine.compare(["r1", "r2"])
+    assert engine.compare(["r1", "r2"]) is first and len(calls) == 1
+    assert engine.compare(["r2", "r1"]).baseline == "r2" and len(calls) == 2
+    engine.compare(["r2", "r1"], refresh=True); engine.invalidate(); engine.compare(["r2", "r1"])
+    assert len(calls) == 4
@@ -0,0 +1,47 @@
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from core import db
+
+
+def _in_thread(fn):
+    out = {}
+    t = threading.Thread(target=lambda: out.setdefault("v", fn()))
+    t.start(); t.join()
+    return out["v"]
+
+
+def test_closing_conn_closes_worker_connection(temp_db):
+    def work():
+        with db.closing_conn() as conn:
+            conn.execute("SELECT COUNT(*) FROM runs").fetchone()
+        return conn
+    conn = _in_thread(work)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_finished_threads_do_not_keep_connections(temp_db):
+    before = len(db._all_conns)
+    for _ in range(5):
+        _in_thread(lambda: db.count_runs())
+    gc.collect()
+    assert len(db._all_conns) == before
+
+
+def test_insert_runs_after_uncommitted_write(temp_db):
+    db.insert_run({"run_id": "r0", "timestamp": "20260101_000000"}, [])
+    db.get_conn().execute("UPDATE runs SET notes = 'edited' WHERE run_id = 'r0'")
+    stats = db.insert_runs([({"run_id": "r1", "timestamp": "20260101_000001"}, [])])
+    assert stats.runs == 1
+    assert {r.run_id: r.notes for r in db.list_runs()} == {"r0": "edited", "r1": ""}
+
+
+def test_connection_is_reused_per_path(temp_db, tmp_path, monkeypatch):
+    conn = db.get_conn()
+    assert db.get_conn() is conn
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "other.db")
+    assert db.get_conn() is not conn
@@ -0,0 +1,60 @@
+import numpy as np
+
+from core.decimate import decimate, decimate_band, minmax_indices, visible_slice
+
+
+def test_short_input_is_unchanged():
+    x = np.arange(10.0); y = np.sin(x)
+    dx, dy = decimate(x, y, 5)
+    assert dx is x and dy is y
+    assert minmax_indices(np.array([]), 10).size == 0
+    assert minmax_indices(y, 0).tolist() == list(range(10))
+
+
+def test_extremes_and_end_points_survive():
+    rng = np.random.default_rng(1)
+    x = np.linspace(0, 1, 10007); y = rng.normal(size=x.size)
+    y[1234] = 50.0; y[8888] = -50.0
+    dx, dy = decimate(x, y, 300)
+    assert len(dx) <= 2 * 300 + 2
+    assert np.all(np.diff(dx) > 0)
+    assert (dx[0], dx[-1]) == (x[0], x[-1])
+    assert dy.max() == 50.0 and dy.min() == -50.0
+
+
+def test_every_bucket_keeps_its_min_and_max():
+    y = np.random.default_rng(2).normal(size=1000)
+    idx = minmax_indices(y, 100)   # buckets of 10
+    for b in range(100):
+        seg = y[b * 10:(b + 1) * 10]
+        kept = y[idx[(idx >= b * 10) & (idx < (b + 1) * 10)]]
+        assert seg.min() in kept and seg.max() in kept
+
+
+def test_uneven_last_bucket():
+    y = np.arange(1001.0)
+    idx = minmax_indices(y, 100)
+    assert idx.max() == 1000 and np.all(idx < 1001)
+
+
+def test_visible_slice_edges():
+    x = np.arange(10.0)
+    assert visible_slice(x, 3.5, 6.5) == slice(3, 8)   # samples 3..7: one either side
+    assert visible_slice(x, -5, 100) == slice(0, 10)
+    assert visible_slice(x, 20, 30) == slice(9, 10)
+    assert visible_slice(x, 0, 0) == slice(0, 2)
+
+
+def test_xlim_restricts_output():
+    x = np.linspace(0, 100, 100001); y = np.cos(x)
+    dx, _ = decimate(x, y, 50, xlim=(10, 20))
+    assert dx[0] < 10 <= dx[1] and dx[-2] <= 20 < dx[-1]
+
+
+def test_band_keeps_extremes_of_both_edges():
+    x = np.arange(5000.0)
+    lo = np.zeros_like(x); hi = np.ones_like(x)
+    lo[123] = -9; hi[4321] = 9
+    dx, dlo, dhi = decimate_band(x, lo, hi, 100)
+    assert len(dx) == len(dlo) == len(dhi) < len(x)
+    assert dlo.min() == -9 and dhi.max() == 9
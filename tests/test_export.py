@@ -0,0 +1,81 @@
+import csv
+import threading
+
+import pytest
+
+from core import db, export
+
+
+COLUMNS = ["run_id", "value", "value_num", "notes"]
+ROWS = [("r1", "1.5", 1.5, None), ("r2", "abc", None, "x"), ("r3", "", None, None)]
+
+
+def _read(path):
+    fmt = export.format_for(str(path))
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return [tuple(r) for r in csv.reader(f)]
+    if fmt == "xlsx":
+        from openpyxl import load_workbook
+        return [tuple(r) for r in load_workbook(path).active.iter_rows(values_only=True)]
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(path)
+    return [tuple(table.column_names)] + [tuple(r.values()) for r in table.to_pylist()]
+
+
+@pytest.mark.parametrize("ext", [".csv", ".xlsx", ".parquet"])
+def test_round_trip(tmp_path, ext):
+    if ext == ".parquet": pytest.importorskip("pyarrow")
+    path = tmp_path / f"out{ext}"
+    assert export.write_rows(str(path), COLUMNS, iter(ROWS)) == 3
+    got = _read(path)
+    assert got[0] == tuple(COLUMNS)
+    if ext == ".csv":
+        assert got[1:] == [("r1", "1.5", "1.5", ""), ("r2", "abc", "", "x"), ("r3", "", "", "")]
+    else:
+        assert [r[0] for r in got[1:]] == ["r1", "r2", "r3"]
+        assert [r[2] for r in got[1:]] == [1.5, None, None]
+    assert not (tmp_path / f"out{ext}.part").exists()
+
+
+@pytest.mark.parametrize("ext", [".csv", ".xlsx", ".parquet"])
+def test_empty_export_writes_header(tmp_path, ext):
+    if ext == ".parquet": pytest.importorskip("pyarrow")
+    path = tmp_path / f"out{ext}"
+    assert export.write_rows(str(path), COLUMNS, iter(())) == 0
+    assert _read(path) == [tuple(COLUMNS)]
+
+
+def test_parquet_batches_with_null_first_group(tmp_path, monkeypatch):
+    # value_num is all-null in the first row group and numeric in the second
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(export, "PARQUET_BATCH", 2)
+    rows = [("r1", "a", None, None), ("r2", "b", None, None), ("r3", "3", 3.0, "n")]
+    path = tmp_path / "out.parquet"
+    export.write_rows(str(path), COLUMNS, iter(rows))
+    assert pq.read_table(path).column("value_num").to_pylist() == [None, None, 3.0]
+
+
+def test_cancel_leaves_no_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "PROGRESS_EVERY", 1)
+    cancel = threading.Event(); cancel.set()
+    path = tmp_path / "out.csv"
+    with pytest.raises(export.ExportCancelled):
+        export.write_rows(str(path), COLUMNS, iter(ROWS), cancel=cancel)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        export.write_rows(str(tmp_path / "out.txt"), COLUMNS, iter(ROWS))
+
+
+def test_export_runs(temp_db, tmp_path):
+    db.insert_run({"run_id": "r1", "timestamp": "20260101_000000", "board_name": "B"},
+                  [{"field_id": "V1", "value": "2", "unit": "mV", "status": "pass"}])
+    path = tmp_path / "runs.csv"
+    assert export.export_runs(str(path), ["r1"]) == 1
+    header, row = _read(path)
+    assert header == tuple(db.EXPORT_COLS)
+    got = dict(zip(header, row))
+    assert (got["field_id"], got["value_num"], got["status"]) == ("V1", "0.002", "pass")
@@ -0,0 +1,43 @@
+import random
+
+from core.field_index import FieldIndex
+from core.layout import Field
+
+
+def _brute_hit(fields, x, y):
+    hits = [f.id for f in fields if f.x <= x <= f.x + f.w and f.y <= y <= f.y + f.h]
+    return hits[-1] if hits else None
+
+
+def test_hits_and_queries_match_brute_force():
+    rnd = random.Random(3)
+    fields = [Field(f"F{i}", rect=(rnd.uniform(-50, 900), rnd.uniform(-50, 700), rnd.uniform(5, 300), rnd.uniform(5, 60)))
+              for i in range(300)]
+    idx = FieldIndex(fields, cell=64)
+    for _ in range(500):
+        x, y = rnd.uniform(-60, 1000), rnd.uniform(-60, 800)
+        assert idx.hit(x, y) == _brute_hit(fields, x, y)
+    x0, y0, x1, y1 = 100, 100, 400, 300
+    expect = {f.id for f in fields if f.x <= x1 and f.x + f.w >= x0 and f.y <= y1 and f.y + f.h >= y0}
+    assert set(idx.query(x0, y0, x1, y1)) == expect
+
+
+def test_later_fields_win_overlaps():
+    a = Field("a", rect=(0, 0, 100, 100)); b = Field("b", rect=(50, 50, 100, 100))
+    idx = FieldIndex([a, b])
+    assert idx.hit(75, 75) == "b" and idx.hit(10, 10) == "a"
+    idx.add(a)   # re-adding moves a to the top
+    assert idx.hit(75, 75) == "a"
+
+
+def test_updates():
+    f = Field("f", rect=(0, 0, 10, 10))
+    idx = FieldIndex([f], cell=16)
+    f.set_rect(500, 500, 10, 10); idx.move("f")
+    assert idx.hit(5, 5) is None and idx.hit(505, 505) == "f"
+    assert idx.query(0, 0, 100, 100) == []
+    idx.rename("f", "g")
+    assert "f" not in idx and idx.hit(505, 505) == "g" and idx.get("g") is f
+    idx.remove("g")
+    assert len(idx) == 0 and idx.hit(505, 505) is None and not idx._cells
+    idx.remove("missing"); idx.move("missing"); idx.rename("missing", "x")
@@ -0,0 +1,41 @@
+from core import db
+from core.layout import Field
+from core.validation import FAIL, NO_RULE, PASS, compile_rules
+
+
+def _log(run_id, board, ts, values):
+    db.insert_run({"run_id": run_id, "timestamp": ts, "board_name": board},
+                  [{"field_id": fid, "value": v, "unit": "V"} for fid, v in values.items()])
+
+
+def test_field_stats_covers_more_fields_than_max_params(temp_db):
+    n = db.MAX_PARAMS * 2 + 5
+    _log("r1", "B", "20260101_000000", {f"F{i:04d}": str(i) for i in range(n)})
+    stats = db.field_stats([f"F{i:04d}" for i in range(n)])
+    assert [s.field_id for s in stats] == [f"F{i:04d}" for i in range(n)]
+
+
+def test_field_stats_filters_on_run_columns(temp_db):
+    # a board name containing "timestamp" must not be rewritten into the SQL
+    _log("r1", "timestamp_board", "20260101_000000", {"V1": "1"})
+    _log("r2", "other", "20260102_000000", {"V1": "3"})
+    (s,) = db.field_stats(["V1"], board_name="timestamp_board", since="20260101_000000")
+    assert (s.count, s.mean) == (1, 1.0)
+    (s,) = db.field_stats(board_name=None, since="20260102_000000")
+    assert (s.count, s.mean) == (1, 3.0)
+
+
+def test_status_is_null_unless_judged(temp_db):
+    # empty and unlimited fields store NULL with rules, as they do without
+    rules = compile_rules([Field("V1", validation={"target": 5, "lower_abs": -1, "upper_abs": 1}, default_unit="V"),
+                           Field("V2", default_unit="V"), Field("V3", default_unit="V")])
+    db.insert_run({"run_id": "r1", "timestamp": "20260101_000000", "board_name": "B"},
+                  [{"field_id": "V1", "value": "5.5", "unit": "V"}, {"field_id": "V2", "value": "1", "unit": "V"},
+                   {"field_id": "V3", "value": "", "unit": "V"}, {"field_id": "N", "value": "x", "status": NO_RULE}],
+                  rules=rules)
+    db.insert_run({"run_id": "r2", "timestamp": "20260101_000001", "board_name": "B"},
+                  [{"field_id": "V1", "value": "9", "unit": "V", "status": "fail"},
+                   {"field_id": "V2", "value": "1", "unit": "V"}])
+    status = {(m.run_id, m.field_id): m.status for m in db.measurements_for_runs(["r1", "r2"])}
+    assert status == {("r1", "V1"): PASS, ("r1", "V2"): None, ("r1", "V3"): None, ("r1", "N"): None,
+                      ("r2", "V1"): FAIL, ("r2", "V2"): None}
@@ -0,0 +1,55 @@
+import json
+import os
+
+from openpyxl import Workbook
+
+from core import db, importer
+
+
+def _workbook(path, values):
+    wb = Workbook(); ws = wb.active
+    ws.append(["timestamp", "operator", "field_id", "label", "value", "unit", "status"])
+    for fid, v in values.items():
+        ws.append(["20260101_000000", "op", fid, fid, v, "V", "pass"])
+    wb.save(path)
+
+
+def _import(src, state):
+    return importer.import_files([str(src)], workers=1, state_file=state)
+
+
+def test_import_and_resume(temp_db, tmp_path):
+    src = tmp_path / "in"; src.mkdir(); state = tmp_path / "state.jsonl"
+    _workbook(src / "run_20260101_000000_LNA.xlsx", {"V1": "1", "V2": "2"})
+    _workbook(src / "run_20260101_000001_LNA.xlsx", {"V1": "3"})
+    r = _import(src, state)
+    assert (r.files, r.runs, r.measurements, r.failed) == (2, 2, 3, 0)
+    run = db.get_run("20260101_000000_LNA")
+    assert (run.board_name, run.operator) == ("LNA", "op")
+
+    # nothing new: no file is parsed again
+    r = _import(src, state)
+    assert (r.files, r.runs, r.skipped) == (0, 0, 0)
+
+    # without the state file, stored runs are skipped before parsing
+    r = _import(src, None)
+    assert (r.files, r.runs, r.skipped) == (0, 0, 2)
+
+
+def test_failed_file_is_retried_only_when_changed(temp_db, tmp_path):
+    src = tmp_path / "in"; src.mkdir(); state = tmp_path / "state.jsonl"
+    bad = src / "run_20260101_000000_LNA.xlsx"
+    bad.write_bytes(b"not a workbook")
+    r = _import(src, state)
+    assert (r.files, r.failed) == (1, 1)
+    (entry,) = [json.loads(line) for line in state.read_text().splitlines()]
+    assert entry["file"].endswith(f"|{bad.stat().st_size}|{bad.stat().st_mtime_ns}") and entry["error"]
+
+    r = _import(src, state)
+    assert (r.files, r.failed) == (0, 1)
+
+    _workbook(bad, {"V1": "1"})
+    os.utime(bad, ns=(bad.stat().st_mtime_ns + 10**9,) * 2)
+    r = _import(src, state)
+    assert (r.files, r.runs, r.failed) == (1, 1, 0)
+    assert _import(src, state).failed == 0
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from core.layout import ENUM, NUMBER, SCHEMA_VERSION, Field, Layout, migrate
+
+
+CURRENT = {
+    "schema_version": SCHEMA_VERSION, "board_name": "LNA", "canvas": {"type": "blank", "size": [800, 600]},
+    "vendor_key": {"a": 1},
+    "fields": [
+        {"id": "V1", "label": "Rail", "component_type": "rail", "position": {"x": 1.0, "y": 2.0, "w": 30.0, "h": 10.0},
+         "input": {"type": "number", "units": ["mV", "V"], "default_unit": "V",
+                   "validation": {"min": 1, "max": 2}, "step": 0.1},
+         "note": "kept"},
+        {"id": "M", "label": "Mode", "position": {"x": 0.0, "y": 0.0, "w": 100.0, "h": 24.0},
+         "input": {"type": "enum", "options": ["a", "b"], "default": "a"}},
+    ],
+}
+
+
+def test_round_trip_keeps_unknown_keys():
+    layout = Layout.from_dict(json.loads(json.dumps(CURRENT)))
+    v1, m = layout.fields
+    assert (v1.type, v1.rect, v1.unit, v1.extra, v1.input_extra) == (NUMBER, (1.0, 2.0, 30.0, 10.0), "V",
+                                                                   {"note": "kept"}, {"step": 0.1})
+    assert m.type == ENUM and m.options == ["a", "b"]
+    assert layout.to_dict() == CURRENT
+
+
+def test_legacy_layout_is_migrated():
+    legacy = {"board_name": "Old", "pdf": {"path": "board.pdf", "page": 1},
+              "fields": [{"id": "R1", "x": 5, "y": 6, "w": 40, "h": 20, "unit": "kΩ",
+                          "validation": {"min": 9, "max": 11}}]}
+    d = migrate(legacy)
+    assert d is not legacy and "pdf" in legacy
+    assert d["canvas"] == {"type": "pdf", "path": "board.pdf", "page": 1}
+    (f,) = Layout.from_dict(legacy).fields
+    assert (f.rect, f.units, f.unit, f.validation) == ((5.0, 6.0, 40.0, 20.0), ["kΩ"], "kΩ", {"min": 9, "max": 11})
+    assert migrate(d) is d
+
+
+@pytest.mark.parametrize("path", sorted(map(str, (Path(__file__).parent.parent / "data" / "layouts").glob("*.json"))))
+def test_shipped_layouts_round_trip(path):
+    layout = Layout.load(path)
+    assert Layout.from_dict(layout.to_dict()).to_dict() == layout.to_dict()
+
+
+def test_save_and_copy(tmp_path):
+    layout = Layout.from_dict(CURRENT)
+    path = tmp_path / "l.json"
+    layout.save(str(path))
+    assert Layout.load(str(path)).to_dict() == CURRENT and not (tmp_path / "l.json.part").exists()
+    f = layout.fields[0]; c = f.copy()
+    c.units.append("kV"); c.set_rect(0, 0, 1, 1)
+    assert f.units == ["mV", "V"] and f.rect == (1.0, 2.0, 30.0, 10.0)
+    f.assign(c)
+    assert f.rect == (0.0, 0.0, 1.0, 1.0) and Field("x").label == "x"
@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pdf2image
+from PIL import Image
+
+from core import pdf_session
+from core.raster_cache import RasterCache
+
+
+def _session(tmp_path, monkeypatch, pages=3):
+    # pdfinfo and Poppler replaced by counters, so no PDF tools are needed
+    calls = {"info": 0, "render": 0}
+    def pdfinfo(path, first_page=None, last_page=None):
+        calls["info"] += 1; time.sleep(0.05)
+        return {"Pages": pages, "Page size": "612 x 792 pts"}
+    def render(cfg, cache=None):
+        calls["render"] += 1; time.sleep(0.2)
+        return Image.new("RGB", (4, 4))
+    monkeypatch.setattr(pdf2image, "pdfinfo_from_path", pdfinfo)
+    monkeypatch.setattr(pdf_session, "render_background", render)
+    pdf = tmp_path / "doc.pdf"; pdf.write_bytes(b"%PDF-1.4")
+    return pdf_session.PdfSession(str(pdf), cache=RasterCache(tmp_path / "cache")), calls
+
+
+def test_page_info_is_read_once(tmp_path, monkeypatch):
+    sess, calls = _session(tmp_path, monkeypatch)
+    threads = [threading.Thread(target=lambda: sess.page_count) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert sess.page_count == 3
+    assert calls["info"] == 2   # document info, then the per-page sizes
+
+
+def test_concurrent_renders_share_one_run(tmp_path, monkeypatch):
+    sess, calls = _session(tmp_path, monkeypatch)
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(sess.render_page(0, 72, prefetch=False)))
+               for _ in range(3)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert calls["render"] == 1
+    assert len({id(img) for img in out}) == 3
+
+
+def test_closed_session_drops_queued_prefetches(tmp_path, monkeypatch):
+    sess, calls = _session(tmp_path, monkeypatch)
+    gate = threading.Event()
+    pdf_session._prefetch_pool.submit(gate.wait)   # hold the shared pool
+    sess.prefetch([0, 1, 2], 72)
+    sess.close()
+    gate.set()
+    pdf_session._prefetch_pool.submit(lambda: None).result()
+    assert calls["render"] == 0
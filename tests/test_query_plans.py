@@ -0,0 +1,43 @@
+import sqlite3
+
+import pytest
+
+from core import db
+
+
+@pytest.mark.parametrize("name", sorted(db.query_plan_checks()))
+def test_query_uses_its_index(temp_db, name):
+    sql, params, indexes = db.query_plan_checks()[name]
+    plan = db.explain(sql, params)
+    assert any(ix in step for step in plan for ix in indexes), plan
+    assert not any(step.startswith("SCAN") and "USING" not in step for step in plan), plan
+
+
+def test_field_history_query_is_the_one_checked(temp_db):
+    # the checked SQL must be what field_history() actually runs
+    sql, params = db._field_history_query("R1", "b", 100)
+    assert "JOIN runs" in sql and "ORDER BY r.timestamp" in sql
+    assert db.query_plan_checks()["field_history"][:2] == (sql, params)
+
+
+def test_check_query_plans_all_pass(temp_db):
+    failed = {k: plan for k, (ok, plan) in db.check_query_plans().items() if not ok}
+    assert not failed
+
+
+def test_failed_migration_is_rolled_back(temp_db, monkeypatch):
+    # a step that fails after its DDL leaves neither the table nor the version bump
+    version = db.schema_version()
+    monkeypatch.setattr(db, "MIGRATIONS", db.MIGRATIONS + [["CREATE TABLE extra(x)", "SELECT nope"]])
+    with pytest.raises(sqlite3.OperationalError):
+        db.migrate()
+    assert db.schema_version() == version
+    assert not db.get_conn().execute("SELECT 1 FROM sqlite_master WHERE name = 'extra'").fetchone()
+
+
+def test_text_filter_is_a_prefix_match(temp_db):
+    for rid, board, lot in (("r1", "LNA", "L7"), ("r2", "PA", "XL7"), ("r3", "LNA2", "Q")):
+        db.insert_run({"run_id": rid, "timestamp": f"20260101_00000{rid[1]}", "board_name": board, "lot": lot}, [])
+    assert {r.run_id for r in db.list_runs(text="LNA")} == {"r1", "r3"}
+    assert {r.run_id for r in db.list_runs(text="L7")} == {"r1"}
+    assert db.count_runs(text="%") == 0
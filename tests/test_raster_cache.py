@@ -0,0 +1,43 @@
+from PIL import Image, ImageDraw
+
+from core.pdf_renderer import GRID_COLOR, blank_canvas, render_background
+from core.raster_cache import RasterCache
+
+
+BLANK = {"type": "blank", "size": [64, 48], "grid": {"enabled": True, "size": 8}}
+
+
+def test_disk_tier_round_trip(tmp_path):
+    img = Image.new("RGB", (7, 5), (10, 20, 30))
+    RasterCache(tmp_path).put("ab" * 20, img)
+    got = RasterCache(tmp_path).get("ab" * 20)
+    assert got is not None and got.tobytes() == img.tobytes()
+
+
+def test_memory_tier_evicts_to_budget(tmp_path):
+    cache = RasterCache(tmp_path, max_memory_bytes=2 * 10 * 10 * 3)
+    for k in "abc":
+        cache.put(k * 40, Image.new("RGB", (10, 10)), disk=False)
+    assert not cache.contains("a" * 40)
+    assert cache.contains("b" * 40) and cache.contains("c" * 40)
+
+
+def test_rendered_images_can_be_drawn_on(tmp_path):
+    cache = RasterCache(tmp_path)
+    first = render_background(BLANK, cache=cache)
+    ImageDraw.Draw(first).rectangle((0, 0, 63, 47), fill="red")
+    second = render_background(BLANK, cache=cache)
+    assert second is not first
+    assert second.getpixel((1, 1)) == (255, 255, 255)
+
+
+def test_blank_canvas_grid():
+    img = blank_canvas(20, 10, 4, "#ff0000")
+    assert img.size == (20, 10)
+    assert img.getpixel((4, 1)) == (255, 0, 0) and img.getpixel((1, 4)) == (255, 0, 0)
+    assert img.getpixel((1, 1)) == (255, 255, 255)
+
+
+def test_invalid_grid_color_falls_back():
+    for color in ("not-a-color", None):
+        assert blank_canvas(8, 8, 4, color).tobytes() == blank_canvas(8, 8, 4, GRID_COLOR).tobytes()
@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+import pytest
+
+from core import db, rfmask
+from core.sparams import Network
+from core.validation import FAIL, PASS
+
+
+def _network(path, s21):
+    f = np.linspace(1e9, 2e9, len(s21))
+    s = np.full((len(f), 2, 2), 0.1 + 0j)
+    s[:, 1, 0] = s21
+    return Network(f, s, 50.0, path)
+
+
+MASK = rfmask.Mask.from_dict({"name": "LNA", "bands": [
+    {"name": "gain", "trace": "S21", "start": 1.0, "stop": 2.0, "lower": -20},
+    {"name": "match", "trace": "S11", "start": 1.0, "stop": 2.0, "upper": -10},
+]})
+
+
+def test_zero_s_parameter_gives_finite_failing_margin():
+    s21 = np.ones(11, dtype=complex); s21[5] = 0
+    res = MASK.evaluate(_network("dut0.s2p", s21))
+    gain = res[0]
+    assert gain.status == FAIL
+    assert math.isfinite(gain.margin) and gain.margin < 0
+    assert gain.worst_f == pytest.approx(1.5e9)
+    assert res[1].status == PASS
+
+
+def test_zero_s_parameter_run_can_be_logged(temp_db):
+    s21 = np.ones(11, dtype=complex); s21[0] = 0
+    nets = [_network("dut0.s2p", s21), _network("dut1.s2p", np.ones(11, dtype=complex))]
+    stats = db.insert_runs(list(rfmask.run_records(nets, MASK, "20260101_000000", "LNA")))
+    assert stats.runs == 2
+    rows = {(m.run_id, m.field_id): m for m in db.measurements_for_runs([r.run_id for r in db.list_runs()])}
+    bad = rows[("20260101_000000_LNA_dut0", "gain")]
+    assert bad.status == FAIL and math.isfinite(bad.value_num)
+    assert db.load_sweep("20260101_000000_LNA_dut0", "dut0.s2p").s[0, 1, 0] == 0
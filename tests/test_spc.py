@@ -0,0 +1,85 @@
+import statistics
+
+import pytest
+
+from core import db, spc
+from core.layout import Field
+from core.validation import compile_rules
+
+
+VALUES = {("A", "L1"): ["1.0", "1.2", "0.9"], ("A", "L2"): ["1.1", "1.4"], ("B", "L1"): ["5", "7"]}
+
+
+def _meta(i, board, lot):
+    return {"run_id": f"{board}{lot}_{i}", "timestamp": f"20260101_{i:06d}", "board_name": board, "lot": lot}
+
+
+def _log_all():
+    # half of the runs one at a time, the rest through one batch
+    items = []
+    for (board, lot), vals in VALUES.items():
+        for i, v in enumerate(vals):
+            rows = [{"field_id": "V", "value": v, "unit": "V", "status": "pass" if float(v) < 1.3 else "fail"},
+                    {"field_id": "T", "value": "n/a"}, {"field_id": "X", "value": "inf", "unit": "V"}]
+            items.append((_meta(i, board, lot), rows))
+    for meta, rows in items[::2]: db.insert_run(meta, rows)
+    db.insert_runs(items[1::2])
+
+
+def _table():
+    return sorted(db.get_conn().execute(f"SELECT {spc.SPC_COLS} FROM spc_stats").fetchall())
+
+
+def test_incremental_stats_match_rebuild(temp_db):
+    _log_all()
+    incremental = _table()
+    with db.get_conn() as conn:
+        db.rebuild_spc_stats(conn)
+    rebuilt = _table()
+    assert len(incremental) == len(rebuilt) == 3   # no rows for text or non-finite values
+    for a, b in zip(incremental, rebuilt):
+        assert a[:5] == pytest.approx(b[:5]) and a[5] == pytest.approx(b[5], abs=1e-12)
+        assert a[6:] == b[6:]
+
+
+def test_merged_lots_match_direct_statistics(temp_db):
+    _log_all()
+    s = spc.field_summary("A", "V")
+    vals = [float(v) for v in VALUES[("A", "L1")] + VALUES[("A", "L2")]]
+    assert (s.n, s.lot, s.minimum, s.maximum) == (5, "", 0.9, 1.4)
+    assert s.mean == pytest.approx(statistics.mean(vals))
+    assert s.std == pytest.approx(statistics.stdev(vals))
+    assert (s.n_pass, s.n_fail, s.yield_pct) == (4, 1, 80.0)
+    assert [p.lot for p in spc.lot_summaries("A", "V")] == ["L1", "L2"]
+    (b,) = spc.board_summaries("B")
+    assert (b.field_id, b.n, b.mean) == ("V", 2, 6.0)
+    assert spc.field_summary("A", "V", lots=["L2"]).n == 2
+    assert spc.field_summary("C", "V") is None
+
+
+def test_merge_with_empty_part():
+    a = spc.Summary("A", "L1", "V", 2, 1.0, 0.5, 0.5, 1.5, 2, 0, "t1", "t2")
+    empty = spc.Summary("A", "L2", "V", 0, None, 0.0, None, None, 0, 0, None, None)
+    assert spc.merge(a, empty) == a and spc.merge(empty, a) == a
+
+
+def test_limits_and_cpk(monkeypatch):
+    s = spc.Summary("A", "", "V", 3, 10.0, 2.0, 9.0, 11.0, 3, 0, None, None)   # std 1
+    assert spc.control_limits(s) == (7.0, 10.0, 13.0)
+    assert spc.cpk(s, 7.0, 16.0) == pytest.approx(1.0)
+    assert spc.cpk(s, None, 16.0) == pytest.approx(2.0)
+    assert spc.cpk(s, None, None) is None
+    # Cpk does not follow the control-limit multiplier
+    monkeypatch.setattr(spc, "SIGMA", 2.0)
+    assert spc.cpk(s, 7.0, 16.0) == pytest.approx(1.0)
+    single = s._replace(n=1, m2=0.0)
+    assert spc.control_limits(single) is None and spc.cpk(single, 0.0, 1.0) is None
+
+
+def test_capability_uses_si_spec_limits(temp_db):
+    _log_all()
+    rules = compile_rules([Field("V", validation={"target": 1100, "lower_abs": -300, "upper_abs": 300},
+                                 default_unit="mV", units=["mV"])])
+    s = spc.field_summary("A", "V")
+    assert spc.spec_limits(rules, "V") == pytest.approx((0.8, 1.4))
+    assert spc.capability("A", "V", rules) == pytest.approx(min(1.4 - s.mean, s.mean - 0.8) / (3 * s.std))
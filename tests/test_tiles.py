@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from core.tiles import ZOOM_STEPS, TilePyramid, next_zoom
+
+
+def _page(w=700, h=500):
+    arr = np.random.default_rng(0).integers(0, 255, (h, w, 3), dtype=np.uint8)
+    return Image.fromarray(arr, "RGB")
+
+
+def _assemble(p, zoom):
+    w, h = p.size_at(zoom)
+    out = Image.new("RGB", (w, h))
+    for c, r in p.visible_tiles(zoom, 0, 0, w - 1, h - 1):
+        out.paste(p.tile(zoom, c, r), (c * p.tile_size, r * p.tile_size))
+    return out
+
+
+def test_zoom_one_tiles_reassemble_the_page():
+    base = _page()
+    p = TilePyramid(base, tile_size=128)
+    assert p.grid_at(1.0) == (6, 4)
+    assert _assemble(p, 1.0).tobytes() == base.tobytes()
+
+
+@pytest.mark.parametrize("zoom", [0.125, 0.3, 0.75, 1.5, 3.0])
+def test_tiles_cover_the_zoomed_page(zoom):
+    p = TilePyramid(_page(), tile_size=128)
+    w, h = p.size_at(zoom); cols, rows = p.grid_at(zoom)
+    assert p.tile(zoom, 0, 0).size == (min(128, w), min(128, h))
+    assert p.tile(zoom, cols - 1, rows - 1).size == (w - 128 * (cols - 1), h - 128 * (rows - 1))
+    # a uniform page stays uniform at every level
+    flat = TilePyramid(Image.new("RGB", (700, 500), (10, 20, 30)), tile_size=128)
+    assert np.all(np.asarray(flat.tile(zoom, 0, 0)) == (10, 20, 30))
+
+
+def test_visible_tiles_are_clipped_to_the_page():
+    p = TilePyramid(_page(), tile_size=128)
+    assert list(p.visible_tiles(1.0, -500, -500, 10, 10)) == [(0, 0)]
+    assert list(p.visible_tiles(1.0, 650, 450, 5000, 5000)) == [(5, 3)]
+    assert len(list(p.visible_tiles(1.0, 130, 0, 300, 10))) == 2
+
+
+def test_tile_cache_is_bounded():
+    p = TilePyramid(_page(), tile_size=64, max_tiles=5)
+    first = p.tile(1.0, 0, 0)
+    assert p.tile(1.0, 0, 0) is first
+    for c in range(8): p.tile(1.0, c, 1)
+    assert len(p._tiles) == 5 and p.tile(1.0, 0, 0) is not first
+
+
+def test_next_zoom_steps_and_clamps():
+    assert next_zoom(1.0, 1) == 1.5 and next_zoom(1.0, -1) == 0.75
+    assert next_zoom(1.2, 1) == 1.5 and next_zoom(1.2, -1) == 1.0
+    assert next_zoom(ZOOM_STEPS[-1], 1) == ZOOM_STEPS[-1] and next_zoom(ZOOM_STEPS[0], -1) == ZOOM_STEPS[0]
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from core import touchstone
+from core.touchstone import TouchstoneError, read_touchstone
+
+
+def _write(tmp_path, name, text):
+    p = tmp_path / name; p.write_text(text)
+    return str(p)
+
+
+S2P_RI = """! comment line
+# MHz S RI R 50
+100 0.1 0.0  0.9 0.1  0.01 0.0  0.2 -0.1   ! S11 S21 S12 S22
+200 0.2 0.0  0.8 0.2  0.02 0.0  0.3 -0.2
+"""
+
+
+def test_two_port_v1_order(tmp_path):
+    net = read_touchstone(_write(tmp_path, "a.s2p", S2P_RI))
+    assert net.f.tolist() == [100e6, 200e6] and net.z0 == 50.0
+    assert net.s[0, 0, 0] == 0.1 and net.s[0, 1, 0] == 0.9 + 0.1j
+    assert net.s[0, 0, 1] == 0.01 and net.s[1, 1, 1] == 0.3 - 0.2j
+
+
+def test_formats_agree(tmp_path):
+    s21 = 0.5 * np.exp(1j * np.deg2rad(30))
+    ma = read_touchstone(_write(tmp_path, "ma.s1p", "# GHz S MA\n1 0.5 30\n"))
+    db = read_touchstone(_write(tmp_path, "db.s1p", f"# GHz S DB R 75\n1 {20 * np.log10(0.5)} 30\n"))
+    ri = read_touchstone(_write(tmp_path, "ri.s1p", f"# GHz S RI\n1 {s21.real} {s21.imag}\n"))
+    for net in (ma, db, ri):
+        assert net.s[0, 0, 0] == pytest.approx(s21)
+    assert db.z0 == 75.0 and ma.f[0] == 1e9
+
+
+def test_defaults_without_option_line(tmp_path):
+    net = read_touchstone(_write(tmp_path, "d.s1p", "2 1 90\n"))
+    assert net.f[0] == 2e9 and net.s[0, 0, 0] == pytest.approx(1j)
+
+
+def test_v1_noise_section_is_skipped(tmp_path):
+    text = S2P_RI + "! noise\n100 1.5 0.5 45 0.3\n200 1.6 0.5 50 0.3\n"
+    assert read_touchstone(_write(tmp_path, "n.s2p", text)).n_points == 2
+
+
+def test_multi_line_rows_and_chunks(tmp_path, monkeypatch):
+    # 3-port rows wrap over lines; rows are row-major (S11 S12 S13 S21 ...)
+    monkeypatch.setattr(touchstone, "CHUNK_LINES", 2)
+    lines = ["# Hz S RI"]
+    for k in range(5):
+        vals = [f"{10 * i + j + k} 0" for i in range(3) for j in range(3)]
+        lines += [f"{k + 1} " + " ".join(vals[:3]), " ".join(vals[3:6]), " ".join(vals[6:])]
+    net = read_touchstone(_write(tmp_path, "c.s3p", "\n".join(lines)))
+    assert net.n_ports == 3 and net.n_points == 5
+    assert net.s[4, 1, 2].real == 12 + 4 and net.s[0, 2, 0].real == 20
+
+
+def test_v2_keywords(tmp_path):
+    text = """[Version] 2.0
+# GHz S MA R 50
+[Number of Ports] 2
+[Two-Port Data Order] 12_21
+[Number of Frequencies] 1
+[Reference] 50 50
+[Network Data]
+1 0.1 0 0.2 0 0.9 0 0.3 0
+[Noise Data]
+1 1.5 0.5 45 0.3
+[End]
+"""
+    net = read_touchstone(_write(tmp_path, "v2.ts", text))
+    assert net.n_points == 1
+    assert net.s[0, 0, 1] == 0.2 and net.s[0, 1, 0] == 0.9
+
+
+@pytest.mark.parametrize("name, text, match", [
+    ("z.s1p", "# GHz Z RI\n1 1 0\n", "only S-parameter"),
+    ("a.s2p", "# GHz S RI\n1 0 0 0 0 0 0 0\n", "not a multiple"),
+    ("a.txt", "# GHz S RI\n1 0 0\n", "number of ports"),
+    ("e.s2p", "! empty\n# GHz S RI\n", "no network data"),
+    ("m.ts", "[Version] 2.0\n[Number of Ports] 2\n[Matrix Format] Lower\n", "Matrix Format"),
+])
+def test_errors(tmp_path, name, text, match):
+    with pytest.raises(TouchstoneError, match=match):
+        read_touchstone(_write(tmp_path, name, text))
+
+
+def test_port_count_argument_overrides_extension(tmp_path):
+    net = read_touchstone(_write(tmp_path, "x.txt", "# GHz S RI\n1 1 0 0 0 0 0 1 0\n"), n_ports=2)
+    assert net.n_ports == 2
@@ -0,0 +1,26 @@
+import pytest
+
+from core.validation import unit_scale
+
+
+@pytest.mark.parametrize("unit, expected", [
+    ("kΩ", (1e3, "Ω")), ("µH", (1e-6, "H")), ("mV", (1e-3, "V")), ("GHz", (1e9, "Hz")),
+    ("mm", (1e-3, "m")), ("m", (1.0, "m")), ("", (1.0, "")),
+])
+def test_prefixed_units(unit, expected):
+    scale, base = unit_scale(unit)
+    assert scale == pytest.approx(expected[0]) and base == expected[1]
+
+
+@pytest.mark.parametrize("unit", ["ppm", "psi", "min", "mil", "dB", "dBm", "%", "pcs"])
+def test_units_that_only_look_prefixed(unit):
+    assert unit_scale(unit) == (1.0, unit)
+
+
+@pytest.mark.parametrize("unit, expected", [
+    ("kΩ", (1e3, "Ω")), ("K", (1.0, "K")), ("mK", (1e-3, "K")), ("kK", (1e3, "K")), ("KΩ", (1.0, "KΩ")),
+])
+def test_kilo_prefix_is_lower_case_only(unit, expected):
+    # "K" is kelvin, never the kilo prefix
+    scale, base = unit_scale(unit)
+    assert scale == pytest.approx(expected[0]) and base == expected[1]
@@ -1,10 +1,39 @@
+import os
 import tkinter as tk
 from tkinter import ttk, filedialog
+from core.pdf_session import get_session
+from core.render_worker import BackgroundRenderer
+
+PATH_DEBOUNCE_MS = 300
+PAGE_DEBOUNCE_MS = 400
+POLL_MS = 50
+
+
+def _page_count(path):
+    # worker thread: None unless path is a readable PDF
+    if not path.lower().endswith(".pdf") or not os.path.isfile(path):
+        return None
+    try: return get_session(path).page_count
+    except Exception: return None
+
+
+def _prefetch(path, page, dpi):
+    if path.lower().endswith(".pdf") and os.path.isfile(path):
+        get_session(path).prefetch([page], dpi)
+
 
 class CanvasDialog:
-    def __init__(self, root, canvas_cfg):
+    # Page-count lookups and prefetches run on the background renderer's pool:
+    # pdfinfo (or a stat on a slow share) must not block typing in the dialog.
+    def __init__(self, root, canvas_cfg, renderer=None):
         self.root = root
         self.result = None
+        self._own_renderer = renderer is None
+        self._renderer = renderer or BackgroundRenderer(max_workers=1)
+        self._path_after = None      # pending debounced lookup
+        self._page_after = None      # pending debounced prefetch
+        self._poll_after = None
+        self._lookup = None          # (path, Future) of the latest lookup
         self.cfg = dict(canvas_cfg or {})
         if "type" not in self.cfg: self.cfg["type"] = "pdf"
         self.win = tk.Toplevel(root); self.win.title("Canvas Settings"); self.win.transient(root); self.win.grab_set()
@@ -24,7 +53,11 @@ class CanvasDialog:
 
         ttk.Label(frm, text="PDF page index").grid(row=2, column=0, sticky="w")
         self.var_page = tk.IntVar(value=int(self.cfg.get("page",0)))
-        ttk.Entry(frm, textvariable=self.var_page).grid(row=2, column=1, sticky="ew", padx=6, pady=4)
+        row2 = ttk.Frame(frm); row2.grid(row=2, column=1, sticky="ew", padx=6, pady=4)
+        self.spin_page = ttk.Spinbox(row2, textvariable=self.var_page, from_=0, to=9999, width=8); self.spin_page.pack(side=tk.LEFT)
+        self.lbl_pages = ttk.Label(row2, text=""); self.lbl_pages.pack(side=tk.LEFT, padx=6)
+        self.var_path.trace_add("write", lambda *a: self._schedule_path())
+        self.var_page.trace_add("write", lambda *a: self._schedule_prefetch())
 
         ttk.Label(frm, text="DPI (pdf/image)").grid(row=3, column=0, sticky="w")
         self.var_dpi = tk.IntVar(value=int(self.cfg.get("dpi",144)))
@@ -44,6 +77,7 @@ class CanvasDialog:
         ttk.Button(btns, text="OK", command=self._ok).pack(side=tk.RIGHT)
 
         frm.columnconfigure(1, weight=1); self._on_type()
+        self.win.bind("<Destroy>", self._on_destroy)
 
     def _on_type(self):
         t = self.var_type.get()
@@ -51,6 +85,65 @@ class CanvasDialog:
         for w in self.ent_path.master.winfo_children():
             try: w.configure(state=en)
             except: pass
+        self._schedule_path()
+
+    def _pdf_path(self):
+        p = self.var_path.get().strip()
+        return p if self.var_type.get() == "pdf" and p else None
+
+    def _schedule_path(self):
+        # debounce: look the path up once typing pauses
+        if self._path_after is not None: self.win.after_cancel(self._path_after)
+        self._path_after = self.win.after(PATH_DEBOUNCE_MS, self._on_path)
+
+    def _on_path(self):
+        self._path_after = None
+        p = self._pdf_path()
+        if p is None:
+            self._lookup = None; self._show_pages(None); return
+        self._lookup = (p, self._renderer.run_task(_page_count, p))
+        if self._poll_after is None: self._poll_lookup()
+
+    def _poll_lookup(self):
+        self._poll_after = None
+        if self._lookup is None: return
+        p, fut = self._lookup
+        if not fut.done():
+            self._poll_after = self.win.after(POLL_MS, self._poll_lookup); return
+        self._lookup = None
+        if p == self._pdf_path():   # drop results for a path no longer shown
+            self._show_pages(fut.result())
+            self._prefetch_page()
+
+    def _show_pages(self, n):
+        if not n:
+            self.lbl_pages.configure(text=""); self.spin_page.configure(to=9999); return
+        self.spin_page.configure(to=max(0, n-1))
+        self.lbl_pages.configure(text=f"of {n} (0–{n-1})")
+
+    def _schedule_prefetch(self):
+        # debounce: stepping through pages with the spinbox only prefetches the
+        # page it stops on, not every page passed on the way
+        if self._page_after is not None: self.win.after_cancel(self._page_after)
+        self._page_after = self.win.after(PAGE_DEBOUNCE_MS, self._prefetch_page)
+
+    def _prefetch_page(self):
+        # Start rasterising the chosen page while the dialog is still open so OK
+        # usually finds it in the raster cache.
+        self._page_after = None
+        p = self._pdf_path()
+        if not p: return
+        try: self._renderer.run_task(_prefetch, p, int(self.var_page.get()), int(self.var_dpi.get()))
+        except (tk.TclError, ValueError): pass
+
+    def _on_destroy(self, event):
+        if event.widget is not self.win: return
+        for aid in (self._path_after, self._page_after, self._poll_after):
+            if aid is not None:
+                try: self.win.after_cancel(aid)
+                except tk.TclError: pass
+        self._path_after = self._page_after = self._poll_after = self._lookup = None
+        if self._own_renderer: self._renderer.shutdown()
 
     def _browse(self):
         from tkinter import filedialog
@@ -70,7 +163,7 @@ class CanvasDialog:
             out["path"] = self.var_path.get().strip()
             out["dpi"] = int(self.var_dpi.get())
         if t == "pdf":
-            out["page"] = int(self.var_page.get())
+            out["page"] = max(0, int(self.var_page.get()))
         if t == "blank":
             try:
                 w,h = [int(v.strip()) for v in self.var_size.get().split(",")]
@@ -1,7 +1,18 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from typing import List, Dict
 from core import db
+from core.compare import CompareEngine, ID_COLS
+from core.export import ExportJob
+from ui.virtual_grid import VirtualGrid
+
+RUN_PAGE = 200          # runs fetched per page while scrolling the run list
+FILTER_DELAY_MS = 200   # debounce for the run filter box
+EXPORT_POLL_MS = 100
+
+BASELINE_BG = "#E3F2FD"
+DIFF_BG = "#FFF59D"
+
 
 class HistoryCompareWindow(tk.Toplevel):
     def __init__(self, root):
@@ -13,96 +24,148 @@ class HistoryCompareWindow(tk.Toplevel):
 
         left = ttk.Frame(self, padding=10); left.pack(side=tk.LEFT, fill=tk.Y)
         ttk.Label(left, text="Select runs to compare").pack(anchor="w")
-        self.run_list = tk.Listbox(left, selectmode=tk.EXTENDED, height=20, width=40)
-        self.run_list.pack(fill=tk.BOTH, expand=False, pady=(4,8))
+        self.filter_var = tk.StringVar()
+        ttk.Entry(left, textvariable=self.filter_var, width=40).pack(fill=tk.X, pady=(4,0))
+        self.count_label = ttk.Label(left, text="", foreground="#666")
+        self.count_label.pack(anchor="w")
+
+        lst = ttk.Frame(left); lst.pack(fill=tk.BOTH, expand=True, pady=(4,8))
+        cols = ("timestamp", "board", "lot", "dut")
+        self.run_list = ttk.Treeview(lst, columns=cols, show="headings", selectmode="extended", height=20)
+        for c, w in zip(cols, (130, 110, 60, 60)):
+            self.run_list.heading(c, text=c.title()); self.run_list.column(c, width=w, stretch=(c == "board"))
+        ys = ttk.Scrollbar(lst, orient="vertical", command=self.run_list.yview)
+        self.run_list.configure(yscrollcommand=lambda *a: (ys.set(*a), self._maybe_load_more(*a)))
+        self.run_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True); ys.pack(side=tk.RIGHT, fill=tk.Y)
 
         btns = ttk.Frame(left); btns.pack(anchor="w", pady=(4,8))
-        ttk.Button(btns, text="Refresh", command=self.load_runs).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btns, text="Refresh", command=self.refresh).pack(side=tk.LEFT, padx=2)
         ttk.Button(btns, text="Compare ▶", command=self.compare_selected).pack(side=tk.LEFT, padx=2)
+        self.export_btn = ttk.Button(btns, text="Export…", command=self.export_selected)
+        self.export_btn.pack(side=tk.LEFT, padx=2)
         self.only_diff_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(left, text="Show only differences", variable=self.only_diff_var, command=self.compare_selected).pack(anchor="w", pady=(6,0))
-        note = "Tip: first selected run is the baseline; differing cells are highlighted."
-        ttk.Label(left, text=note).pack(anchor="w", pady=(10,0))
-
-        right = ttk.Frame(self); right.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.canvas = tk.Canvas(right, background="#1e1e1e"); self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.scrollbar_y = ttk.Scrollbar(right, orient="vertical", command=self.canvas.yview); self.scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
-        self.scrollbar_x = ttk.Scrollbar(self, orient="horizontal", command=self.canvas.xview); self.scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
-        self.canvas.configure(yscrollcommand=self.scrollbar_y.set, xscrollcommand=self.scrollbar_x.set)
-
-        self.grid_frame = ttk.Frame(self.canvas)
-        self.canvas_window = self.canvas.create_window((0,0), window=self.grid_frame, anchor="nw")
-        self.grid_frame.bind("<Configure>", self._on_frame_configure)
-        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        ttk.Checkbutton(left, text="Show only differences", variable=self.only_diff_var, command=self._show_comparison).pack(anchor="w", pady=(6,0))
+        note = ("Filter matches the start of run id, board, lot or DUT (case-sensitive).\n"
+                "Tip: first selected run is the baseline; differing cells are highlighted.")
+        ttk.Label(left, text=note, wraplength=300).pack(anchor="w", pady=(10,0))
+        self.export_bar = ttk.Progressbar(left, mode="determinate")
+        self.export_label = ttk.Label(left, text="")
+
+        self.grid_view = VirtualGrid(self)
+        self.grid_view.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self._loaded = 0
+        self._total = 0
+        self._loading = False
+        self._filter_job = None
+        self.engine = CompareEngine()
+        self.comparison = None
+        self._export_job = None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.filter_var.trace_add("write", self._on_filter)
 
         self.load_runs()
 
-    def _on_frame_configure(self, event):
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+    def refresh(self):
+        self.engine.invalidate()
+        self.load_runs()
 
-    def _on_canvas_configure(self, event):
-        self.canvas.itemconfig(self.canvas_window, width=event.width)
+    # ----- run list -----
+    def _on_filter(self, *_):
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(FILTER_DELAY_MS, self.load_runs)
 
     def load_runs(self):
-        self.run_list.delete(0, tk.END)
+        # First page only; further pages are fetched as the list is scrolled.
+        self._filter_job = None
+        self.run_list.delete(*self.run_list.get_children())
+        self._loaded = 0
         try:
-            with db.get_conn() as conn:
-                cur = conn.cursor()
-                cur.execute("SELECT run_id, timestamp, board_name, lot, dut_id FROM runs ORDER BY timestamp DESC")
-                self._rows = cur.fetchall()
-                for run_id, ts, board, lot, dut in self._rows:
-                    label = f"{ts} | {board} | lot:{lot} | dut:{dut} | {run_id}"
-                    self.run_list.insert(tk.END, label)
+            self._total = db.count_runs(text=self.filter_var.get().strip() or None)
+        except Exception as e:
+            messagebox.showerror("SQLite", f"Failed to load runs:\n{e}"); return
+        self._load_page()
+
+    def _load_page(self):
+        if self._loading or self._loaded >= self._total: return
+        self._loading = True
+        try:
+            rows = db.list_runs(text=self.filter_var.get().strip() or None, limit=RUN_PAGE, offset=self._loaded)
+            for r in rows:
+                if not self.run_list.exists(r.run_id):
+                    self.run_list.insert("", tk.END, iid=r.run_id, values=(r.timestamp, r.board_name, r.lot, r.dut_id))
+            self._loaded += len(rows)
+            if not rows: self._total = self._loaded
         except Exception as e:
             messagebox.showerror("SQLite", f"Failed to load runs:\n{e}")
+        finally:
+            self._loading = False
+        self.count_label.configure(text=f"{self._loaded} of {self._total} runs")
 
-    def compare_selected(self):
-        for child in self.grid_frame.winfo_children(): child.destroy()
-        sel = self.run_list.curselection()
-        if not sel: return
-        labels = [f"{ts} | {board} | lot:{lot} | dut:{dut} | {run_id}" for run_id, ts, board, lot, dut in self._rows]
-        run_ids = [labels[i].split("|")[-1].strip() for i in sel]
+    def _maybe_load_more(self, first, last):
+        if float(last) > 0.9 and self._loaded < self._total:
+            self.after_idle(self._load_page)
 
+    # ----- compare -----
+    def compare_selected(self):
+        # Loads every measurement of the selected runs at once: the grid draws
+        # only the visible cells, but the comparison table is built in full, so
+        # memory grows with fields x runs selected.
+        run_ids = list(self.run_list.selection())
+        if not run_ids:
+            self.comparison = None; self.grid_view.clear(); return
         try:
-            with db.get_conn() as conn:
-                cur = conn.cursor()
-                q_marks = ",".join("?" for _ in run_ids)
-                cur.execute(f"SELECT m.run_id, m.field_id, m.label, m.value, m.unit FROM measurements m WHERE m.run_id IN ({q_marks})", run_ids)
-                data = cur.fetchall()
+            self.comparison = self.engine.compare(run_ids)
         except Exception as e:
             messagebox.showerror("SQLite", f"Failed to load measurements:\n{e}")
             return
-
-        pivot = {}
-        for rid, fid, label, value, unit in data:
-            pivot.setdefault(fid, {"label": label or fid})
-            display = f"{value}" if not unit else f"{value} {unit}"
-            pivot[fid][rid] = display
-
-        baseline = run_ids[0]
-        header_font = ("Arial", 10, "bold")
-        ttk.Label(self.grid_frame, text="Field ID", font=header_font).grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
-        ttk.Label(self.grid_frame, text="Label", font=header_font).grid(row=0, column=1, sticky="nsew", padx=2, pady=2)
-        col_offset = 2
-        for j, rid in enumerate(run_ids):
-            ttk.Label(self.grid_frame, text=rid, font=header_font).grid(row=0, column=col_offset + j, sticky="nsew", padx=2, pady=2)
-
-        row = 1
-        for fid in sorted(pivot.keys(), key=lambda s: s.lower()):
-            base_val = pivot[fid].get(baseline, "")
-            values = [pivot[fid].get(rid, "") for rid in run_ids]
-            if self.only_diff_var.get() and all(v == base_val for v in values):
-                continue
-
-            ttk.Label(self.grid_frame, text=fid).grid(row=row, column=0, sticky="nsew", padx=2, pady=1)
-            ttk.Label(self.grid_frame, text=pivot[fid]["label"]).grid(row=row, column=1, sticky="nsew", padx=2, pady=1)
-
-            for j, val in enumerate(values):
-                cell = tk.Label(self.grid_frame, text=val, anchor="w", padx=6, pady=2)
-                cell.grid(row=row, column=col_offset + j, sticky="nsew", padx=2, pady=1)
-                if j == 0: cell.configure(bg="#E3F2FD")
-                elif val != base_val: cell.configure(bg="#FFF59D")
-            row += 1
-
-        for c in range(col_offset + len(run_ids)):
-            self.grid_frame.grid_columnconfigure(c, weight=1)
+        self._show_comparison()
+
+    def _show_comparison(self):
+        # Re-filters the cached comparison; no query.
+        if self.comparison is None: return
+        columns, rows, diff = self.comparison.table(only_diff=self.only_diff_var.get())
+        col_offset = len(ID_COLS)
+
+        def cell_bg(r: int, c: int):
+            if c == col_offset: return BASELINE_BG
+            if c > col_offset and diff[r, c - col_offset]: return DIFF_BG
+            return None
+
+        self.grid_view.set_data(columns, rows, cell_bg)
+
+    # ----- export -----
+    def export_selected(self):
+        # Streams the selected runs from SQLite to a file on a worker thread.
+        run_ids = list(self.run_list.selection())
+        if not run_ids:
+            messagebox.showinfo("Export", "Select one or more runs first.", parent=self); return
+        path = filedialog.asksaveasfilename(parent=self, title="Export runs", defaultextension=".xlsx",
+                                            initialfile=f"history_{len(run_ids)}_runs.xlsx",
+                                            filetypes=[("Excel","*.xlsx"), ("CSV","*.csv"), ("Parquet","*.parquet")])
+        if not path: return
+        self._export_job = ExportJob(path, run_ids).start()
+        self.export_btn.configure(state=tk.DISABLED)
+        self.export_bar.configure(value=0, maximum=1)
+        self.export_bar.pack(fill=tk.X, pady=(10,0)); self.export_label.pack(anchor="w")
+        self.after(EXPORT_POLL_MS, self._poll_export)
+
+    def _poll_export(self):
+        job = self._export_job
+        if job is None: return
+        self.export_bar.configure(maximum=max(job.total, 1), value=job.done)
+        self.export_label.configure(text=f"Exporting… {job.done:,} / {job.total:,} rows")
+        if not job.finished:
+            self.after(EXPORT_POLL_MS, self._poll_export); return
+        self._export_job = None
+        self.export_btn.configure(state=tk.NORMAL)
+        self.export_bar.pack_forget(); self.export_label.pack_forget()
+        if job.error is not None:
+            messagebox.showerror("Export", f"Export failed:\n{job.error}", parent=self)
+        elif not job.cancelled:
+            messagebox.showinfo("Export", f"Exported {job.done:,} rows to:\n{job.path}", parent=self)
+
+    def _on_close(self):
+        if self._export_job is not None: self._export_job.cancel()
+        self.destroy()
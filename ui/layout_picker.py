@@ -1,8 +1,32 @@
-import os
+import queue
 import tkinter as tk
 from tkinter import ttk
+from PIL import ImageTk
+
+from core.catalog import LayoutCatalog, ThumbnailCache, THUMB_SIZE, search
+
+THUMB_POLL_MS = 50
+WARM_DELAY_MS = 150   # scrolling settles before visible rows are queued
+
+_thumbs = None
+
+
+def thumbnail_cache() -> ThumbnailCache:
+    # shared across pickers so thumbnails rendered once stay in memory
+    global _thumbs
+    if _thumbs is None:
+        _thumbs = ThumbnailCache()
+    return _thumbs
+
 
 class LayoutPicker(tk.Toplevel):
+    # Layouts come from the catalog index, so opening the picker only stats
+    # the files. Typing filters on file name, board name and canvas type;
+    # thumbnails are rendered for the rows in view, arrive from the worker and
+    # are shown for the selected row.
+    COLUMNS = (("name", "File", 200), ("board", "Board", 140), ("fields", "Fields", 60),
+               ("canvas", "Canvas", 70), ("schema", "Schema", 60))
+
     def __init__(self, root, layouts_dir: str):
         super().__init__(root)
         self.title("Select Layout")
@@ -10,38 +34,136 @@ class LayoutPicker(tk.Toplevel):
         self.grab_set()
         self.result = None
         self.layouts_dir = layouts_dir
+        self.catalog = LayoutCatalog(layouts_dir)
+        self.thumbs = thumbnail_cache()
+        self._thumb_queue = queue.Queue()
+        self._photo = None
+        self._warm_id = None
+        self.entries = []
+        self._by_iid = {}
 
         frm = ttk.Frame(self, padding=10)
         frm.pack(fill=tk.BOTH, expand=True)
 
-        ttk.Label(frm, text="Choose a layout from: " + layouts_dir).pack(anchor="w", pady=(0,6))
+        ttk.Label(frm, text="Choose a layout from: " + layouts_dir).grid(row=0, column=0, columnspan=2, sticky="w", pady=(0,6))
+        self.search_var = tk.StringVar()
+        ent = ttk.Entry(frm, textvariable=self.search_var)
+        ent.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(0,6)); ent.focus_set()
+        self.search_var.trace_add("write", lambda *a: self._apply_filter())
+
+        self.tree = ttk.Treeview(frm, columns=[c[0] for c in self.COLUMNS], show="headings", selectmode="browse", height=14)
+        for cid, title, width in self.COLUMNS:
+            self.tree.heading(cid, text=title)
+            self.tree.column(cid, width=width, anchor="w" if cid in ("name", "board") else "center")
+        ys = ttk.Scrollbar(frm, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=lambda *a: (ys.set(*a), self._schedule_warm()))
+        self.tree.grid(row=2, column=0, sticky="nsew"); ys.grid(row=2, column=1, sticky="ns")
 
-        self.listbox = tk.Listbox(frm, selectmode=tk.SINGLE, height=14, width=48)
-        self.listbox.pack(fill=tk.BOTH, expand=True)
+        side = ttk.Frame(frm, padding=(10,0,0,0)); side.grid(row=2, column=2, sticky="n")
+        box = tk.Frame(side, width=THUMB_SIZE[0], height=THUMB_SIZE[1], bg="#2a2a2a")
+        box.pack_propagate(False); box.pack()
+        self.thumb_label = tk.Label(box, bg="#2a2a2a"); self.thumb_label.pack(expand=True)
+        self.info_var = tk.StringVar()
+        ttk.Label(side, textvariable=self.info_var, justify="left", wraplength=THUMB_SIZE[0]).pack(anchor="w", pady=(6,0))
 
-        btns = ttk.Frame(frm); btns.pack(anchor="e", pady=(8,0))
+        btns = ttk.Frame(frm); btns.grid(row=3, column=0, columnspan=3, sticky="e", pady=(8,0))
         ttk.Button(btns, text="Cancel", command=self._cancel).pack(side=tk.RIGHT, padx=4)
         ttk.Button(btns, text="Open", command=self._open).pack(side=tk.RIGHT)
+        frm.rowconfigure(2, weight=1); frm.columnconfigure(0, weight=1)
 
-        self.listbox.bind("<Double-Button-1>", lambda e: self._open())
+        self.tree.bind("<Double-Button-1>", lambda e: self._open())
+        self.tree.bind("<Return>", lambda e: self._open())
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._show_selected())
+        ent.bind("<Return>", lambda e: self._open())
+        ent.bind("<Down>", lambda e: self._focus_tree())
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
         self._load_items()
+        self._poll_id = self.after(THUMB_POLL_MS, self._poll_thumbs)
 
     def _load_items(self):
+        self.entries = self.catalog.scan()
+        self._apply_filter()
+
+    def _apply_filter(self):
+        self.tree.delete(*self.tree.get_children()); self._by_iid.clear()
+        for e in search(self.entries, self.search_var.get()):
+            iid = self.tree.insert("", tk.END, values=(e.name, e.board_name, e.n_fields if not e.error else "",
+                                                       e.canvas_type or ("error" if e.error else ""), e.schema_version))
+            self._by_iid[iid] = e
+        first = next(iter(self._by_iid), None)
+        if first: self.tree.selection_set(first)
+        else: self._show_entry(None)
+        self._schedule_warm()
+
+    def _schedule_warm(self):
+        if self._warm_id is not None: self.after_cancel(self._warm_id)
+        self._warm_id = self.after(WARM_DELAY_MS, self._warm_visible)
+
+    def _warm_visible(self):
+        # Only the rows in view are queued; rows scrolled past are dropped
+        # from the queue. The selected row stays first.
+        self._warm_id = None
+        kids = self.tree.get_children()
+        top, bottom = self.tree.yview()
+        lo, hi = int(top * len(kids)), min(len(kids), int(bottom * len(kids)) + 1)
+        self.thumbs.cancel_pending()
+        sel = self._selected()
+        if sel is not None and self.thumbs.get(sel) is None: self.thumbs.request(sel, self._on_thumb)
+        for iid in kids[lo:hi]:
+            e = self._by_iid.get(iid)
+            if e is not None and e is not sel and self.thumbs.get(e) is None: self.thumbs.request(e, self._on_thumb)
+
+    def _focus_tree(self):
+        self.tree.focus_set()
+        sel = self.tree.selection()
+        if sel: self.tree.focus(sel[0])
+
+    def _selected(self):
+        sel = self.tree.selection()
+        return self._by_iid.get(sel[0]) if sel else None
+
+    def _show_selected(self):
+        self._show_entry(self._selected())
+
+    def _show_entry(self, e):
+        if e is None:
+            self.info_var.set(""); self._set_thumb(None); return
+        self.info_var.set(f"Error: {e.error}" if e.error else
+                          f"{e.board_name or '—'}\n{e.n_fields} fields, {e.canvas_type or 'no'} canvas\n"
+                          f"{(e.canvas or {}).get('path', '')}")
+        img = self.thumbs.get(e)
+        self._set_thumb(img)
+        if img is None: self.thumbs.request(e, self._on_thumb, urgent=True)
+
+    def _set_thumb(self, img):
+        self._photo = ImageTk.PhotoImage(img) if img is not None else None
+        self.thumb_label.configure(image=self._photo or "")
+
+    def _on_thumb(self, entry, img):
+        # worker thread -> Tk thread
+        self._thumb_queue.put((entry, img))
+
+    def _poll_thumbs(self):
         try:
-            files = [f for f in os.listdir(self.layouts_dir) if f.lower().endswith(".json")]
-            files.sort()
-            for f in files:
-                self.listbox.insert(tk.END, f)
-        except Exception:
+            while True:
+                entry, img = self._thumb_queue.get_nowait()
+                if img is not None and entry is self._selected(): self._set_thumb(img)
+        except queue.Empty:
             pass
+        self._poll_id = self.after(THUMB_POLL_MS, self._poll_thumbs)
 
     def _open(self):
-        idx = self.listbox.curselection()
-        if not idx: return
-        name = self.listbox.get(idx[0])
-        self.result = os.path.join(self.layouts_dir, name)
-        self.destroy()
+        e = self._selected()
+        if e is None or e.error: return
+        self.result = e.path
+        self._close()
 
     def _cancel(self):
         self.result = None
+        self._close()
+
+    def _close(self):
+        self.thumbs.cancel_pending()
+        self.after_cancel(self._poll_id)
+        if self._warm_id is not None: self.after_cancel(self._warm_id)
         self.destroy()
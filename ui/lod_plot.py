@@ -0,0 +1,128 @@
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+import numpy as np
+
+from core.decimate import decimate, decimate_band
+
+
+class LODAxes:
+    # Level-of-detail traces on one matplotlib Axes. Full-resolution data is
+    # kept here; the artists only ever hold a min/max decimation of the visible
+    # x-range at about one bucket per pixel, recomputed when the x-limits or
+    # the axes size change. Artists are created once per key and updated with
+    # set_data. They are animated, so a data-only update restores the cached
+    # background and blits instead of redrawing ticks, grid and legend.
+    def __init__(self, ax, buckets_per_px: float = 1.0):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.buckets_per_px = buckets_per_px
+        self._lines: Dict[Hashable, List[Any]] = {}   # key -> [x, y, Line2D]
+        self._bands: Dict[Hashable, List[Any]] = {}   # key -> [x, lo, hi, PolyCollection, style]
+        self._background = None
+        # limits are set by autoscale() from the full data; matplotlib's own
+        # autoscaling would fit the decimated artists and re-enter _redecimate
+        ax.set_autoscale_on(False)
+        ax.callbacks.connect("xlim_changed", lambda ax: self._redecimate())
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.canvas.mpl_connect("resize_event", lambda e: self._redecimate())
+
+    # ----- traces -----
+    def line(self, key: Hashable, x, y, **style):
+        # Create or update a trace (x sorted ascending) and return its Line2D.
+        x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float)
+        xd, yd = decimate(x, y, self._buckets(), self._xlim())
+        ent = self._lines.get(key)
+        if ent is None:
+            (ln,) = self.ax.plot(xd, yd, animated=True, **style)
+            self._lines[key] = [x, y, ln]
+        else:
+            ent[0], ent[1] = x, y
+            ln = ent[2]; ln.set_data(xd, yd); ln.update(style)
+        return ln
+
+    def band(self, key: Hashable, x, lo, hi, **style):
+        # Filled region between lo and hi. PolyCollections cannot take new
+        # data in place, so the artist is rebuilt on each update.
+        x = np.asarray(x, dtype=float)
+        ent = self._bands.pop(key, None)
+        if ent is not None: ent[3].remove()
+        coll = self._fill(x, np.asarray(lo, dtype=float), np.asarray(hi, dtype=float), style)
+        self._bands[key] = [x, np.asarray(lo, dtype=float), np.asarray(hi, dtype=float), coll, style]
+        return coll
+
+    def retain(self, keys: Iterable[Hashable]):
+        # drop every trace and band whose key is not in keys
+        keep = set(keys)
+        for store, pos in ((self._lines, 2), (self._bands, 3)):
+            for k in [k for k in store if k not in keep]:
+                store.pop(k)[pos].remove()
+
+    def keys(self) -> List[Hashable]:
+        return list(self._lines) + list(self._bands)
+
+    # ----- limits / drawing -----
+    def autoscale(self) -> bool:
+        # Fit the axes to the full data (not just what is drawn) and report
+        # whether the limits changed.
+        before = (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()))
+        xs = [e[0] for e in self._lines.values()] + [e[0] for e in self._bands.values()]
+        ys = [e[1] for e in self._lines.values()] + [e[1] for e in self._bands.values()] + \
+             [e[2] for e in self._bands.values()]
+        xr = _finite_range(xs); yr = _finite_range(ys)
+        if xr is None or yr is None:
+            return False
+        pad = (yr[1] - yr[0]) * 0.05 or 1.0
+        self.ax.set_xlim(*xr)           # re-decimates through xlim_changed
+        self.ax.set_ylim(yr[0] - pad, yr[1] + pad)
+        return before != (tuple(self.ax.get_xlim()), tuple(self.ax.get_ylim()))
+
+    def refresh(self, full: bool = True):
+        # full=False repaints only the traces over the cached background
+        if full or self._background is None:
+            self.canvas.draw_idle(); return
+        self.canvas.restore_region(self._background)
+        for a in self._artists():
+            self.ax.draw_artist(a)
+        self.canvas.blit(self.ax.figure.bbox)
+        self.canvas.flush_events()
+
+    # ----- internals -----
+    def _buckets(self) -> int:
+        return max(int(self.ax.bbox.width * self.buckets_per_px), 1)
+
+    def _xlim(self) -> Optional[Tuple[float, float]]:
+        lo, hi = self.ax.get_xlim()
+        return (min(lo, hi), max(lo, hi))
+
+    def _fill(self, x, lo, hi, style):
+        xd, lod, hid = decimate_band(x, lo, hi, self._buckets(), self._xlim())
+        return self.ax.fill_between(xd, lod, hid, animated=True, **style)
+
+    def _redecimate(self):
+        n = self._buckets(); xlim = self._xlim()
+        for x, y, ln in self._lines.values():
+            ln.set_data(*decimate(x, y, n, xlim))
+        for ent in self._bands.values():
+            ent[3].remove()
+            ent[3] = self._fill(ent[0], ent[1], ent[2], ent[4])
+
+    def _artists(self):
+        # animated artists are painted by us, so zorder is applied here
+        return sorted([e[3] for e in self._bands.values()] + [e[2] for e in self._lines.values()],
+                      key=lambda a: a.get_zorder())
+
+    def _on_draw(self, event):
+        # After a full draw: keep the background for blitting (screen draws
+        # only, not savefig) and paint the animated traces on top.
+        if event.canvas is self.canvas and not getattr(self.canvas, "_is_saving", False):
+            self._background = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        for a in self._artists():
+            a.draw(event.renderer)
+
+
+def _finite_range(arrays) -> Optional[Tuple[float, float]]:
+    lo, hi = np.inf, -np.inf
+    for a in arrays:
+        a = a[np.isfinite(a)]
+        if a.size:
+            lo = min(lo, float(a.min())); hi = max(hi, float(a.max()))
+    return (lo, hi) if lo <= hi else None
@@ -1,30 +1,35 @@
-import os, json
-from datetime import datetime
+import os, queue
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import ImageTk
-import pandas as pd
 #Simport fitz  # PyMuPDF
 
 from core.pdf_renderer import render_background
-from core import db
+from core.render_worker import BackgroundRenderer, STAGE_FINAL
+from core.tiles import TilePyramid, next_zoom
+from core.field_index import FieldIndex
+from core.layout import Field, Layout, DEFAULT_CANVAS, NUMBER, TEXT, TOGGLE, ENUM, TYPE_CODES
+from core.validation import compile_rules, PASS, FAIL, INVALID
+from core import db, runs
+from core.export import write_rows
 from ui.layout_picker import LayoutPicker
 from ui.canvas_dialog import CanvasDialog
-from ui.history_compare import HistoryCompareWindow
 
 APP_TITLE = "Board Tester"
 
 MODE_ENTRY = "entry"
 MODE_LAYOUT = "layout"
 
+# ttk entries ignore `background`; validation colours are applied as styles
+VALIDATION_STYLES = {PASS: "Pass.TEntry", FAIL: "Warn.TEntry", INVALID: "Invalid.TEntry"}
+
 
 
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QFileDialog,
-    QLabel, QScrollArea, QMessageBox
+    QMessageBox
 )
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
+from ui.tile_view import TileView
 
 
 class MainWindow(QWidget):
@@ -38,13 +43,9 @@ class MainWindow(QWidget):
         self.load_button.clicked.connect(self.load_pdf)
         self.layout.addWidget(self.load_button)
 
-        # Scroll area and image label
-        self.scroll_area = QScrollArea()
-        self.image_label = QLabel("No PDF loaded.")
-        self.image_label.setAlignment(Qt.AlignCenter)
-        self.scroll_area.setWidget(self.image_label)
-        self.scroll_area.setWidgetResizable(True)
-        self.layout.addWidget(self.scroll_area)
+        # Tiled, zoomable page view (Ctrl+wheel to zoom, drag to pan)
+        self.view = TileView()
+        self.layout.addWidget(self.view)
 
     def load_pdf(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open PDF", "", "PDF Files (*.pdf)")
@@ -52,17 +53,10 @@ class MainWindow(QWidget):
             return
 
         try:
-            doc = fitz.open(file_path)
-            page = doc.load_page(0)
-            pix = page.get_pixmap(dpi=150)
-
-            # Convert to QImage
-            image = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(image)
-
-            # Set image
-            self.image_label.setPixmap(pixmap)
-            self.image_label.adjustSize()
+            img = render_background({"type": "pdf", "path": file_path, "page": 0, "dpi": 150})
+            if img is None:
+                raise RuntimeError("render failed (check Poppler)")
+            self.view.set_image(img)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load PDF:\n{e}")
@@ -76,16 +70,29 @@ class BoardTesterApp(tk.Tk):
         self.minsize(900, 650)
 
         self.mode = MODE_ENTRY
-        self.layout = {}
+        self.layout = Layout()
         self.layout_path = None
         self.bg_image = None
-        self.bg_tk = None
+        self.bg_pyramid = None
+        self.bg_tiles = {}       # (col,row) -> (item_id, PhotoImage) for tiles in the viewport
+        self.zoom = 1.0
+        self._viewport_pending = False
         self.canvas = None
 
+        self._renderer = BackgroundRenderer()
+        self._render_queue = queue.Queue()
+        self._render_job = None
+
         self.field_vars = {}     # id -> variable/widget state
+        self.field_values = {}   # id -> entered value; outlives the widgets (see _sync_entry_widgets)
         self.field_entries = {}  # id -> widget(s). For number: dict(entry, unit)
+        self.entry_items = {}    # id -> canvas window item
         self.shape_items = {}    # id -> {"rect_id": int, "label_id": int}
+        self._entry_dirty = set()  # ids whose entry widgets are stale after layout edits
+        self.field_index = FieldIndex()  # id lookup + spatial buckets for hit-testing
+        self.rules = compile_rules([])   # number-field limits, compiled per layout
         self.selected_field_id = None
+        self._selected_drawn = None
         self.dragging = False
         self.drag_offset = (0, 0)
         self.adding_field = False
@@ -93,12 +100,18 @@ class BoardTesterApp(tk.Tk):
         self.temp_rect_id = None
 
         db.init_db()
+        style = ttk.Style(self)
+        style.configure("Pass.TEntry", fieldbackground="#C8E6C9")     # green pass
+        style.configure("Warn.TEntry", fieldbackground="#FFECB3")     # yellow warn/fail
+        style.configure("Invalid.TEntry", fieldbackground="#FFCDD2")  # invalid format
         self._build_toolbar()
         self._build_canvas()
 
         self.after(200, self._ask_layout_on_launch)
+        self.after(40, self._poll_render_queue)
 
         self.bind("<Delete>", self._delete_selected_field)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         
     def _ask_layout_on_launch(self):
         base_dir = os.path.dirname(os.path.abspath(_file_))
@@ -143,14 +156,35 @@ class BoardTesterApp(tk.Tk):
         ttk.Button(tb, text="Export to Excel", command=self.export_to_excel).pack(side=tk.LEFT, padx=4)
         ttk.Button(tb, text="History/Compare", command=self.open_history_compare).pack(side=tk.LEFT, padx=4)
 
+        ttk.Separator(tb, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=6)
+        ttk.Button(tb, text="−", width=3, command=lambda: self.step_zoom(-1)).pack(side=tk.LEFT, padx=2)
+        self.zoom_label = ttk.Label(tb, text="100%", width=6, anchor="center"); self.zoom_label.pack(side=tk.LEFT)
+        ttk.Button(tb, text="+", width=3, command=lambda: self.step_zoom(1)).pack(side=tk.LEFT, padx=2)
+
     def _build_canvas(self):
         frm = ttk.Frame(self); frm.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         self.canvas = tk.Canvas(frm, bg="#2a2a2a", cursor="arrow")
-        self.canvas.pack(fill=tk.BOTH, expand=True)
+        ys = ttk.Scrollbar(frm, orient="vertical", command=self.canvas.yview)
+        xs = ttk.Scrollbar(frm, orient="horizontal", command=self.canvas.xview)
+        self.canvas.configure(yscrollcommand=lambda *a: (ys.set(*a), self._schedule_viewport()),
+                              xscrollcommand=lambda *a: (xs.set(*a), self._schedule_viewport()))
+        self.canvas.grid(row=0, column=0, sticky="nsew"); ys.grid(row=0, column=1, sticky="ns"); xs.grid(row=1, column=0, sticky="ew")
+        frm.rowconfigure(0, weight=1); frm.columnconfigure(0, weight=1)
         self.canvas.bind("<Button-1>", self._on_canvas_click)
         self.canvas.bind("<B1-Motion>", self._on_canvas_drag)
         self.canvas.bind("<ButtonRelease-1>", self._on_canvas_release)
         self.canvas.bind("<Double-Button-1>", self._on_canvas_double_click)
+        self.canvas.bind("<Configure>", lambda e: self._schedule_viewport())
+        # pan: middle-drag or wheel; zoom: Ctrl+wheel around the cursor
+        self.canvas.bind("<ButtonPress-2>", lambda e: self.canvas.scan_mark(e.x, e.y))
+        self.canvas.bind("<B2-Motion>", lambda e: self.canvas.scan_dragto(e.x, e.y, gain=1))
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Shift-MouseWheel>", lambda e: self.canvas.xview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Control-MouseWheel>", lambda e: self.step_zoom(1 if e.delta > 0 else -1, (e.x, e.y)))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+        self.canvas.bind("<Control-Button-4>", lambda e: self.step_zoom(1, (e.x, e.y)))
+        self.canvas.bind("<Control-Button-5>", lambda e: self.step_zoom(-1, (e.x, e.y)))
 
     # ----- Layout ops -----
     def pick_layout(self):
@@ -163,46 +197,148 @@ class BoardTesterApp(tk.Tk):
         if path: self.load_layout(path)
 
     def save_layout_as_dialog(self):
-        if not self.layout:
+        if self.layout.is_empty():
             messagebox.showinfo("Save Layout", "Nothing to save — load or create a layout first."); return
-        if "canvas" not in self.layout:
-            self.layout["canvas"] = {"type":"blank","size":[1200,800],"grid":{"enabled":True,"size":20}}
+        if self.layout.canvas is None:
+            self.layout.canvas = dict(DEFAULT_CANVAS)
         path = filedialog.asksaveasfilename(title="Save Layout JSON", defaultextension=".json", initialdir=os.path.join("data","layouts"), filetypes=[("JSON Files","*.json")])
         if not path: return
         try:
-            with open(path,"w") as f: json.dump(self.layout, f, indent=2)
+            self.layout.save(path)
             self.layout_path = path
             messagebox.showinfo("Save Layout", f"Saved: {path}")
         except Exception as e:
             messagebox.showerror("Save Layout", f"Failed to save layout:\n{e}")
 
     def edit_canvas(self):
-        current = self.layout.get("canvas") or {"type":"blank","size":[1200,800],"grid":{"enabled":True,"size":20}}
-        dlg = CanvasDialog(self, current); self.wait_window(dlg.win)
+        current = self.layout.canvas or dict(DEFAULT_CANVAS)
+        dlg = CanvasDialog(self, current, self._renderer); self.wait_window(dlg.win)
         if dlg.result:
-            self.layout["canvas"] = dlg.result
-            self._rebuild_canvas_for_mode()
+            self.layout.canvas = dlg.result
+            self._start_background_render(dlg.result)
 
     def load_layout(self, layout_path: str):
         try:
-            with open(layout_path,"r") as f: layout = json.load(f)
+            layout = Layout.load(layout_path)
         except Exception as e:
             messagebox.showerror("Layout", f"Failed to load layout JSON:\n{e}"); return
 
-        canvas_cfg = layout.get("canvas") or {"type":"pdf", **(layout.get("pdf") or {})}
+        canvas_cfg = layout.canvas or {"type":"pdf"}
         if canvas_cfg.get("type") in ("pdf","image"):
             p = canvas_cfg.get("path")
             if not p or not os.path.exists(p):
                 messagebox.showerror("Layout", f"File not found:\n{p}"); return
 
-        img = render_background(canvas_cfg)
-        if img is None:
-            messagebox.showerror("Canvas", "Failed to render background (check Poppler for PDF)."); return
-
         self.layout = layout; self.layout_path = layout_path
-        self.bg_image = img; self.bg_tk = ImageTk.PhotoImage(self.bg_image)
+        self.bg_image = None; self.bg_pyramid = None
         self._rebuild_canvas_for_mode()
         self.title(f"{APP_TITLE} — {os.path.basename(layout_path)}")
+        self._start_background_render(canvas_cfg)
+
+    # ----- Background rendering -----
+    def _start_background_render(self, canvas_cfg):
+        # Rasterisation runs on a worker; a low-DPI preview is painted first and
+        # replaced by the full page. Starting a new render cancels the old one.
+        self._render_job = self._renderer.submit(canvas_cfg, lambda job, stage, img: self._render_queue.put((job, stage, img)))
+        self.configure(cursor="watch")
+
+    def _poll_render_queue(self):
+        try:
+            while True:
+                job, stage, img = self._render_queue.get_nowait()
+                if job is not self._render_job or job.cancelled: continue
+                if stage == STAGE_FINAL:
+                    self._render_job = None; self.configure(cursor="")
+                    if img is None:
+                        messagebox.showerror("Canvas", "Failed to render background (check Poppler for PDF)."); continue
+                self._set_background(img)
+        except queue.Empty:
+            pass
+        self.after(40, self._poll_render_queue)
+
+    def _set_background(self, img):
+        self.bg_image = img; self.bg_pyramid = TilePyramid(img)
+        self._clear_tiles(); self._update_scrollregion(); self._refresh_tiles()
+
+    # ----- Tiled background / zoom -----
+    def _update_scrollregion(self):
+        if self.bg_pyramid:
+            w,h = self.bg_pyramid.size_at(self.zoom)
+            self.canvas.config(scrollregion=(0,0,w,h))
+
+    def _clear_tiles(self):
+        self.canvas.delete("bgtile"); self.bg_tiles.clear()
+
+    def _schedule_viewport(self):
+        if self._viewport_pending: return
+        self._viewport_pending = True
+        self.after_idle(self._refresh_viewport)
+
+    def _refresh_viewport(self):
+        self._viewport_pending = False
+        self._refresh_tiles()
+        if self.mode == MODE_ENTRY: self._sync_entry_widgets()
+
+    def _visible_layout_rect(self, margin=0):
+        # viewport in layout coordinates, grown by `margin` window pixels
+        z = self.zoom
+        x0,y0 = self.canvas.canvasx(0) - margin, self.canvas.canvasy(0) - margin
+        x1,y1 = x0 + self.canvas.winfo_width() + 2*margin, y0 + self.canvas.winfo_height() + 2*margin
+        return x0/z, y0/z, x1/z, y1/z
+
+    def _refresh_tiles(self):
+        # Only tiles intersecting the viewport have Tk images; the rest are dropped.
+        pyr = self.bg_pyramid
+        if not pyr: return
+        x0,y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        x1,y1 = x0 + self.canvas.winfo_width(), y0 + self.canvas.winfo_height()
+        want = set(pyr.visible_tiles(self.zoom, x0, y0, x1, y1))
+        for key in [k for k in self.bg_tiles if k not in want]:
+            self.canvas.delete(self.bg_tiles.pop(key)[0])
+        t = pyr.tile_size
+        for col,row in want:
+            if (col,row) in self.bg_tiles: continue
+            photo = ImageTk.PhotoImage(pyr.tile(self.zoom, col, row))
+            item = self.canvas.create_image(col*t, row*t, image=photo, anchor="nw", tags=("bgtile",))
+            self.bg_tiles[(col,row)] = (item, photo)
+        self.canvas.tag_lower("bgtile")
+
+    def step_zoom(self, direction, anchor=None):
+        self.set_zoom(next_zoom(self.zoom, direction), anchor)
+
+    def set_zoom(self, zoom, anchor=None):
+        if abs(zoom - self.zoom) < 1e-9: return
+        ax,ay = anchor or (self.canvas.winfo_width()/2, self.canvas.winfo_height()/2)
+        lx,ly = self.canvas.canvasx(ax)/self.zoom, self.canvas.canvasy(ay)/self.zoom
+        self.zoom = zoom; self.zoom_label.configure(text=f"{round(zoom*100)}%")
+        self._clear_tiles(); self._update_scrollregion(); self._place_field_items()
+        if self.bg_pyramid:
+            # keep the layout point under the cursor fixed
+            w,h = self.bg_pyramid.size_at(zoom)
+            self.canvas.xview_moveto(max(0.0, (lx*zoom - ax)/w)); self.canvas.yview_moveto(max(0.0, (ly*zoom - ay)/h))
+        self._refresh_viewport()
+
+    def _view_rect(self, f):
+        # layout (zoom 1.0) coordinates -> canvas coordinates
+        x,y,w,h = self._field_rect(f); z = self.zoom
+        return x*z, y*z, w*z, h*z
+
+    def _event_pos(self, event):
+        # window event coordinates -> layout coordinates
+        return self.canvas.canvasx(event.x)/self.zoom, self.canvas.canvasy(event.y)/self.zoom
+
+    def _place_field_items(self):
+        for f in self.layout.fields:
+            fid = f.id; x,y,w,h = self._view_rect(f)
+            if fid in self.entry_items:
+                self.canvas.coords(self.entry_items[fid], x, y); self.canvas.itemconfigure(self.entry_items[fid], width=w, height=h)
+            it = self.shape_items.get(fid)
+            if it:
+                self.canvas.coords(it["rect_id"], x,y,x+w,y+h); self.canvas.coords(it["label_id"], x+4, y-8)
+
+    def _on_close(self):
+        self._renderer.shutdown()
+        self.destroy()
 
     # ----- Mode switching -----
     def set_entry_mode(self):
@@ -211,135 +347,150 @@ class BoardTesterApp(tk.Tk):
         self.edit_field_btn.configure(state=tk.DISABLED)
         self.delete_field_btn.configure(state=tk.DISABLED)
         self.adding_field = False
-        self._rebuild_canvas_for_mode()
+        self.selected_field_id = None; self._update_selection_visuals()
+        self._show_mode_layer()
 
     def set_layout_mode(self):
         self.mode = MODE_LAYOUT; self.mode_var.set(self.mode)
         self.add_field_btn.configure(state=tk.NORMAL)
         self.edit_field_btn.configure(state=tk.NORMAL if self.selected_field_id else tk.DISABLED)
         self.delete_field_btn.configure(state=tk.NORMAL if self.selected_field_id else tk.DISABLED)
-        self._rebuild_canvas_for_mode()
+        self._show_mode_layer()
 
+    # The canvas is a retained scene: background tiles, entry widgets (tag
+    # "entry") and layout shapes (tag "shape") stay alive across mode switches
+    # and only the inactive layer is hidden. Layout edits update shapes in place
+    # and mark the field in _entry_dirty; entry widgets for those fields alone are
+    # rebuilt the next time entry mode is shown.
     def _rebuild_canvas_for_mode(self):
         self.canvas.delete("all")
         self._clear_entry_widgets()
-        self.shape_items.clear()
-        self.selected_field_id = None
-        if self.bg_tk:
-            self.canvas.create_image(0, 0, image=self.bg_tk, anchor="nw")
-            self.canvas.config(scrollregion=(0,0,self.bg_image.width, self.bg_image.height))
-        if self.mode == MODE_LAYOUT:
-            self._build_layout_mode_shapes()
-        else:
-            self._build_entry_mode_widgets()
+        self.shape_items.clear(); self._entry_dirty.clear(); self.field_values.clear()
+        self.field_index = FieldIndex(self.layout.fields)
+        self.rules = compile_rules(self.layout.fields)
+        self.selected_field_id = None; self._selected_drawn = None
+        self.bg_tiles.clear()
+        if self.bg_pyramid:
+            self._update_scrollregion(); self._refresh_tiles()
+        self._build_layout_mode_shapes()
+        self._show_mode_layer()
+
+    def _show_mode_layer(self):
+        if self.mode == MODE_ENTRY:
+            self._sync_entry_widgets()
+        self.canvas.itemconfigure("shape", state=(tk.NORMAL if self.mode == MODE_LAYOUT else tk.HIDDEN))
+        self.canvas.itemconfigure("entry", state=(tk.NORMAL if self.mode == MODE_ENTRY else tk.HIDDEN))
+
+    def _mark_entry_dirty(self, *fids):
+        self._entry_dirty.update(fids)
 
     # ----- Entry mode widgets -----
-    def _build_entry_mode_widgets(self):
-        self.field_vars.clear(); self.field_entries.clear()
-        for field in self.layout.get("fields", []):
-            fid = field.get("id")
-            x,y,w,h = self._field_rect(field)
-            
-            inp = field.get("input")
-            if not inp:
-                legacy_units = field.get("units")
-                legacy_unit = field.get("default_unit", field.get("unit",""))
-                if isinstance(legacy_units, str):
-                    legacy_units = [legacy_units] if legacy_units else []
-                inp = {
-                    "type": "number", 
-                    "units": legacy_units or ([legacy_unit] if legacy_unit else []), 
-                    "default_unit": legacy_unit
-                    }
-            itype = (inp.get("type") or "number").lower()
-
-            if itype == "toggle":
-                var = tk.BooleanVar(value=False)
-                cb = ttk.Checkbutton(self.canvas, variable=var)
-                self.canvas.create_window(x, y, window=cb, anchor="nw", width=w, height=h)
-                self.field_vars[fid] = var
-                self.field_entries[fid] = cb
-
-            elif itype == "enum":
-                var = tk.StringVar(value=(inp.get("default") or (inp.get("options") or [""])[0]))
-                combo = ttk.Combobox(self.canvas, textvariable=var, values=inp.get("options") or [], state="readonly", width=max(6, min(30, w//8)))
-                self.canvas.create_window(x, y, window=combo, anchor="nw", width=w, height=h)
-                self.field_vars[fid] = var; self.field_entries[fid] = combo
-
-            elif itype == "text":
-                var = tk.StringVar()
-                ent = ttk.Entry(self.canvas, textvariable=var, width=max(6, min(30, w//8)))
-                self.canvas.create_window(x, y, window=ent, anchor="nw", width=w, height=h)
-                self.field_vars[fid] = var; self.field_entries[fid] = ent
-
-            else: # number
-                wrapper = ttk.Frame(self.canvas)
-                var = tk.StringVar()
-                ent = ttk.Entry(wrapper, textvariable=var, width=max(6, min(24, w//10)))
-                ent.pack(side=tk.LEFT, fill=tk.X, expand=True)
-                units = inp.get("units") or []
-                unit_var = tk.StringVar(value=inp.get("default_unit") or (units[0] if units else ""))
-                if units:
-                    cmb = ttk.Combobox(wrapper, textvariable=unit_var, values=units, state="readonly", width=6)
-                    cmb.pack(side=tk.LEFT, padx=4)
-                else:
-                    cmb = None
-                self.canvas.create_window(x, y, window=wrapper, anchor="nw", width=w, height=h)
-                self.field_vars[fid] = {"value": var, "unit": unit_var}
-                self.field_entries[fid] = {"entry": ent, "unit": cmb}
-                # validation hook
-                def make_cb(fid=fid, field=field):
-                    return lambda *args: self._apply_validation(fid, field)
-                var.trace_add("write", make_cb())
-
-    def _apply_validation(self, fid, field):
-        inp = field.get("input") or {}
-        itype = (inp.get("type") or "number").lower()
-        if itype != "number": return
+    # Widgets exist only for fields intersecting the viewport (plus a margin).
+    # Entered values live in field_values, written through by variable traces,
+    # so a widget scrolled out of view can be destroyed and rebuilt later
+    # without losing input. Export and logging read field_values.
+    ENTRY_MARGIN = 200
+
+    def _sync_entry_widgets(self):
+        for fid in list(self._entry_dirty):
+            self._destroy_entry_widget(fid)
+        self._entry_dirty.clear()
+        visible = set(self.field_index.query(*self._visible_layout_rect(self.ENTRY_MARGIN)))
+        for fid in visible:
+            if fid not in self.entry_items: self._create_entry_widget(self.field_index.get(fid))
+        for fid in [f for f in self.entry_items if f not in visible]:
+            self._destroy_entry_widget(fid)
+        self.canvas.itemconfigure("entry", state=(tk.NORMAL if self.mode == MODE_ENTRY else tk.HIDDEN))
+
+    def _field_value(self, field):
+        fid = field.id
+        if fid in self.field_values: return self.field_values[fid]
+        return runs.default_value(field)
+
+    def _bind_value(self, fid, var, key=None):
+        # write-through from a Tk variable into field_values
+        def store(*args):
+            try: v = var.get()
+            except tk.TclError: return
+            if key is None: self.field_values[fid] = v
+            else: self.field_values[fid][key] = v
+        var.trace_add("write", store)
+
+    def _create_entry_widget(self, field):
+        fid = field.id
+        x,y,w,h = self._view_rect(field)
+        itype = field.type
+        val = self.field_values.setdefault(fid, self._field_value(field))
+
+        if itype == TOGGLE:
+            var = tk.BooleanVar(value=bool(val)); self._bind_value(fid, var)
+            cb = ttk.Checkbutton(self.canvas, variable=var)
+            self.entry_items[fid] = self.canvas.create_window(x, y, window=cb, anchor="nw", width=w, height=h, tags=("entry",))
+            self.field_vars[fid] = var
+            self.field_entries[fid] = cb
+
+        elif itype == ENUM:
+            var = tk.StringVar(value=val); self._bind_value(fid, var)
+            combo = ttk.Combobox(self.canvas, textvariable=var, values=field.options or [], state="readonly", width=int(max(6, min(30, w//8))))
+            self.entry_items[fid] = self.canvas.create_window(x, y, window=combo, anchor="nw", width=w, height=h, tags=("entry",))
+            self.field_vars[fid] = var; self.field_entries[fid] = combo
+
+        elif itype == TEXT:
+            var = tk.StringVar(value=val); self._bind_value(fid, var)
+            ent = ttk.Entry(self.canvas, textvariable=var, width=int(max(6, min(30, w//8))))
+            self.entry_items[fid] = self.canvas.create_window(x, y, window=ent, anchor="nw", width=w, height=h, tags=("entry",))
+            self.field_vars[fid] = var; self.field_entries[fid] = ent
+
+        else: # number
+            wrapper = ttk.Frame(self.canvas)
+            var = tk.StringVar(value=val["value"]); self._bind_value(fid, var, "value")
+            ent = ttk.Entry(wrapper, textvariable=var, width=int(max(6, min(24, w//10))))
+            ent.pack(side=tk.LEFT, fill=tk.X, expand=True)
+            units = field.units or []
+            unit_var = tk.StringVar(value=val["unit"]); self._bind_value(fid, unit_var, "unit")
+            if units:
+                cmb = ttk.Combobox(wrapper, textvariable=unit_var, values=units, state="readonly", width=6)
+                cmb.pack(side=tk.LEFT, padx=4)
+            else:
+                cmb = None
+            self.entry_items[fid] = self.canvas.create_window(x, y, window=wrapper, anchor="nw", width=w, height=h, tags=("entry",))
+            self.field_vars[fid] = {"value": var, "unit": unit_var}
+            self.field_entries[fid] = {"frame": wrapper, "entry": ent, "unit": cmb}
+            # validation hook (value or unit change)
+            revalidate = lambda *args, fid=fid: self._apply_validation(fid)
+            var.trace_add("write", revalidate); unit_var.trace_add("write", revalidate)
+            if val["value"]: self._apply_validation(fid)
+
+    def _apply_validation(self, fid):
         wdict = self.field_entries.get(fid) or {}
-        ent = wdict.get("entry")
+        ent = wdict.get("entry") if isinstance(wdict, dict) else None
         if not ent: return
-        vdef = (inp.get("validation") or {})
-        s = (self.field_vars[fid]["value"]).get().strip()
+        fv = self.field_vars[fid]
+        status = self.rules.check(fid, fv["value"].get(), fv["unit"].get())
+        ent.configure(style=VALIDATION_STYLES.get(status, "TEntry"))
+
+    def _destroy_entry_widget(self, fid):
+        wid = self.field_entries.pop(fid, None); fv = self.field_vars.pop(fid, None)
+        # Traces hold their callbacks in Tcl, which would keep recycled vars alive.
+        for var in (fv.values() if isinstance(fv, dict) else [fv] if fv is not None else []):
+            for mode, cb in var.trace_info(): var.trace_remove(mode, cb)
+        item = self.entry_items.pop(fid, None)
+        if item is not None: self.canvas.delete(item)
         try:
-            val = float(s) if s not in ("","-",".") else None
-        except:
-            ent.configure(background="#FFCDD2"); return  # invalid format
-        if val is None:
-            ent.configure(background="white"); return
-        target = vdef.get("target")
-        lpct = vdef.get("lower_pct"); upct = vdef.get("upper_pct")
-        labs = vdef.get("lower_abs"); uabs = vdef.get("upper_abs")
-        lo = hi = None
-        if target is not None and (lpct is not None or upct is not None):
-            lo = target * (1 + (lpct or 0)/100.0)
-            hi = target * (1 + (upct or 0)/100.0)
-        if labs is not None or uabs is not None:
-            lo = (lo if lo is not None else (target if target is not None else val)) + (labs or 0)
-            hi = (hi if hi is not None else (target if target is not None else val)) + (uabs or 0)
-        if lo is None and hi is None:
-            ent.configure(background="white"); return
-        if lo <= val <= hi:
-            ent.configure(background="#C8E6C9")  # green pass
-        else:
-            ent.configure(background="#FFECB3")  # yellow warn/fail
+            if isinstance(wid, dict): wid["frame"].destroy()
+            elif wid is not None: wid.destroy()
+        except Exception: pass
 
     def _clear_entry_widgets(self):
-        for wid in self.field_entries.values():
-            try:
-                if isinstance(wid, dict):
-                    if "entry" in wid and hasattr(wid["entry"], "destroy"): wid["entry"].destroy()
-                    if "unit" in wid and wid["unit"] and hasattr(wid["unit"], "destroy"): wid["unit"].destroy()
-                else:
-                    wid.destroy()
-            except Exception: pass
-        self.field_entries.clear(); self.field_vars.clear()
+        for fid in list(self.field_entries):
+            self._destroy_entry_widget(fid)
+        self.field_entries.clear(); self.field_vars.clear(); self.entry_items.clear()
 
     # ----- Export / Log -----
     def export_to_excel(self):
         if self.mode != MODE_ENTRY:
             messagebox.showinfo("Export", "Switch to Entry Mode to export values."); return
-        if not self.layout: messagebox.showinfo("Export", "Load a layout first."); return
+        if self.layout.is_empty(): messagebox.showinfo("Export", "Load a layout first."); return
 
         operator = simple_prompt(self, "Operator")  
         if operator is None: 
@@ -351,69 +502,38 @@ class BoardTesterApp(tk.Tk):
         if dut is None: 
             return
         notes = simple_prompt(self, "Notes (optional)") or ""
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S"); run_id = f"{ts}_{self.layout.get('board_name','Board')}"
+        run_id, ts = runs.new_run_id(self.layout)
 
         suggested = f"run_{run_id}.xlsx"
-        out_path = filedialog.asksaveasfilename(title="Save Excel", defaultextension=".xlsx", initialfile=suggested, filetypes=[("Excel","*.xlsx")])
+        out_path = filedialog.asksaveasfilename(title="Save Excel", defaultextension=".xlsx", initialfile=suggested,
+                                                filetypes=[("Excel","*.xlsx"), ("CSV","*.csv"), ("Parquet","*.parquet")])
         if not out_path: return
 
-        rows = []
-        for field in self.layout.get("fields", []):
-            fid = field.get("id"); label = field.get("label", fid); ctype = field.get("component_type","")
-            
-            inp = field.get("input")
-            if not inp:
-                legacy_units = field.get("units")
-                legacy_unit = field.get("default_unit", field.get("unit",""))
-                if isinstance(legacy_units, str):
-                    legacy_units = [legacy_units] if legacy_units else []
-                inp = {
-                    "type": "number", 
-                    "units": legacy_units or ([legacy_unit] if legacy_unit else []), 
-                    "default_unit": legacy_unit
-                    }
-            itype = (inp.get("type") or "number").lower()
-            
-            
-            unit = ""; value = ""
-            fv = self.field_vars.get(fid)
-            if itype == "toggle":
-                true_label = (inp.get("labels") or {}).get("true","True")
-                false_label = (inp.get("labels") or {}).get("false","False")
-                value = true_label if bool(fv.get()) else false_label
-            elif itype == "enum":
-                value = fv.get().strip()
-            elif itype == "text":
-                value = fv.get().strip()
-            else: # number
-                value = (fv["value"]).get().strip()
-                unit = (fv["unit"]).get().strip() if fv.get("unit") else (inp.get("default_unit") or "")
-            rows.append({"timestamp": ts, "operator": operator, "lot": lot, "dut_id": dut,
-                         "field_id": fid, "label": label, "component_type": ctype,
-                         "value": value, "unit": unit})
+        values = {f.id: self._field_value(f) for f in self.layout.fields}
+        rows = runs.measurement_rows(self.layout, values, ts, operator, lot, dut, rules=self.rules)
 
         try:
-            pd.DataFrame(rows).to_excel(out_path, index=False)
+            write_rows(out_path, runs.RUN_EXPORT_COLUMNS, runs.export_rows(rows))
         except Exception as e:
             messagebox.showerror("Export", f"Failed to save Excel:\n{e}"); return
 
         if self.log_var.get():
             try:
-                meta = {"run_id": run_id, "timestamp": ts, "operator": operator, "lot": lot, "dut_id": dut,
-                        "board_name": self.layout.get("board_name",""), "layout_file": self.layout_path or "", "notes": notes}
-                db.insert_run(meta, rows)
+                meta = runs.run_meta(self.layout, run_id, ts, operator, lot, dut, self.layout_path or "", notes)
+                db.insert_run(meta, rows, rules=self.rules)
             except Exception as e:
                 messagebox.showwarning("SQLite", f"Saved Excel but failed to log to SQLite:\n{e}")
         messagebox.showinfo("Export", f"Saved: {out_path}\nRun ID: {run_id}")
 
     # ----- Layout mode -----
     def _build_layout_mode_shapes(self):
-        for field in self.layout.get("fields", []):
-            fid = field.get("id"); x,y,w,h = self._field_rect(field)
-            rect_id = self.canvas.create_rectangle(x, y, x+w, y+h, outline="#00BCD4", width=2)
-            label = field.get("label", fid)
-            label_id = self.canvas.create_text(x+4, y-8, text=label, anchor="nw", fill="#00BCD4", font=("Arial", 10, "bold"))
-            self.shape_items[fid] = {"rect_id": rect_id, "label_id": label_id}
+        for field in self.layout.fields:
+            self._create_shape(field.id, field.label, *self._view_rect(field))
+
+    def _create_shape(self, fid, label, x,y,w,h):
+        rect_id = self.canvas.create_rectangle(x, y, x+w, y+h, outline="#00BCD4", width=2, tags=("shape",))
+        label_id = self.canvas.create_text(x+4, y-8, text=label, anchor="nw", fill="#00BCD4", font=("Arial", 10, "bold"), tags=("shape",))
+        self.shape_items[fid] = {"rect_id": rect_id, "label_id": label_id}
 
     def begin_add_field(self):
         if self.mode != MODE_LAYOUT: return
@@ -421,10 +541,10 @@ class BoardTesterApp(tk.Tk):
 
     def _on_canvas_click(self, event):
         if self.mode != MODE_LAYOUT: return
-        x,y = event.x, event.y
+        x,y = self._event_pos(event)
         if self.adding_field:
-            self.new_field_start = (x,y)
-            self.temp_rect_id = self.canvas.create_rectangle(x,y,x,y, outline="#4CAF50", width=2, dash=(4,2))
+            self.new_field_start = (x,y); vx,vy = x*self.zoom, y*self.zoom
+            self.temp_rect_id = self.canvas.create_rectangle(vx,vy,vx,vy, outline="#4CAF50", width=2, dash=(4,2))
             return
         clicked = self._find_field_at(x,y)
         if clicked:
@@ -437,40 +557,39 @@ class BoardTesterApp(tk.Tk):
 
     def _on_canvas_drag(self, event):
         if self.mode != MODE_LAYOUT: return
-        x,y = event.x, event.y
+        x,y = self._event_pos(event); z = self.zoom
         if self.adding_field and self.temp_rect_id and self.new_field_start:
-            x0,y0 = self.new_field_start; self.canvas.coords(self.temp_rect_id, x0,y0,x,y); return
+            x0,y0 = self.new_field_start; self.canvas.coords(self.temp_rect_id, x0*z,y0*z,x*z,y*z); return
         if self.dragging and self.selected_field_id:
             f = self._get_field_by_id(self.selected_field_id); fx,fy,fw,fh = self._field_rect(f)
             nx,ny = max(0,x-self.drag_offset[0]), max(0,y-self.drag_offset[1])
             it = self.shape_items[self.selected_field_id]
-            self.canvas.coords(it["rect_id"], nx,ny,nx+fw,ny+fh)
-            self.canvas.coords(it["label_id"], nx+4, ny-8)
-            self._set_field_rect(f, nx,ny,fw,fh)
+            self.canvas.coords(it["rect_id"], nx*z,ny*z,(nx+fw)*z,(ny+fh)*z)
+            self.canvas.coords(it["label_id"], nx*z+4, ny*z-8)
+            self._set_field_rect(f, nx,ny,fw,fh); self._mark_entry_dirty(self.selected_field_id)
 
     def _on_canvas_release(self, event):
         if self.mode != MODE_LAYOUT: return
         if self.adding_field and self.temp_rect_id and self.new_field_start:
-            x0,y0 = self.new_field_start; x1,y1 = event.x, event.y
+            x0,y0 = self.new_field_start; x1,y1 = self._event_pos(event)
             x,y = min(x0,x1), min(y0,y1); w,h = abs(x1-x0), abs(y1-y0)
             self.canvas.delete(self.temp_rect_id); self.temp_rect_id=None; self.new_field_start=None; self.adding_field=False
             if w<10 or h<10: return
             fid = simple_prompt(self, "Field ID (e.g., R1)"); 
             if not fid: return
             label = simple_prompt(self, "Label (optional)") or fid
-            if any(f.get("id")==fid for f in self.layout.get("fields", [])):
+            if fid in self.field_index:
                 messagebox.showerror("Add Field", f"Field ID '{fid}' already exists."); return
-            new_field = {"id": fid, "label": label, "position": {"x": float(x), "y": float(y), "w": float(w), "h": float(h)}, "input": {"type":"number","units":[""],"default_unit":""}}
-            self.layout.setdefault("fields", []).append(new_field)
-            rect_id = self.canvas.create_rectangle(x,y,x+w,y+h, outline="#00BCD4", width=2)
-            label_id = self.canvas.create_text(x+4, y-8, text=label, anchor="nw", fill="#00BCD4", font=("Arial", 10, "bold"))
-            self.shape_items[fid] = {"rect_id": rect_id, "label_id": label_id}
+            new_field = Field(fid, label, rect=(x,y,w,h), type=NUMBER, units=[""], default_unit="")
+            self.layout.fields.append(new_field); self.field_index.add(new_field)
+            self.rules = compile_rules(self.layout.fields)
+            self._create_shape(fid, label, *self._view_rect(new_field)); self._mark_entry_dirty(fid)
             self.selected_field_id = fid; self._update_selection_visuals(); return
         self.dragging = False
 
     def _on_canvas_double_click(self, event):
         if self.mode != MODE_LAYOUT: return
-        fid = self._find_field_at(event.x, event.y)
+        fid = self._find_field_at(*self._event_pos(event))
         if not fid: return
         self.selected_field_id = fid; self._update_selection_visuals(); self.edit_selected_field()
 
@@ -479,19 +598,28 @@ class BoardTesterApp(tk.Tk):
         f = self._get_field_by_id(self.selected_field_id)  
         if not f:
             return
-        dlg = FieldDialog(self, f, existing_ids=[fld["id"] for fld in self.layout.get("fields", [])]); self.wait_window(dlg.win)
+        dlg = FieldDialog(self, f, existing_ids=[fld.id for fld in self.layout.fields]); self.wait_window(dlg.win)
         if dlg.result is None: 
             return
-        new_def = dlg.result; old_id = f.get("id"); new_id = new_def.get("id")
-        if new_id != old_id and any(ff["id"]==new_id for ff in self.layout["fields"]):
+        new_def = dlg.result; old_id = f.id; new_id = new_def.id
+        if new_id != old_id and new_id in self.field_index:
             messagebox.showerror("Edit Field", f"Field ID '{new_id}' already exists."); return
-        f.update(new_def)
+        old_type = f.type; f.assign(new_def); self._mark_entry_dirty(old_id, new_id)
+        self.field_index.rename(old_id, new_id); self.field_index.move(new_id)
+        self.rules = compile_rules(self.layout.fields)
+        if old_id in self.field_values:
+            val = self.field_values.pop(old_id)
+            if f.type == old_type:
+                if isinstance(val, dict) and val.get("unit") not in (f.units or [""]):
+                    val["unit"] = f.default_unit or ""
+                self.field_values[new_id] = val
         if new_id != old_id:
             self.shape_items[new_id] = self.shape_items.pop(old_id)
             if self.selected_field_id == old_id: self.selected_field_id = new_id
-        x,y,w,h = self._field_rect(f); it = self.shape_items[self.selected_field_id]
+            if self._selected_drawn == old_id: self._selected_drawn = new_id
+        x,y,w,h = self._view_rect(f); it = self.shape_items[self.selected_field_id]
         self.canvas.coords(it["rect_id"], x,y,x+w,y+h)
-        self.canvas.itemconfigure(it["label_id"], text=f.get("label", new_id))
+        self.canvas.itemconfigure(it["label_id"], text=f.label)
         self.canvas.coords(it["label_id"], x+4, y-8)
         self._update_selection_visuals()
 
@@ -503,42 +631,44 @@ class BoardTesterApp(tk.Tk):
         if self.mode == MODE_LAYOUT and self.selected_field_id: self.delete_field_by_id(self.selected_field_id)
 
     def delete_field_by_id(self, fid: str):
-        self.layout["fields"] = [f for f in self.layout.get("fields", []) if f.get("id") != fid]
+        self.layout.fields = [f for f in self.layout.fields if f.id != fid]
+        self.field_index.remove(fid); self.rules = compile_rules(self.layout.fields)
         it = self.shape_items.pop(fid, None)
         if it:
             try: self.canvas.delete(it["rect_id"]); self.canvas.delete(it["label_id"])
             except Exception: pass
+        self._mark_entry_dirty(fid); self.field_values.pop(fid, None)
+        if self._selected_drawn == fid: self._selected_drawn = None
         self.selected_field_id=None; self._update_selection_visuals()
 
     def _update_selection_visuals(self):
-        for fid, it in self.shape_items.items():
-            color = "#FF9800" if fid == self.selected_field_id else "#00BCD4"
-            self.canvas.itemconfigure(it["rect_id"], outline=color, width=3 if fid == self.selected_field_id else 2)
+        # only the previously and newly selected shapes are restyled
+        prev, cur = self._selected_drawn, self.selected_field_id
+        if prev != cur and prev in self.shape_items:
+            self.canvas.itemconfigure(self.shape_items[prev]["rect_id"], outline="#00BCD4", width=2)
+        if cur in self.shape_items:
+            self.canvas.itemconfigure(self.shape_items[cur]["rect_id"], outline="#FF9800", width=3)
+        self._selected_drawn = cur if cur in self.shape_items else None
         en = tk.NORMAL if self.selected_field_id else tk.DISABLED
         self.edit_field_btn.configure(state=en); self.delete_field_btn.configure(state=en)
 
     # ----- helpers -----
     def _find_field_at(self, x,y):
-        for f in reversed(self.layout.get("fields", [])):
-            fx,fy,fw,fh = self._field_rect(f)
-            if fx<=x<=fx+fw and fy<=y<=fy+fh: return f.get("id")
-        return None
+        return self.field_index.hit(x, y)
 
     def _get_field_by_id(self, fid):
-        for f in self.layout.get("fields", []):
-            if f.get("id")==fid: return f
-        return None
+        return self.field_index.get(fid)
 
     def _field_rect(self, f):
-        pos = f.get("position", {})
-        x=float(pos.get("x", f.get("x", 0))); y=float(pos.get("y", f.get("y", 0)))
-        w=float(pos.get("w", f.get("w", 100))); h=float(pos.get("h", f.get("h", 24)))
-        return x,y,w,h
+        return f.rect
 
     def _set_field_rect(self, f, x,y,w,h):
-        f["position"] = {"x": float(x), "y": float(y), "w": float(w), "h": float(h)}
+        f.set_rect(x,y,w,h)
+        self.field_index.move(f.id, f.rect)
 
     def open_history_compare(self):
+        # imported here: the compare engine pulls in pandas, which startup skips
+        from ui.history_compare import HistoryCompareWindow
         try: HistoryCompareWindow(self)
         except Exception as e: messagebox.showerror("History/Compare", f"Failed to open window:\n{e}")
 
@@ -556,29 +686,29 @@ def simple_prompt(root, label):
 
 class FieldDialog:
     def __init__(self, root, field_def, existing_ids):
-        self.root = root; self.field = dict(field_def); self.existing_ids = set(existing_ids); self.result=None
+        self.root = root; self.field = field_def.copy(); self.existing_ids = set(existing_ids); self.result=None
         self.win = tk.Toplevel(root); self.win.title("Field Properties"); self.win.transient(root); self.win.grab_set()
         frm = ttk.Frame(self.win, padding=12); frm.pack(fill=tk.BOTH, expand=True)
 
         ttk.Label(frm, text="ID").grid(row=0, column=0, sticky="w")
-        self.var_id = tk.StringVar(value=self.field.get("id","")); ttk.Entry(frm, textvariable=self.var_id).grid(row=0, column=1, sticky="ew", padx=6, pady=4)
+        self.var_id = tk.StringVar(value=self.field.id); ttk.Entry(frm, textvariable=self.var_id).grid(row=0, column=1, sticky="ew", padx=6, pady=4)
 
         ttk.Label(frm, text="Label").grid(row=1, column=0, sticky="w")
-        self.var_label = tk.StringVar(value=self.field.get("label","")); ttk.Entry(frm, textvariable=self.var_label).grid(row=1, column=1, sticky="ew", padx=6, pady=4)
+        self.var_label = tk.StringVar(value=self.field.label); ttk.Entry(frm, textvariable=self.var_label).grid(row=1, column=1, sticky="ew", padx=6, pady=4)
 
         ttk.Label(frm, text="Component type").grid(row=2, column=0, sticky="w")
-        self.var_type = tk.StringVar(value=self.field.get("component_type","")); ttk.Entry(frm, textvariable=self.var_type).grid(row=2, column=1, sticky="ew", padx=6, pady=4)
+        self.var_type = tk.StringVar(value=self.field.component_type); ttk.Entry(frm, textvariable=self.var_type).grid(row=2, column=1, sticky="ew", padx=6, pady=4)
 
         ttk.Label(frm, text="Input Type").grid(row=3, column=0, sticky="w")
-        self.var_input_type = tk.StringVar(value=(self.field.get("input") or {}).get("type","number"))
-        ttk.Combobox(frm, textvariable=self.var_input_type, values=["number","text","toggle","enum"], state="readonly").grid(row=3, column=1, sticky="ew", padx=6, pady=4)
+        self.var_input_type = tk.StringVar(value=self.field.type_name)
+        ttk.Combobox(frm, textvariable=self.var_input_type, values=list(TYPE_CODES), state="readonly").grid(row=3, column=1, sticky="ew", padx=6, pady=4)
 
         ttk.Label(frm, text="Units (comma) [number]").grid(row=4, column=0, sticky="w")
-        units = ",".join((self.field.get("input") or {}).get("units", [])); self.var_units = tk.StringVar(value=units)
+        units = ",".join(self.field.units or []); self.var_units = tk.StringVar(value=units)
         ttk.Entry(frm, textvariable=self.var_units).grid(row=4, column=1, sticky="ew", padx=6, pady=4)
 
         ttk.Label(frm, text="Default unit [number]").grid(row=5, column=0, sticky="w")
-        self.var_default_unit = tk.StringVar(value=(self.field.get("input") or {}).get("default_unit",""))
+        self.var_default_unit = tk.StringVar(value=self.field.default_unit or "")
         ttk.Entry(frm, textvariable=self.var_default_unit).grid(row=5, column=1, sticky="ew", padx=6, pady=4)
 
         ttk.Label(frm, text="Validation (target,lower_pct,upper_pct,lower_abs,upper_abs) [number]").grid(row=6, column=0, columnspan=1, sticky="w")
@@ -589,7 +719,7 @@ class FieldDialog:
         self.var_extras = tk.StringVar(value=self._extras_str())
         ttk.Entry(frm, textvariable=self.var_extras).grid(row=7, column=1, sticky="ew", padx=6, pady=4)
 
-        x,y,w,h = root._field_rect(self.field)
+        x,y,w,h = self.field.rect
         ttk.Label(frm, text="Position (x,y,w,h)").grid(row=8, column=0, sticky="w")
         self.var_pos = tk.StringVar(value=f"{int(x)},{int(y)},{int(w)},{int(h)}"); ttk.Entry(frm, textvariable=self.var_pos, state="disabled").grid(row=8, column=1, sticky="ew", padx=6, pady=4)
 
@@ -598,7 +728,7 @@ class FieldDialog:
         frm.columnconfigure(1, weight=1)
 
     def _valid_str(self):
-        v = (self.field.get("input") or {}).get("validation") or {}
+        v = self.field.validation or {}
         parts = []
         for k in ["target","lower_pct","upper_pct","lower_abs","upper_abs"]:
             if k in v and v[k] is not None: parts.append(str(v[k]))
@@ -606,11 +736,10 @@ class FieldDialog:
         return ",".join(parts)
 
     def _extras_str(self):
-        it = (self.field.get("input") or {}).get("type","number")
-        if it == "enum":
-            return ",".join((self.field.get("input") or {}).get("options", []))
-        if it == "toggle":
-            labels = (self.field.get("input") or {}).get("labels") or {}
+        if self.field.type == ENUM:
+            return ",".join(self.field.options or [])
+        if self.field.type == TOGGLE:
+            labels = self.field.labels or {}
             return f"{labels.get('true','True')}|{labels.get('false','False')}"
         return ""
 
@@ -621,15 +750,13 @@ class FieldDialog:
         label = self.var_label.get().strip() or fid
         ctype = self.var_type.get().strip()
 
-        out = dict(self.field)
-        out["id"] = fid; out["label"] = label; out["component_type"] = ctype
-        input_def = dict(out.get("input") or {})
-        itype = self.var_input_type.get()
-        input_def["type"] = itype
+        out = self.field
+        out.id = fid; out.label = label; out.component_type = ctype
+        out.type = itype = TYPE_CODES[self.var_input_type.get()]
 
-        if itype == "number":
-            units = [u.strip() for u in self.var_units.get().split(",") if u.strip()]
-            input_def["units"] = units; input_def["default_unit"] = self.var_default_unit.get().strip()
+        if itype == NUMBER:
+            out.units = [u.strip() for u in self.var_units.get().split(",") if u.strip()]
+            out.default_unit = self.var_default_unit.get().strip()
             parts = [p.strip() for p in self.var_valid.get().split(",")]
             keys = ["target","lower_pct","upper_pct","lower_abs","upper_abs"]
             vd = {}
@@ -637,22 +764,20 @@ class FieldDialog:
                 if p != "":
                     try: vd[k] = float(p)
                     except: pass
-            input_def["validation"] = vd
+            out.validation = vd
         else:
-            input_def.pop("units", None); input_def.pop("default_unit", None); input_def.pop("validation", None)
+            out.units = out.default_unit = out.validation = None
 
-        if itype == "enum":
-            opts = [o.strip() for o in self.var_extras.get().split(",") if o.strip()]
-            input_def["options"] = opts
-        elif itype == "toggle":
+        if itype == ENUM:
+            out.options = [o.strip() for o in self.var_extras.get().split(",") if o.strip()]
+        elif itype == TOGGLE:
             t = self.var_extras.get()
             if "|" in t:
                 tlabel,flabel = t.split("|",1)
             else:
                 tlabel,flabel = "True","False"
-            input_def["labels"] = {"true": tlabel.strip(), "false": flabel.strip()}
+            out.labels = {"true": tlabel.strip(), "false": flabel.strip()}
 
-        out["input"] = input_def
         self.result = out; self.win.destroy()
 
     def _cancel(self):
@@ -2,72 +2,253 @@
 
 import os
 import numpy as np
-import skrf as rf
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QFileDialog, QTableWidget, QTableWidgetItem, QLabel
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QTableView, QHeaderView,
+    QLabel, QComboBox, QCheckBox
+)
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 
+from core import rfmask, sparams
+from ui.lod_plot import LODAxes
+
+TOUCHSTONE_FILTER = "Touchstone files (*.s1p *.s2p *.s3p *.s4p *.s*p);;All files (*)"
+MASK_FILTER = "Limit masks (*.json);;All files (*)"
+
+
+class SweepTableModel(QAbstractTableModel):
+    # Frequency plus dB and phase of every trace, held as one float array.
+    # Cells are formatted only when the view asks for them, so a 100k-point
+    # sweep costs nothing until rows are scrolled into view.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = np.empty((0, 1))
+        self._headers = ["Freq (GHz)"]
+        self._formats = ["{:.3f}"]
+
+    def set_network(self, net):
+        self.beginResetModel()
+        if net is None:
+            self._data = np.empty((0, 1)); self._headers = ["Freq (GHz)"]; self._formats = ["{:.3f}"]
+        else:
+            names = net.trace_names()
+            # columns: freq, then dB/phase interleaved per trace
+            cols = np.empty((net.n_points, 1 + 2 * len(names)))
+            cols[:, 0] = net.f / 1e9
+            cols[:, 1::2] = net.traces("db"); cols[:, 2::2] = net.traces("deg")
+            self._data = cols
+            self._headers = ["Freq (GHz)"] + [h for n in names for h in (f"{n} (dB)", f"{n} (°)")]
+            self._formats = ["{:.3f}"] + ["{:.2f}", "{:.1f}"] * len(names)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._data.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        if role == Qt.DisplayRole:
+            return self._formats[index.column()].format(self._data[index.row(), index.column()])
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return None
+        if orientation == Qt.Horizontal: return self._headers[section]
+        return str(section + 1)
+
+
 class S2PViewer(QWidget):
+    # One file shows its table and all traces. Several files are overlaid on
+    # one trace, with the min/max band and mean across them.
+    MAX_SINGLE_TRACES = 4
+
     def __init__(self):
         super().__init__()
 
         self.setWindowTitle("S2P Viewer")
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
+        self.networks = []
+        self.mask = None
+        self.results = []   # per network, from mask.evaluate_many
 
-        self.load_button = QPushButton("Load .s2p File")
+        bar = QHBoxLayout(); self.layout.addLayout(bar)
+        self.load_button = QPushButton("Load Touchstone File(s)")
         self.load_button.clicked.connect(self.load_s2p)
-        self.layout.addWidget(self.load_button)
+        bar.addWidget(self.load_button)
+        bar.addWidget(QLabel("Trace:"))
+        self.trace_combo = QComboBox(); self.trace_combo.currentIndexChanged.connect(lambda _: self.redraw())
+        bar.addWidget(self.trace_combo)
+        self.envelope_check = QCheckBox("Envelope"); self.envelope_check.setChecked(True)
+        self.envelope_check.toggled.connect(lambda _: self.redraw(rescale=False))
+        bar.addWidget(self.envelope_check)
+        self.mask_button = QPushButton("Mask…"); self.mask_button.clicked.connect(self.load_mask)
+        bar.addWidget(self.mask_button)
+        self.log_button = QPushButton("Log Runs"); self.log_button.clicked.connect(self.log_runs)
+        self.log_button.setEnabled(False)
+        bar.addWidget(self.log_button)
+        bar.addWidget(QLabel("Table:"))
+        self.file_combo = QComboBox(); self.file_combo.currentIndexChanged.connect(self._show_table)
+        bar.addWidget(self.file_combo, 1)
+
+        self.status = QLabel("")
+        self.layout.addWidget(self.status)
 
-        self.table = QTableWidget()
+        self.model = SweepTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        # fixed row heights: the view never measures rows it is not showing
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 6)
         self.layout.addWidget(self.table)
 
         self.figure = Figure(figsize=(5, 3))
         self.canvas = FigureCanvas(self.figure)
+        self.layout.addWidget(NavigationToolbar(self.canvas, self))
         self.layout.addWidget(self.canvas)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel("Frequency (GHz)")
+        self.ax.set_ylabel("Magnitude (dB)")
+        self.ax.grid(True)
+        self.lod = LODAxes(self.ax)
 
     def load_s2p(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Open S2P File", "", "S2P files (*.s2p)")
-        if not path:
-            return
+        paths, _ = QFileDialog.getOpenFileNames(self, "Open Touchstone Files", "", TOUCHSTONE_FILTER)
+        if paths:
+            self.load_files(paths)
 
+    def load_files(self, paths):
+        QApplication.setOverrideCursor(Qt.WaitCursor)
         try:
-            net = rf.Network(path)
-            freq = net.f / 1e9  # GHz
-            s11 = 20 * np.log10(np.abs(net.s[:, 0, 0]))
-            s21 = 20 * np.log10(np.abs(net.s[:, 1, 0]))
-            s12 = 20 * np.log10(np.abs(net.s[:, 0, 1]))
-            s22 = 20 * np.log10(np.abs(net.s[:, 1, 1]))
-
-            self.populate_table(freq, s11, s21, s12, s22)
-            self.plot_data(freq, s11, s21, s12, s22)
+            nets, errors = sparams.load_many(paths)
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.set_networks(nets)
+        msg = f"{len(nets)} file(s), {sum(n.n_points for n in nets)} points"
+        if errors:
+            msg += " — failed: " + "; ".join(f"{os.path.basename(p)}: {e}" for p, e in errors)
+        self.status.setText(msg + self._mask_summary())
+
+    def set_networks(self, nets):
+        self.networks = list(nets)
+        # traces common to every file (the smallest port count)
+        ports = min((n.n_ports for n in nets), default=0)
+        names = sparams.trace_names(ports) if ports else []
+        for combo, items, current in ((self.trace_combo, names, "S21" if "S21" in names else None),
+                                      (self.file_combo, [os.path.basename(n.path) for n in nets], None)):
+            combo.blockSignals(True); combo.clear(); combo.addItems(items)
+            if current: combo.setCurrentText(current)
+            combo.blockSignals(False)
+        self._evaluate()
+        self._show_table(0)
+        self.redraw()
+
+    # ----- limit mask -----
+    def load_mask(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Limit Mask", "", MASK_FILTER)
+        if not path: return
+        try:
+            self.mask = rfmask.Mask.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            self.status.setText(f"mask: {e}"); return
+        self._evaluate()
+        self.status.setText(f"mask {self.mask.name}: {len(self.mask)} bands" + self._mask_summary())
+        self.redraw(rescale=False)
+
+    def _evaluate(self):
+        self.results = self.mask.evaluate_many(self.networks) if self.mask is not None else []
+        self.log_button.setEnabled(bool(self.results))
+
+    def _mask_summary(self) -> str:
+        if not self.results: return ""
+        n_pass = sum(rfmask.passed(r) for r in self.results)
+        failed = [os.path.basename(net.path) for net, r in zip(self.networks, self.results) if not rfmask.passed(r)]
+        msg = f" — mask: {n_pass}/{len(self.results)} pass"
+        return msg + (" (failed: " + ", ".join(failed[:5]) + (" …" if len(failed) > 5 else "") + ")" if failed else "")
+
+    def log_runs(self):
+        # one run per loaded file: band margins as measurements, raw sweep as a blob
+        if not self.results: return
+        from datetime import datetime
+        from core import db
+        from core.runs import TS_FORMAT
+        ts = datetime.now().strftime(TS_FORMAT)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            db.init_db()
+            stats = db.insert_runs(rfmask.run_records(self.networks, self.mask, ts, self.mask.name,
+                                                      results=self.results))
         except Exception as e:
-            self.table.clear()
-            self.figure.clear()
-            self.layout.addWidget(QLabel(f"Error: {str(e)}"))
-
-    def populate_table(self, freq, s11, s21, s12, s22):
-        self.table.setRowCount(len(freq))
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["Freq (GHz)", "S11 (dB)", "S21 (dB)", "S12 (dB)", "S22 (dB)"])
-
-        for i in range(len(freq)):
-            self.table.setItem(i, 0, QTableWidgetItem(f"{freq[i]:.3f}"))
-            self.table.setItem(i, 1, QTableWidgetItem(f"{s11[i]:.2f}"))
-            self.table.setItem(i, 2, QTableWidgetItem(f"{s21[i]:.2f}"))
-            self.table.setItem(i, 3, QTableWidgetItem(f"{s12[i]:.2f}"))
-            self.table.setItem(i, 4, QTableWidgetItem(f"{s22[i]:.2f}"))
-
-    def plot_data(self, freq, s11, s21, s12, s22):
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        ax.plot(freq, s11, label="S11")
-        ax.plot(freq, s21, label="S21")
-        ax.plot(freq, s12, label="S12")
-        ax.plot(freq, s22, label="S22")
-        ax.set_title("S-Parameters")
-        ax.set_xlabel("Frequency (GHz)")
-        ax.set_ylabel("Magnitude (dB)")
-        ax.grid(True)
-        ax.legend()
-        self.canvas.draw()
+            self.status.setText(f"log failed: {e}"); return
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.status.setText(f"logged {stats.runs} runs ({stats.measurements} measurements)" + self._mask_summary())
+
+    def _show_table(self, index):
+        self.model.set_network(self.networks[index] if 0 <= index < len(self.networks) else None)
+
+    def redraw(self, rescale=True):
+        # Artists are kept across redraws and keyed by what they show; only
+        # the traces that changed get new data. rescale=False keeps the
+        # current zoom.
+        nets = self.networks
+        ax = self.ax
+        trace = self.trace_combo.currentText()
+        keys_before = set(self.lod.keys())
+        keys = []
+        if len(nets) == 1:
+            net = nets[0]
+            names = net.trace_names()
+            if len(names) > self.MAX_SINGLE_TRACES: names = [trace]
+            for name in names:
+                self.lod.line(("trace", name), net.f / 1e9, net.trace(name), label=name)
+                keys.append(("trace", name))
+            ax.set_title("S-Parameters")
+        elif nets:
+            keys = self.plot_overlay(nets, trace)
+            ax.set_title(f"{trace}: {len(nets)} files")
+        else:
+            ax.set_title("")
+        keys += self.plot_limits(names if len(nets) == 1 else [trace])
+        self.lod.retain(keys)
+        legend = ax.get_legend()
+        if legend is not None and set(keys) != keys_before: legend.remove(); legend = None
+        if legend is None and keys: ax.legend(loc="best")
+        changed = self.lod.autoscale() if rescale else False
+        # same traces on the same limits: repaint just the lines
+        self.lod.refresh(full=changed or set(keys) != keys_before)
+
+    def plot_limits(self, traces):
+        # mask limits of the shown traces, as dashed segments over each band
+        if self.mask is None or not self.networks: return []
+        keys = []
+        for band in self.mask.bands:
+            if band.trace not in traces: continue
+            for side, level in (("lower", band.lower), ("upper", band.upper)):
+                if level is None: continue
+                key = ("limit", band.name, side)
+                self.lod.line(key, [band.start / 1e9, band.stop / 1e9], [level, level],
+                              color="black", lw=1.5, ls="--", zorder=3, label="_nolegend_")
+                keys.append(key)
+        return keys
+
+    def plot_overlay(self, nets, trace):
+        show_env = self.envelope_check.isChecked()
+        keys = []
+        for k, net in enumerate(nets):
+            key = ("file", k, net.path)
+            self.lod.line(key, net.f / 1e9, net.trace(trace), lw=0.6, alpha=0.35 if show_env else 0.8,
+                          label="_nolegend_" if show_env else os.path.basename(net.path))
+            keys.append(key)
+        if show_env:
+            env = sparams.envelope(nets, trace)
+            f = env.f / 1e9
+            self.lod.band(("band",), f, env.min, env.max, alpha=0.2, color="tab:orange", label="min/max")
+            self.lod.line(("mean",), f, env.mean, color="tab:red", lw=1.5, label="mean")
+            keys += [("band",), ("mean",)]
+        return keys
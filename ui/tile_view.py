@@ -0,0 +1,74 @@
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
+from PyQt5.QtGui import QPixmap, QImage, QTransform
+from PyQt5.QtCore import Qt
+
+from core.tiles import TilePyramid, next_zoom
+
+
+def pil_to_pixmap(img):
+    img = img.convert("RGB")
+    data = img.tobytes("raw", "RGB")
+    qimg = QImage(data, img.width, img.height, 3 * img.width, QImage.Format_RGB888)
+    return QPixmap.fromImage(qimg)  # copies, so `data` may go away afterwards
+
+
+class TileView(QGraphicsView):
+    # Scene coordinates are page pixels at zoom 1.0; zoom is a view transform.
+    # Tiles for the current zoom are created for the visible area only and
+    # placed back in scene coordinates with a 1/zoom item scale.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.pyramid = None
+        self.zoom = 1.0
+        self._items = {}  # (col,row) -> QGraphicsPixmapItem
+        self.horizontalScrollBar().valueChanged.connect(self._refresh)
+        self.verticalScrollBar().valueChanged.connect(self._refresh)
+
+    def set_image(self, img):
+        self._clear()
+        self.pyramid = TilePyramid(img) if img is not None else None
+        if self.pyramid:
+            self.scene().setSceneRect(0, 0, self.pyramid.width, self.pyramid.height)
+        self._refresh()
+
+    def set_zoom(self, zoom):
+        if abs(zoom - self.zoom) < 1e-9: return
+        self.zoom = zoom
+        self._clear()
+        self.setTransform(QTransform.fromScale(zoom, zoom))
+        self._refresh()
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier:
+            self.set_zoom(next_zoom(self.zoom, 1 if event.angleDelta().y() > 0 else -1))
+            event.accept(); return
+        super().wheelEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._refresh()
+
+    def _clear(self):
+        for item in self._items.values():
+            self.scene().removeItem(item)
+        self._items.clear()
+
+    def _refresh(self, *args):
+        pyr = self.pyramid
+        if not pyr: return
+        r = self.mapToScene(self.viewport().rect()).boundingRect()
+        z = self.zoom
+        want = set(pyr.visible_tiles(z, r.left()*z, r.top()*z, r.right()*z, r.bottom()*z))
+        for key in [k for k in self._items if k not in want]:
+            self.scene().removeItem(self._items.pop(key))
+        t = pyr.tile_size
+        for col, row in want:
+            if (col, row) in self._items: continue
+            item = QGraphicsPixmapItem(pil_to_pixmap(pyr.tile(z, col, row)))
+            item.setTransformationMode(Qt.SmoothTransformation)
+            item.setScale(1.0 / z); item.setPos(col*t / z, row*t / z)
+            self.scene().addItem(item)
+            self._items[(col, row)] = item
@@ -0,0 +1,132 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from bisect import bisect_right
+from tkinter import ttk
+from typing import Callable, List, Optional, Sequence
+
+ROW_HEIGHT = 22
+MIN_COL_WIDTH = 60
+MAX_COL_WIDTH = 320
+SAMPLE_ROWS = 200   # rows measured when sizing columns
+CELL_PAD = 6
+
+HEADER_BG = "#E0E0E0"
+GRID_LINE = "#D0D0D0"
+
+
+class VirtualGrid(ttk.Frame):
+    # Read-only table drawn on a Canvas. The scrollregion covers the whole
+    # table, but only the cells inside the viewport exist as canvas items; they
+    # are redrawn after every scroll or resize, so the cost of a redraw depends
+    # on the window size rather than on rows x columns.
+    def __init__(self, master, row_height: int = ROW_HEIGHT, **kw):
+        super().__init__(master, **kw)
+        self.row_height = row_height
+        self.font = tkfont.nametofont("TkDefaultFont")
+        self.header_font = self.font.copy(); self.header_font.configure(weight="bold")
+        self.columns: List[str] = []
+        self.rows: List[Sequence[str]] = []
+        self.cell_bg: Optional[Callable[[int, int], Optional[str]]] = None
+        self._col_x: List[int] = [0]   # left edge of each column, plus the total width
+        self._redraw_pending = False
+        self._fit_cache = {}
+
+        self.header = tk.Canvas(self, height=row_height, background=HEADER_BG, highlightthickness=0)
+        self.body = tk.Canvas(self, background="white", highlightthickness=0)
+        ys = ttk.Scrollbar(self, orient="vertical", command=self.body.yview)
+        xs = ttk.Scrollbar(self, orient="horizontal", command=self._xview)
+        self.body.configure(yscrollcommand=lambda *a: (ys.set(*a), self._schedule_redraw()),
+                            xscrollcommand=lambda *a: (xs.set(*a), self._schedule_redraw()),
+                            xscrollincrement=20, yscrollincrement=row_height)
+        self.header.configure(xscrollincrement=20)
+        self.header.grid(row=0, column=0, sticky="ew")
+        self.body.grid(row=1, column=0, sticky="nsew")
+        ys.grid(row=1, column=1, sticky="ns"); xs.grid(row=2, column=0, sticky="ew")
+        self.grid_rowconfigure(1, weight=1); self.grid_columnconfigure(0, weight=1)
+
+        self.body.bind("<Configure>", lambda e: self._schedule_redraw())
+        self.body.bind("<MouseWheel>", lambda e: self.body.yview_scroll(-3 if e.delta > 0 else 3, "units"))
+        self.body.bind("<Shift-MouseWheel>", lambda e: self._xview("scroll", -3 if e.delta > 0 else 3, "units"))
+        self.body.bind("<Button-4>", lambda e: self.body.yview_scroll(-3, "units"))
+        self.body.bind("<Button-5>", lambda e: self.body.yview_scroll(3, "units"))
+
+    def set_data(self, columns: Sequence[str], rows: Sequence[Sequence[str]],
+                 cell_bg: Optional[Callable[[int, int], Optional[str]]] = None):
+        # cell_bg(row, col) -> fill colour or None for the default background
+        self.columns = list(columns); self.rows = list(rows); self.cell_bg = cell_bg
+        widths = []
+        for c, name in enumerate(self.columns):
+            w = self.header_font.measure(name)
+            for r in self.rows[:SAMPLE_ROWS]:
+                if c < len(r): w = max(w, self.font.measure(r[c]))
+            widths.append(min(MAX_COL_WIDTH, max(MIN_COL_WIDTH, w + 2 * CELL_PAD)))
+        self._col_x = [0]
+        for w in widths: self._col_x.append(self._col_x[-1] + w)
+        total_w = self._col_x[-1]; total_h = len(self.rows) * self.row_height
+        self.body.configure(scrollregion=(0, 0, total_w, total_h))
+        self.header.configure(scrollregion=(0, 0, total_w, self.row_height))
+        self.body.yview_moveto(0); self._xview("moveto", 0)
+        self._draw_header()
+        self._schedule_redraw()
+
+    def clear(self):
+        self.set_data([], [])
+
+    # ----- drawing -----
+    def _xview(self, *args):
+        self.body.xview(*args); self.header.xview(*args)
+
+    def _schedule_redraw(self):
+        if self._redraw_pending: return
+        self._redraw_pending = True
+        self.after_idle(self._redraw)
+
+    def _visible_cols(self, x0: float, x1: float) -> range:
+        c0 = max(0, bisect_right(self._col_x, x0) - 1)
+        c1 = min(len(self.columns), bisect_right(self._col_x, x1))
+        return range(c0, c1)
+
+    def _draw_header(self):
+        h = self.header; h.delete("all")
+        for c, name in enumerate(self.columns):
+            x0, x1 = self._col_x[c], self._col_x[c + 1]
+            h.create_line(x1 - 1, 0, x1 - 1, self.row_height, fill=GRID_LINE)
+            h.create_text(x0 + CELL_PAD, self.row_height // 2, text=name, anchor="w", font=self.header_font)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        b = self.body; b.delete("cell")
+        if not self.rows or not self.columns: return
+        x0 = b.canvasx(0); y0 = b.canvasy(0)
+        x1 = x0 + b.winfo_width(); y1 = y0 + b.winfo_height()
+        rh = self.row_height
+        r0 = max(0, int(y0 // rh)); r1 = min(len(self.rows), int(y1 // rh) + 1)
+        cols = self._visible_cols(x0, x1)
+        for r in range(r0, r1):
+            row = self.rows[r]; top = r * rh
+            for c in cols:
+                left, right = self._col_x[c], self._col_x[c + 1]
+                fill = self.cell_bg(r, c) if self.cell_bg else None
+                b.create_rectangle(left, top, right, top + rh, fill=fill or "", outline=GRID_LINE, tags="cell")
+                text = row[c] if c < len(row) else ""
+                if text:
+                    b.create_text(left + CELL_PAD, top + rh // 2, text=self._fit(text, right - left - 2 * CELL_PAD),
+                                  anchor="w", font=self.font, tags="cell")
+
+    def _fit(self, text: str, width: int) -> str:
+        # Canvas text is not clipped to its cell, so long values are shortened
+        # with an ellipsis. Results are memoised per (text, width).
+        key = (text, width)
+        fitted = self._fit_cache.get(key)
+        if fitted is None:
+            fitted = text
+            if self.font.measure(text) > width:
+                lo, hi = 0, len(text)
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if self.font.measure(text[:mid] + "…") <= width: lo = mid
+                    else: hi = mid - 1
+                fitted = text[:lo] + "…"
+            if len(self._fit_cache) > 20000: self._fit_cache.clear()
+            self._fit_cache[key] = fitted
+        return fitted